@@ -5,6 +5,8 @@ import base64
 import time
 import hashlib
 from app.io.supabase_client import init_supabase_client
+from app.services.profile_service import get_profile_service
+from app.ui.lazy_sections import clear_section_memo
 
 
 def authenticate_user(email: str, password: str) -> dict | None:
@@ -129,6 +131,8 @@ def clear_auth_cookies():
 def logout_user():
     """Виходить з системи користувача"""
     st.session_state['auth_user'] = None
+    get_profile_service().invalidate()
+    clear_section_memo()  # мемо секцій тримає дані попереднього користувача
     clear_auth_cookies()
     st.rerun()
 
@@ -1,6 +1,7 @@
 # app/auth/login_form.py
 import streamlit as st
 from .authentication import authenticate_user, save_auth_to_cookies
+from app.jobs.warmup import warm_home_slice
 
 
 def render_login_form():
@@ -16,6 +17,8 @@ def render_login_form():
             user_data = authenticate_user(email, password)
             if user_data:
                 st.session_state['auth_user'] = user_data
+                # Зріз головної сторінки вантажиться у фоні, поки рендериться rerun
+                warm_home_slice(user_data)
                 
                 if remember_me:
                     save_auth_to_cookies(user_data)
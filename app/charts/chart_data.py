@@ -0,0 +1,136 @@
+# app/charts/chart_data.py
+# Підготовка даних для графіків: обмежена кількість серій, агрегація до
+# роздільності графіка та компактні масиви колонок замість повних фреймів
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.utils import UKRAINIAN_MONTHS
+
+OTHER_LABEL = "Інші"
+# Скільки категорій показуємо окремо (решта — у «Інші»)
+DEFAULT_TOP_K = 15
+# Скільки місяців показуємо окремими лініями тренду по декадах
+MAX_TREND_SERIES = 12
+# Цілі до 2**24 float32 зберігає точно
+FLOAT32_EXACT_LIMIT = float(2 ** 24)
+
+
+def cap_categories(
+    df: pd.DataFrame,
+    cat_col: str,
+    value_col: str,
+    top_k: int = DEFAULT_TOP_K,
+    by: Sequence[str] = (),
+    other_label: str = OTHER_LABEL,
+) -> pd.DataFrame:
+    """
+    Топ-K категорій за сумою value_col, решта зводиться в один рядок «Інші»
+    (окремо для кожної комбінації колонок by). Порядок рядків: категорії за
+    спаданням загальної суми, «Інші» — останні.
+    """
+    if df is None or df.empty:
+        return df
+    by = list(by)
+    totals = df.groupby(cat_col, sort=False)[value_col].sum().sort_values(ascending=False)
+    if len(totals) <= top_k:
+        order = list(totals.index)
+        capped = df
+    else:
+        order = list(totals.index[:top_k])
+        keep = df[cat_col].isin(order)
+        rest = (
+            df.loc[~keep]
+            .groupby(by, as_index=False, sort=False)[value_col].sum()
+            if by else
+            pd.DataFrame({value_col: [df.loc[~keep, value_col].sum()]})
+        )
+        rest[cat_col] = other_label
+        capped = pd.concat([df.loc[keep, [cat_col, *by, value_col]], rest], ignore_index=True)
+        order.append(other_label)
+
+    rank = pd.Series(np.arange(len(order)), index=order)
+    capped = capped.assign(__rank__=capped[cat_col].map(rank).to_numpy())
+    sort_cols = ["__rank__", *by]
+    return capped.sort_values(sort_cols, kind="stable").drop(columns="__rank__").reset_index(drop=True)
+
+
+def category_order(df: pd.DataFrame, cat_col: str) -> List:
+    """Порядок категорій у вже обмеженому фреймі (як у cap_categories)"""
+    if df is None or df.empty:
+        return []
+    return list(pd.unique(df[cat_col]))
+
+
+def column_arrays(df: pd.DataFrame, columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    Компактні масиви колонок для трейсів Plotly (numpy серіалізується бінарно):
+    числа — float32, лише якщо всі значення цілі і |x| < 2**24 (тоді float32
+    зберігає їх точно), інакше float64 (гривні з копійками, частки тощо);
+    решта — рядки. NaN не заважає float32. Індекс і зайві колонки не передаються.
+    """
+    out: Dict[str, np.ndarray] = {}
+    for col in columns:
+        s = df[col]
+        if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            values = s.to_numpy(dtype="float64", na_value=np.nan)
+            known = values[~np.isnan(values)]
+            fits = bool(np.all(np.abs(known) < FLOAT32_EXACT_LIMIT) and np.all(known == np.trunc(known)))
+            out[col] = values.astype("float32") if fits else values
+        else:
+            out[col] = s.astype(str).to_numpy(dtype=object)
+    return out
+
+
+def product_month_bars(
+    multi_df: pd.DataFrame,
+    prod_col: str,
+    top_k: int = DEFAULT_TOP_K,
+) -> pd.DataFrame:
+    """
+    Дані для згрупованих стовпців «продукт × місяць»: топ-K продуктів +
+    «Інші» в кожному місяці; колонки [prod_col, month_int, Місяць, total_quantity].
+    """
+    if multi_df is None or multi_df.empty:
+        return pd.DataFrame()
+    capped = cap_categories(multi_df, prod_col, "total_quantity", top_k=top_k, by=["month_int"])
+    capped["Місяць"] = capped["month_int"].astype(int).map(lambda m: UKRAINIAN_MONTHS.get(int(m), str(m)))
+    return capped
+
+
+def product_bars(qty_df: pd.DataFrame, prod_col: str, top_k: int = DEFAULT_TOP_K) -> pd.DataFrame:
+    """Дані для стовпців «продукт»: топ-K + «Інші»"""
+    if qty_df is None or qty_df.empty:
+        return pd.DataFrame()
+    return cap_categories(qty_df, prod_col, "total_quantity", top_k=top_k)
+
+
+def trend_series(trend_df: pd.DataFrame, max_series: int = MAX_TREND_SERIES) -> Optional[pd.DataFrame]:
+    """
+    Дані для тренду: до max_series місяців — лінія на місяць по декадах
+    (колонки decade, revenue, Серія); для довшого періоду — одна лінія на
+    місячній роздільності (колонки Період, revenue). Місяці різних років
+    розрізняються в підписі серії.
+    """
+    if trend_df is None or trend_df.empty:
+        return trend_df
+    df = trend_df.sort_values(["year", "month_int", "decade"])
+    years = df["year"].astype(int)
+    month_names = df["month_int"].astype(int).map(lambda m: UKRAINIAN_MONTHS.get(int(m), str(m)))
+    label = month_names if years.nunique() == 1 else month_names + " " + years.astype(str)
+
+    n_months = len(df.drop_duplicates(["year", "month_int"]))
+    if n_months <= max_series:
+        return pd.DataFrame({
+            "decade": df["decade"].to_numpy(),
+            "revenue": df["revenue"].to_numpy(),
+            "Серія": label.to_numpy(),
+        })
+    monthly = (
+        df.assign(Період=label)
+        .groupby(["year", "month_int", "Період"], as_index=False, sort=True)["revenue"].sum()
+    )
+    return monthly[["Період", "revenue"]]
@@ -0,0 +1,52 @@
+# app/charts/figure_cache.py
+# Кеш готових графіків за відбитком даних і параметрами графіка (LRU)
+from __future__ import annotations
+
+from typing import Any, Callable, Optional
+
+import streamlit as st
+
+from app.utils.data_fingerprint import MemoStore, memo_key
+
+FIGURE_CACHE_MAX_ENTRIES = 64
+
+
+@st.cache_resource(show_spinner=False)
+def get_figure_cache() -> MemoStore:
+    """Спільний для процесу кеш графіків (ключ містить відбиток вибірки)"""
+    return MemoStore(FIGURE_CACHE_MAX_ENTRIES)
+
+
+def _cached(kind: str, name: str, build: Callable[[], Any], key_parts: tuple) -> Any:
+    key = memo_key(*key_parts)
+    if key is None:
+        return build()
+    store = get_figure_cache()
+    full_key = (kind, name, key)
+    hit, value = store.get(full_key)
+    if not hit:
+        value = build()
+        store.put(full_key, value)
+    return value
+
+
+def plotly_figure(name: str, build: Callable[[], Any], *key_parts: Any) -> Optional[Any]:
+    """
+    Plotly-фігура з кешу або build() (None — графіка немає).
+    key_parts — фрейми-джерела (за відбитком) і параметри графіка.
+
+    Зберігається вже провалідована go.Figure, а не JSON: st.plotly_chart
+    для dict повторно валідує схему, а Figure серіалізує з validate=False.
+    Фігуру з кешу не можна змінювати — вона спільна для всіх сесій.
+    """
+    return _cached("plotly", name, build, key_parts)
+
+
+def render_plotly(name: str, build: Callable[[], Any], *key_parts: Any) -> bool:
+    """Показує кешовану Plotly-фігуру; False — build() нічого не побудував"""
+    fig = plotly_figure(name, build, *key_parts)
+    if fig is None:
+        return False
+    st.plotly_chart(fig, use_container_width=True)
+    return True
+
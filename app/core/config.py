@@ -157,4 +157,32 @@ NUMERIC_WIDE_COLS: List[str] = [
     "Аванс",
     "Залишок Накопичень на наст.міс.",
     "Залишок на наст. міс.",
-]
\ No newline at end of file
+]
+
+# ---------------------------
+# doctor_points: колонки, які реально потрібні сторінці «Лікарі»
+# ---------------------------
+DOCTOR_POINTS_COLUMNS: List[str] = [
+    "id",
+    "М.П.",
+    "Місто",
+    "ЛПЗ",
+    "П.І.Б. лікаря",
+    "Спеціалізація лікаря",
+    "Препарат",
+    "К-сть",
+    "Сума Балів (поточ.міс.)",
+    "Кіл-сть упаковок загальна",
+    "year",
+    "month",
+]
+
+
+def postgrest_column(column: str) -> str:
+    """Назва колонки для PostgREST; назви з пробілами/крапками/кирилицею беруться в лапки"""
+    return column if column.isidentifier() and column.isascii() else f'"{column}"'
+
+
+def postgrest_select(columns: List[str]) -> str:
+    """Рядок select для PostgREST"""
+    return ",".join(postgrest_column(c) for c in columns)
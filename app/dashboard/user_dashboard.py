@@ -1,6 +1,5 @@
 # app/dashboard/user_dashboard.py
 import streamlit as st
-import datetime as dt
 import pandas as pd
 from app.io.supabase_client import init_supabase_client
 from app.io import loader_sales as data_loader
@@ -8,6 +7,8 @@ from app.services.sales_data_service import SalesDataService
 from app.services.sales_analytics_service import SalesAnalyticsService
 from app.services.sales_charts_service import SalesChartsService
 from app.utils.sales_formatters import SalesFormatters
+from app.utils.data_fingerprint import derive, stamp
+from app.services.profile_service import get_profile_service, home_sales_slice
 
 
 def fetch_user_sales_independent(profile: dict):
@@ -23,23 +24,19 @@ def fetch_user_sales_independent(profile: dict):
     if not client:
         raise RuntimeError("Supabase не ініціалізовано.")
 
-    # фільтри з профілю
-    region_id = profile.get("region_id")
-    region_name = profile.get("region")  # Використовуємо повну назву з профілю, напр. '24. Тернопіль'
-    if isinstance(region_name, str):
-        region_name = region_name.strip()
-    territory_tech = (profile.get("territory") or "").strip() or "Всі"   # у профілі вже технічна назва
-    line_param = (profile.get("line") or "Всі").strip() or "Всі"
+    # фільтри з профілю і поточний календарний місяць (без обмеження декадою)
+    params = home_sales_slice(profile)
+    region_id = params["region_id"]
+    region_name = params["region_name"]
+    territory_tech = params["territory"]
+    line_param = params["line"]
+    current_year = params["year"]
+    current_month = params["month"]
+    months_param = params["months_param"]
 
-    # Використовуємо поточний календарний місяць (без обмеження декадою)
-    today = dt.date.today()
-    current_year = today.year
-    current_month = today.month
-    months_param = [f"{current_month:02d}"]  # лоадер очікує рядки "MM"
-
-    # завантажити "як на Sales" (той самий лоадер, але це незалежно від самої сторінки)
+    # завантажити "як на Sales" (той самий лоадер; після входу зріз уже прогрітий у кеші — app.jobs.warmup)
     df_loaded = data_loader.fetch_all_sales_data(
-        region_name=region_name or None,   # лоадер приймає назву регіону (не id)
+        region_name=region_name,           # лоадер приймає назву регіону (не id)
         territory=territory_tech,          # технічна назва або "Всі"
         line=line_param,                   # "Всі"/"Лінія 1"/"Лінія 2"
         months=months_param
@@ -67,11 +64,10 @@ def display_user_profile(user):
         client = init_supabase_client()
         if client:
             try:
-                # Отримуємо дані користувача з таблиці profiles за id
-                result = client.table("profiles").select("*").eq("id", user['id']).execute()
+                # Профіль з кешу сесії (один запит до profiles на TTL)
+                profile_data = get_profile_service().get(user)
                 
-                if result.data and len(result.data) > 0:
-                    profile_data = result.data[0]
+                if profile_data:
                     return profile_data
                 else:
                     st.warning("Дані користувача не знайдено в таблиці profiles")
@@ -93,13 +89,11 @@ def display_sales_data(profile_data, user):
         return
 
 
-    # Спробуємо ще раз отримати повний профіль (за email), щоб мати region/territory/line/region_id/type/city
-    client = init_supabase_client()
+    # Повний профіль (region/territory/line/region_id/type/city) — з кешу сесії,
+    # без повторного запиту до profiles
     profile_row = None
     try:
-        if client:
-            prof_q = client.table("profiles").select("*").eq("email", user['email']).limit(1).execute()
-            profile_row = (prof_q.data or [None])[0]
+        profile_row = get_profile_service().get(user)
     except Exception as e:
         st.warning(f"Не вдалося повторно отримати профіль: {e}")
 
@@ -121,6 +115,12 @@ def display_sales_data(profile_data, user):
             charts_service = SalesChartsService()
             formatters = SalesFormatters()
 
+            # Відбиток зрізу — аналітика мемоізується між ререндерами
+            stamp(
+                df_sales, "home", meta.get('region_name'), meta.get('territory'), meta.get('line'),
+                tuple(meta.get('months_param') or ()), tables=("sales_data",),
+            )
+
             # Підготовка робочих даних
             df_work = data_service.prepare_work_data(df_sales)
 
@@ -137,6 +137,7 @@ def display_sales_data(profile_data, user):
             # Остання декада для KPI і таблиць
             df_latest_decade, last_decade, cur_year, cur_month = data_service.get_latest_decade_data(df_work)
             df_latest_with_revenue = df_latest_decade.copy()
+            price_df_cur = pd.DataFrame()
             if cur_month is not None and region_id:
                 price_df_cur = data_service.fetch_price_data(region_id, [cur_month])
                 if not price_df_cur.empty:
@@ -151,6 +152,7 @@ def display_sales_data(profile_data, user):
                         df_latest_with_revenue['revenue'] = df_latest_with_revenue['quantity'] * df_latest_with_revenue['price']
                 if 'revenue' not in df_latest_with_revenue.columns:
                     df_latest_with_revenue['revenue'] = 0.0
+            derive(df_latest_with_revenue, "latest_revenue", df_latest_decade, price_df_cur)
             
             # Блок з KPI та графіком і зведеною таблицею
             col1, col2 = st.columns([5, 2])
@@ -0,0 +1,155 @@
+# app/data/address_facts.py
+# Факт продажів за адресами: одна зведена таблиця на весь зріз замість pivot на кожну адресу
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ADDRESS_COL = "full_address"
+CLIENT_COL = "__client_name__"
+QTY_COL = "actual_quantity"
+CLIENT_COL_CANDIDATES = ["new_client", "client", "pharmacy", "client_name"]
+TIME_COL_CANDIDATES = ["year", "month_int", "decade"]
+
+
+@dataclass
+class AddressFacts:
+    """
+    pivot: рядки (адреса, клієнт, препарат) × колонки (рік, місяць, декада);
+    blocks: один рядок на (адреса, клієнт) — підсумок і межі рядків у pivot,
+    у порядку groupby (адреса, клієнт);
+    product_pivot: загальна зведена препарати × періоди.
+    """
+    pivot: Optional[pd.DataFrame]
+    blocks: pd.DataFrame
+    product_pivot: Optional[pd.DataFrame]
+
+    @classmethod
+    def empty(cls) -> "AddressFacts":
+        blocks = pd.DataFrame(columns=[ADDRESS_COL, CLIENT_COL, "total", "start", "stop", "__search__"])
+        return cls(pivot=None, blocks=blocks, product_pivot=None)
+
+    @property
+    def n_blocks(self) -> int:
+        return len(self.blocks)
+
+    def search(self, text: str) -> pd.DataFrame:
+        """Блоки, де адреса або клієнт містять text (без урахування регістру)"""
+        text = (text or "").strip().lower()
+        if not text:
+            return self.blocks
+        hay = self.blocks["__search__"]
+        return self.blocks[hay.str.contains(text, regex=False)]
+
+    def block(self, start: int, stop: int) -> Optional[pd.DataFrame]:
+        """Зведена таблиця одного блоку: препарати × періоди, лише періоди з продажами"""
+        if self.pivot is None or start < 0:
+            return None
+        part = self.pivot.iloc[start:stop].droplevel([0, 1])
+        return part.loc[:, part.to_numpy().any(axis=0)]
+
+
+def full_address(df: pd.DataFrame) -> pd.Series:
+    """'Місто, Вулиця Будинок' (або наявна повна адреса)"""
+    if {"city", "street", "house_number"}.issubset(df.columns):
+        return (
+            df["city"].fillna("").astype(str).str.strip() + ", " +
+            df["street"].fillna("").astype(str).str.strip() + " " +
+            df["house_number"].fillna("").astype(str).str.strip()
+        ).str.strip(", ")
+    if "full_address_processed" in df.columns:
+        return df["full_address_processed"].astype(str).fillna("").str.strip()
+    if "address" in df.columns:
+        return df["address"].astype(str).fillna("").str.strip()
+    return pd.Series("", index=df.index)
+
+
+def actual_sales(df: pd.DataFrame) -> pd.DataFrame:
+    """Рядки з позитивною кількістю (факт) з колонкою actual_quantity"""
+    if "quantity" not in df.columns:
+        return pd.DataFrame()
+    qty = pd.to_numeric(df["quantity"], errors="coerce").fillna(0)
+    mask = (qty > 0).to_numpy()
+    out = df.loc[mask].copy()
+    out[QTY_COL] = qty.to_numpy()[mask]
+    return out
+
+
+def build_address_facts(df_actual: pd.DataFrame, product_col: str = "product_name") -> AddressFacts:
+    """
+    Один pivot_table на весь зріз: (адреса, клієнт, препарат) × (рік, місяць, декада).
+    Межі кожного блоку (адреса, клієнт) у відсортованому індексі рахуються одразу,
+    тож відкриття будь-якого блоку — це iloc-зріз, а не новий pivot.
+    Порожній зріз (або без actual_quantity) — AddressFacts.empty().
+    """
+    if df_actual is None or df_actual.empty or QTY_COL not in df_actual.columns:
+        return AddressFacts.empty()
+
+    time_cols = [c for c in TIME_COL_CANDIDATES if c in df_actual.columns]
+    client_src = next((c for c in CLIENT_COL_CANDIDATES if c in df_actual.columns), None)
+
+    base = pd.DataFrame({
+        ADDRESS_COL: full_address(df_actual),
+        CLIENT_COL: df_actual[client_src] if client_src else "",
+        QTY_COL: df_actual[QTY_COL],
+    }, index=df_actual.index)
+
+    totals = (
+        base.groupby([ADDRESS_COL, CLIENT_COL], sort=True)[QTY_COL]
+        .sum()
+        .rename("total")
+        .reset_index()
+    )
+
+    pivot = None
+    product_pivot = None
+    if product_col in df_actual.columns and time_cols:
+        for col in time_cols:
+            base[col] = df_actual[col]
+        base[product_col] = df_actual[product_col]
+        pivot = base.pivot_table(
+            index=[ADDRESS_COL, CLIENT_COL, product_col],
+            columns=time_cols,
+            values=QTY_COL,
+            aggfunc="sum", fill_value=0,
+        ).sort_index()
+        product_pivot = df_actual.pivot_table(
+            index=product_col,
+            columns=time_cols,
+            values=QTY_COL,
+            aggfunc="sum", fill_value=0,
+        )
+
+        # межі блоків (адреса, клієнт) у відсортованому pivot
+        codes = [pivot.index.codes[0], pivot.index.codes[1]]
+        change = np.flatnonzero((np.diff(codes[0]) != 0) | (np.diff(codes[1]) != 0)) + 1
+        starts = np.r_[0, change] if len(pivot) else np.array([], dtype=int)
+        stops = np.r_[change, len(pivot)] if len(pivot) else np.array([], dtype=int)
+        bounds = pd.DataFrame({
+            ADDRESS_COL: pivot.index.get_level_values(0)[starts],
+            CLIENT_COL: pivot.index.get_level_values(1)[starts],
+            "start": starts,
+            "stop": stops,
+        })
+        totals = totals.merge(bounds, on=[ADDRESS_COL, CLIENT_COL], how="left")
+        # блок без рядків у pivot (усі періоди порожні) — без таблиці
+        totals[["start", "stop"]] = totals[["start", "stop"]].fillna(-1).astype(int)
+    else:
+        totals["start"] = -1
+        totals["stop"] = -1
+
+    totals["__search__"] = (
+        totals[ADDRESS_COL].astype(str) + " " + totals[CLIENT_COL].astype(str)
+    ).str.lower()
+    return AddressFacts(pivot=pivot, blocks=totals, product_pivot=product_pivot)
+
+
+def block_rows(blocks: pd.DataFrame) -> List[Tuple[str, str, float, int, int]]:
+    """(адреса, клієнт, підсумок, start, stop) для рендерингу сторінки блоків"""
+    return list(zip(
+        blocks[ADDRESS_COL], blocks[CLIENT_COL], blocks["total"],
+        blocks["start"].astype(int), blocks["stop"].astype(int),
+    ))
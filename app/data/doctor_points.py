@@ -0,0 +1,238 @@
+# app/data/doctor_points.py
+# Агрегати для сторінки «Лікарі» (doctor_points): виміри та зведені таблиці
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.data.facet_index import FacetIndex
+from app.data.transform import sum_distinct_by
+from app.utils.data_fingerprint import MemoStore
+
+DOCTOR_COL = "П.І.Б. лікаря"
+MP_COL = "М.П."
+PERIOD_COL = "period"
+CITY_COL = "Місто"
+LPZ_COL = "ЛПЗ"
+SPEC_COL = "Спеціалізація лікаря"
+POINTS_COL = "Сума Балів (поточ.міс.)"
+PACKS_TOTAL_COL = "Кіл-сть упаковок загальна"
+
+DRUG_COL_CANDIDATES: List[str] = [
+    "Препарат", "Найменування", "Назва препарату", "Найменування препарату", "Препарат (Найменування)",
+]
+QTY_COL_CANDIDATES: List[str] = [
+    "Кількість", "Кіл-сть", "К-сть", "Кіл-сть упаковок (рах. автомат.)", "Кіл-сть упаковок загальна", "Кількість, уп.",
+]
+FILTER_COLS: List[str] = [CITY_COL, LPZ_COL, DOCTOR_COL, SPEC_COL]
+# Скільки зрізів (комбінацій фільтрів) куб тримає в пам'яті сесії
+CUBE_MEMO_MAX_ENTRIES = 64
+
+
+def doctor_mp_dimension(df: pd.DataFrame, doctor_col: str = DOCTOR_COL, mp_col: str = MP_COL) -> pd.Series:
+    """
+    Вимір «лікар → М.П.»: перший М.П., з яким лікар трапляється у даних.
+    Повертає Series з індексом = ПІБ лікаря.
+    """
+    if mp_col not in df.columns:
+        return pd.Series(dtype=object, name=mp_col)
+    dim = df[[doctor_col, mp_col]].drop_duplicates(subset=[doctor_col])
+    return dim.set_index(doctor_col)[mp_col]
+
+
+def doctor_drug_pivot(
+    df: pd.DataFrame,
+    drug_col: str,
+    qty_col: str,
+    doctor_col: str = DOCTOR_COL,
+    mp_col: str = MP_COL,
+    period_col: str = PERIOD_COL,
+) -> pd.DataFrame:
+    """
+    Зведена таблиця «М.П. × лікар × період → препарати (кількість)».
+
+    Одна групова агрегація (лікар, період, препарат) + unstack; М.П. додається
+    з виміру doctor_mp_dimension одним join. Кожен лікар має рядок на кожен
+    період вибірки (нулі, якщо в періоді продажів не було). Як і в попередньому
+    pivot_table, рядки з порожнім лікарем, препаратом, періодом чи М.П.
+    відкидаються, а суми обрізаються до цілих (astype(int)).
+    """
+    qty = pd.to_numeric(df[qty_col], errors="coerce")
+    grouped = (
+        qty.groupby([df[doctor_col], df[period_col], df[drug_col]])
+        .sum()
+        .unstack(drug_col, fill_value=0)
+    )
+
+    doctors = grouped.index.get_level_values(0).unique()
+    periods = pd.Index(df[period_col].dropna().unique()).sort_values()
+    full_index = pd.MultiIndex.from_product([doctors, periods], names=[doctor_col, "Період"])
+    grouped.index = grouped.index.set_names([doctor_col, "Період"])
+    pivot = grouped.reindex(full_index, fill_value=0).sort_index(axis=1)
+
+    if mp_col in df.columns:
+        dim = doctor_mp_dimension(df, doctor_col, mp_col)
+        mp = dim.reindex(pivot.index.get_level_values(0)).to_numpy()
+        keep = pd.notna(mp)
+        pivot = pivot[keep]
+        pivot.insert(0, mp_col, mp[keep])
+    else:
+        pivot.insert(0, mp_col, "")
+    pivot = pivot.reset_index().set_index([mp_col, doctor_col, "Період"]).sort_index()
+    pivot.columns.name = drug_col
+    return pivot.astype(int).reset_index()
+
+
+def first_present(candidates: List[str], columns) -> Optional[str]:
+    """Перша колонка з candidates, яка є в columns"""
+    cols = set(columns)
+    return next((c for c in candidates if c in cols), None)
+
+
+def add_period(df: pd.DataFrame) -> pd.DataFrame:
+    """Додає колонку period у форматі YYYY-MM (або «—», якщо немає year/month)"""
+    out = df.copy()
+    if "year" in out.columns and "month" in out.columns:
+        try:
+            out["year"] = out["year"].astype(int)
+            out["month"] = out["month"].astype(int)
+        except Exception:
+            pass
+        out[PERIOD_COL] = out["year"].astype(str) + "-" + out["month"].astype(int).astype(str).str.zfill(2)
+    else:
+        out[PERIOD_COL] = "—"
+    return out
+
+
+class DoctorPointsCube:
+    """
+    Аналітичний «куб» над завантаженими doctor_points:
+    виміри (М.П., місто, ЛПЗ, лікар, спеціалізація, препарат, період),
+    міри — кількість та бали.
+
+    Будується один раз на завантажений набір і версію даних (див. data_versions);
+    усі таблиці сторінки — зрізи куба, що кешуються (LRU) на комбінацію фільтрів.
+    """
+
+    def __init__(self, df: pd.DataFrame, version: int = 0):
+        self.version = version
+        self.fact = add_period(df).reset_index(drop=True)
+        cols = self.fact.columns
+        self.drug_col = first_present(DRUG_COL_CANDIDATES, cols)
+        self.qty_col = first_present(QTY_COL_CANDIDATES, cols)
+        self.city_col = CITY_COL if CITY_COL in cols else None
+        self.doctor_col = DOCTOR_COL if DOCTOR_COL in cols else None
+        self.spec_col = SPEC_COL if SPEC_COL in cols else None
+        self.points_col = POINTS_COL if POINTS_COL in cols else None
+        self.packs_col = PACKS_TOTAL_COL if PACKS_TOTAL_COL in cols else None
+        self.missing_filter_cols = [c for c in FILTER_COLS if c not in cols]
+        self.facets = FacetIndex(self.fact, FILTER_COLS + ([self.drug_col] if self.drug_col else []))
+        self._memo = MemoStore(CUBE_MEMO_MAX_ENTRIES)
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.fact)
+
+    @property
+    def n_cols(self) -> int:
+        # без службової колонки period
+        return self.fact.shape[1] - 1
+
+    def _cached(self, name: str, key: tuple, fn: Callable):
+        memo_key = (name, key)
+        found, value = self._memo.get(memo_key)
+        if not found:
+            value = fn()
+            self._memo.put(memo_key, value)
+        return value
+
+    def rows(self, positions: Optional[np.ndarray]) -> pd.DataFrame:
+        """Рядки факту за позиціями FacetIndex (None = всі)"""
+        return self.fact if positions is None else self.fact.iloc[positions]
+
+    # ----------------- огляд (без фільтрів) -----------------
+
+    def overview(self) -> Dict[str, Optional[pd.DataFrame]]:
+        """Таблиці для діаграм над усім набором; рахуються один раз"""
+        return self._cached("overview", (), self._build_overview)
+
+    def _build_overview(self) -> Dict[str, Optional[pd.DataFrame]]:
+        f = self.fact
+        out: Dict[str, Optional[pd.DataFrame]] = dict.fromkeys(
+            ["drug_by_period", "spec_qty", "spec_points", "top_cities", "top_doctors_qty", "top_doctors_points"]
+        )
+        qty, drug, doc, spec = self.qty_col, self.drug_col, self.doctor_col, self.spec_col
+
+        if drug and qty:
+            out["drug_by_period"] = f.groupby([drug, PERIOD_COL], dropna=False)[qty].sum(min_count=1).reset_index()
+        if spec and qty:
+            out["spec_qty"] = (
+                f.groupby([spec, PERIOD_COL], dropna=False)[qty].sum(min_count=1)
+                .reset_index().sort_values(qty, ascending=False)
+            )
+        doc_period_max = None
+        if doc and self.points_col:
+            doc_period_max = f.groupby([doc, PERIOD_COL], dropna=False)[self.points_col].max().reset_index()
+        if spec and doc_period_max is not None:
+            spec_map = f[[doc, spec]].dropna(subset=[doc]).drop_duplicates()
+            d6 = doc_period_max.sort_values(self.points_col, ascending=False).merge(spec_map, on=doc, how="left")
+            out["spec_points"] = (
+                d6.groupby([spec, PERIOD_COL], dropna=False)[self.points_col].sum(min_count=1)
+                .reset_index().sort_values(self.points_col, ascending=False)
+            )
+        if self.city_col and qty:
+            out["top_cities"] = (
+                f.groupby(self.city_col, dropna=False)[qty].sum(min_count=1).reset_index()
+                .sort_values(qty, ascending=False).head(5).sort_values(qty, ascending=True)
+            )
+        if doc and qty:
+            out["top_doctors_qty"] = (
+                f.groupby(doc, dropna=False)[qty].sum(min_count=1).reset_index()
+                .sort_values(qty, ascending=False).head(10)
+            )
+        if doc_period_max is not None:
+            out["top_doctors_points"] = (
+                doc_period_max.groupby(doc, dropna=False)[self.points_col].sum(min_count=1).reset_index()
+                .sort_values(self.points_col, ascending=False).head(10)
+            )
+        return out
+
+    # ----------------- помісячні підсумки (з фільтрами) -----------------
+
+    def monthly(self, positions: Optional[np.ndarray], key: tuple) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        Підсумки по місяцях для відфільтрованих рядків. key — ключ вибору
+        з FacetIndex.narrow(); однаковий вибір повертає вже пораховані таблиці.
+        """
+        return self._cached("monthly", key, lambda: self._build_monthly(self.rows(positions)))
+
+    def _build_monthly(self, dfm: pd.DataFrame) -> Dict[str, Optional[pd.DataFrame]]:
+        out: Dict[str, Optional[pd.DataFrame]] = dict.fromkeys(["drug_qty", "points", "packs_total", "pivot"])
+        drug, qty, doc = self.drug_col, self.qty_col, self.doctor_col
+        if not drug or not doc:
+            return out
+
+        if qty:
+            pt_qty = (
+                dfm.groupby([drug, doc, PERIOD_COL], dropna=False)[qty]
+                .sum(min_count=1)
+                .reset_index()
+                .pivot(index=[drug, doc], columns=PERIOD_COL, values=qty)
+                .fillna(0)
+            )
+            try:
+                pt_qty = pt_qty.astype(int)
+            except Exception:
+                pass
+            pt_qty = pt_qty.reset_index()
+            out["drug_qty"] = pt_qty[[doc, drug] + [c for c in pt_qty.columns if c not in (doc, drug)]]
+            out["pivot"] = doctor_drug_pivot(dfm, drug_col=drug, qty_col=qty, doctor_col=doc)
+
+        for name, col in (("points", self.points_col), ("packs_total", self.packs_col)):
+            if col:
+                per_doctor = sum_distinct_by(dfm, [doc, PERIOD_COL], col)
+                total = per_doctor.groupby(PERIOD_COL)[col].sum().to_frame().T
+                out[name] = total.apply(pd.to_numeric, errors="coerce").fillna(0)
+        return out
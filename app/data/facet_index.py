@@ -0,0 +1,76 @@
+# app/data/facet_index.py
+# Індекс для каскадних фільтрів (місто → ЛПЗ → лікар → спеціалізація → препарат)
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.utils.data_fingerprint import MemoStore
+
+# Скільки списків опцій (комбінацій вибору) тримати на один індекс
+OPTIONS_MEMO_MAX_ENTRIES = 256
+
+
+class FacetIndex:
+    """
+    Будується один раз на завантажений DataFrame.
+
+    Для кожної колонки-фільтра зберігає коди значень (factorize, відсортовані)
+    та позиції рядків для кожного значення. Вибір у фільтрі — це об'єднання
+    позицій обраних значень і перетин з позиціями попередніх рівнів, а списки
+    опцій рахуються лише по поточних позиціях і кешуються (LRU) на комбінацію вибору.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Iterable[str]):
+        self.n_rows = len(df)
+        self.columns: List[str] = [c for c in columns if c in df.columns]
+        self._codes: Dict[str, np.ndarray] = {}
+        self._labels: Dict[str, np.ndarray] = {}
+        self._positions: Dict[str, List[np.ndarray]] = {}
+        self._label_code: Dict[str, Dict] = {}
+        self._options_memo = MemoStore(OPTIONS_MEMO_MAX_ENTRIES)
+
+        for col in self.columns:
+            values = df[col]
+            blank = values.isna() | (values.astype(str).str.strip() == "")
+            codes, labels = pd.factorize(values.where(~blank), sort=True)
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+            self._codes[col] = codes
+            self._labels[col] = np.asarray(labels, dtype=object)
+            self._positions[col] = [order[bounds[i]:bounds[i + 1]] for i in range(len(labels))]
+            self._label_code[col] = {label: i for i, label in enumerate(labels)}
+
+    def options(self, col: str, positions: Optional[np.ndarray] = None, key: tuple = ()) -> List:
+        """Відсортовані непорожні значення колонки серед рядків positions (None = усі рядки)"""
+        memo_key = (col, key)
+        found, options = self._options_memo.get(memo_key)
+        if not found:
+            codes = self._codes[col] if positions is None else self._codes[col][positions]
+            present = np.unique(codes[codes >= 0])
+            options = self._labels[col][present].tolist()
+            self._options_memo.put(memo_key, options)
+        return options
+
+    def select(self, col: str, values: Iterable, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """Позиції рядків, де col ∈ values, у межах positions (None = усі рядки)"""
+        codes = [self._label_code[col][v] for v in values if v in self._label_code[col]]
+        if not codes:
+            return np.empty(0, dtype=np.int64)
+        picked = np.sort(np.concatenate([self._positions[col][c] for c in codes]))
+        if positions is None:
+            return picked
+        return np.intersect1d(positions, picked, assume_unique=True)
+
+    def narrow(self, col: str, selected: list, positions: Optional[np.ndarray], key: tuple):
+        """
+        Один рівень каскаду: застосовує вибір у колонці col до positions.
+        key — незмінний опис попередніх виборів (ключ кешу опцій наступних рівнів).
+        Повертає (new_positions, new_key).
+        """
+        new_key = key + ((col, tuple(selected)),)
+        if not selected:
+            return positions, new_key
+        return self.select(col, selected, positions), new_key
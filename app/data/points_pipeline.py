@@ -0,0 +1,113 @@
+# app/data/points_pipeline.py
+# Імпорт Excel з балами за один прохід: план колонок + виконання без проміжних копій
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import pandas as pd
+
+from app.core.config import DROP_COLS, NUMERIC_WIDE_COLS, PIN_COLS, RENAME_MAP
+from app.data.transform import unpivot_sparse
+
+ANCHOR_COL = "Кіл-сть упаковок загальна"
+
+
+@dataclass
+class PointsIngestPlan:
+    """
+    Що зробити з колонками «широкої» таблиці, обчислене лише за їх назвами:
+    - id_positions / id_names — позиції у сирому DataFrame та фінальні назви зафіксованих колонок
+    - value_positions / value_names — колонки препаратів
+    - numeric_cols — id-колонки, які треба привести до числа
+    """
+    id_positions: List[int]
+    id_names: List[str]
+    value_positions: List[int]
+    value_names: List[str]
+    numeric_cols: List[str]
+
+    @property
+    def n_cols(self) -> int:
+        return len(self.id_positions) + len(self.value_positions)
+
+
+@dataclass
+class PointsIngestResult:
+    df_long: pd.DataFrame
+    n_wide_rows: int
+    n_wide_cols: int
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def plan_points_ingest(columns: List[str], anchor_col: str = ANCHOR_COL) -> PointsIngestPlan:
+    """
+    Повторює ланцюжок clean_dataframe → apply_rename → обрізка по якірній колонці →
+    видалення DROP_COLS → reorder_others → to_numeric_wide, але лише над списком назв.
+    """
+    drop = set(DROP_COLS)
+    # (позиція в сирих даних, поточна назва)
+    cols = [(i, str(c)) for i, c in enumerate(columns) if str(c) not in drop]
+    cols = [(i, RENAME_MAP.get(c, c)) for i, c in cols]
+
+    names = [c for _, c in cols]
+    if anchor_col in names:
+        cols = cols[:names.index(anchor_col) + 1]
+    cols = [(i, c) for i, c in cols if c not in drop]
+
+    present = {c for _, c in cols}
+    pins = [c for c in PIN_COLS if c in present]
+    pos_by_name = {}
+    for i, c in cols:
+        pos_by_name.setdefault(c, i)
+
+    pin_set = set(pins)
+    values = [(i, c) for i, c in cols if c not in pin_set]
+    return PointsIngestPlan(
+        id_positions=[pos_by_name[c] for c in pins],
+        id_names=pins,
+        value_positions=[i for i, _ in values],
+        value_names=[c for _, c in values],
+        numeric_cols=[c for c in NUMERIC_WIDE_COLS if c in pin_set],
+    )
+
+
+def run_points_ingest(df_raw: pd.DataFrame, plan: PointsIngestPlan | None = None) -> PointsIngestResult:
+    """
+    Виконує план за один прохід: id-колонки беруться за позиціями (одна вибірка),
+    числові приводяться на місці, а препарати одразу йдуть у розріджений unpivot.
+    """
+    timings: Dict[str, float] = {}
+
+    t0 = time.perf_counter()
+    if plan is None:
+        plan = plan_points_ingest(list(df_raw.columns))
+    timings["План колонок"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    id_frame = df_raw.iloc[:, plan.id_positions]
+    id_frame.columns = plan.id_names
+    id_frame = id_frame.reset_index(drop=True)
+    timings["Зафіксовані колонки"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for col in plan.numeric_cols:
+        id_frame[col] = pd.to_numeric(id_frame[col], errors="coerce")
+    timings["Числові колонки"] = time.perf_counter() - t0
+
+    if not plan.value_positions:
+        raise ValueError("Немає колонок для 'unpivot' після зафіксованих id_cols.")
+
+    t0 = time.perf_counter()
+    value_frame = df_raw.iloc[:, plan.value_positions]
+    value_frame.columns = plan.value_names
+    df_long = unpivot_sparse(id_frame, value_frame)
+    timings["Unpivot"] = time.perf_counter() - t0
+
+    return PointsIngestResult(
+        df_long=df_long,
+        n_wide_rows=len(df_raw),
+        n_wide_cols=plan.n_cols,
+        timings=timings,
+    )
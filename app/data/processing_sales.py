@@ -5,25 +5,15 @@ import pandas as pd
 import numpy as np
 from datetime import date, timedelta
 
-# --- робочі дні України (guarded import) ---
-try:
-    from workalendar.europe import Ukraine  # type: ignore
-    _CAL_UA = Ukraine()
-    _HAVE_WORKALENDAR = True
-except Exception:
-    Ukraine = None  # type: ignore
-    _CAL_UA = None
-    _HAVE_WORKALENDAR = False
+from app.data.work_calendar import get_work_calendar
 
 
 def is_working_day(dt: date) -> bool:
     """
-    True, якщо робочий день в Україні.
+    True, якщо робочий день в Україні (таблиця app.data.work_calendar).
     Якщо workalendar недоступний — просте правило пн–пт.
     """
-    if _HAVE_WORKALENDAR and _CAL_UA is not None:
-        return _CAL_UA.is_working_day(dt)
-    return dt.weekday() < 5
+    return get_work_calendar(dt.year).is_working_day(dt)
 
 
 def create_full_address(df: pd.DataFrame) -> pd.DataFrame:
@@ -0,0 +1,139 @@
+# app/data/sales_keys.py
+# Природні ключі рядків sales_data — для дедуплікації при повторному завантаженні
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Рядок файлу дистриб'ютора однозначно визначається цими полями
+# (region та adding — спільні для всього файлу, але входять у ключ явно).
+SALES_KEY_COLUMNS = [
+    "region",
+    "adding",
+    "distributor",
+    "edrpou",
+    "client",
+    "delivery_address",
+    "product_name",
+    "decade",
+]
+# Поля, зміна яких робить існуючий рядок «оновленим», а не «пропущеним»
+SALES_VALUE_COLUMNS = [
+    "quantity",
+    "city_xls",
+    "client_legal_address",
+    "city",
+    "street",
+    "house_number",
+    "territory",
+    "product_line",
+    "year",
+    "month",
+    "new_client",
+]
+
+ROW_KEY_COL = "__row_key__"
+ROW_HASH_COL = "__row_hash__"
+
+
+@dataclass
+class SalesUpsertPlan:
+    """Результат зіставлення нових рядків з уже наявними у БД"""
+    to_insert: List[dict] = field(default_factory=list)
+    # рядки з id існуючого запису — для upsert по первинному ключу
+    to_update: List[dict] = field(default_factory=list)
+    skipped: int = 0
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return {"inserted": len(self.to_insert), "updated": len(self.to_update), "skipped": self.skipped}
+
+
+def canonical_frame(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """
+    Зводить колонки до порівнюваних рядків: None/NaN -> "", цілі float -> int,
+    обрізані пробіли. Так значення з Excel і з PostgREST хешуються однаково
+    ("2025" == 2025 == 2025.0).
+    """
+    out = {}
+    for col in columns:
+        s = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+        num = pd.to_numeric(s, errors="coerce")
+        is_int = num.notna() & (num == np.floor(num))
+        text = s.astype(object).where(s.notna(), "").astype(str).str.strip()
+        if is_int.any():
+            text = text.where(~is_int, num.where(is_int, 0).astype("int64").astype(str))
+        out[col] = text
+    return pd.DataFrame(out, index=df.index)
+
+
+def natural_keys(
+    df: pd.DataFrame,
+    key_cols: List[str] = SALES_KEY_COLUMNS,
+    value_cols: List[str] = SALES_VALUE_COLUMNS,
+    order_col: str | None = None,
+) -> pd.DataFrame:
+    """
+    Додає до копії df:
+    - ROW_KEY_COL: хеш природного ключа + порядковий номер серед однакових ключів
+      (два ідентичні рядки у файлі — це два різні записи, а не дублікат);
+    - ROW_HASH_COL: хеш полів-значень (для розрізнення «оновлено» / «без змін»).
+
+    order_col задає порядок нумерації однакових ключів (для рядків з БД — id).
+    """
+    out = df.copy()
+    if out.empty:
+        out[ROW_KEY_COL] = pd.Series(dtype="uint64")
+        out[ROW_HASH_COL] = pd.Series(dtype="uint64")
+        return out
+    if order_col is not None and order_col in out.columns:
+        out = out.sort_values(order_col, kind="stable")
+
+    key_hash = pd.util.hash_pandas_object(canonical_frame(out, key_cols), index=False).to_numpy()
+    ordinal = pd.Series(key_hash, index=out.index).groupby(key_hash, sort=False).cumcount().to_numpy()
+    combined = pd.DataFrame({"k": key_hash, "n": ordinal.astype("uint64")}, index=out.index)
+    out[ROW_KEY_COL] = pd.util.hash_pandas_object(combined, index=False).to_numpy()
+    out[ROW_HASH_COL] = pd.util.hash_pandas_object(canonical_frame(out, value_cols), index=False).to_numpy()
+    return out
+
+
+def plan_sales_upsert(records: List[dict], existing_df: pd.DataFrame, mode: str = "upsert") -> SalesUpsertPlan:
+    """
+    Зіставляє нові рядки з наявними (existing_df містить id та колонки ключа/значень):
+    - ключа немає у БД -> insert;
+    - ключ є, значення ті самі -> skip;
+    - ключ є, значення змінились -> update (mode="upsert") або skip (mode="skip").
+    У план потрапляють самі словники з records (типи значень не змінюються).
+    """
+    plan = SalesUpsertPlan()
+    if existing_df is None or existing_df.empty:
+        plan.to_insert = list(records)
+        return plan
+
+    new_k = natural_keys(pd.DataFrame(records))
+    old_k = natural_keys(existing_df, order_col="id")
+    pos = pd.Index(old_k[ROW_KEY_COL]).get_indexer(new_k[ROW_KEY_COL])
+    found = pos >= 0
+
+    plan.to_insert = [records[i] for i in np.flatnonzero(~found)]
+    matched = np.flatnonzero(found)
+    old_pos = pos[found]
+    changed = new_k[ROW_HASH_COL].to_numpy()[matched] != old_k[ROW_HASH_COL].to_numpy()[old_pos]
+    plan.skipped = int((~changed).sum())
+
+    if mode == "upsert":
+        old_ids = old_k["id"].to_numpy()[old_pos[changed]]
+        plan.to_update = [
+            {"id": _py(rid), **records[i]} for i, rid in zip(matched[changed], old_ids)
+        ]
+    else:
+        plan.skipped += int(changed.sum())
+    return plan
+
+
+def _py(value):
+    """numpy-скаляр -> Python (для JSON у PostgREST)"""
+    return value.item() if isinstance(value, np.generic) else value
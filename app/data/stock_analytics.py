@@ -0,0 +1,123 @@
+# app/data/stock_analytics.py
+# Аналітика виснаження залишків: швидкість витрати, прогноз дня «нуля», прапорці stock-out
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from app.data.stock_engine import DAY_NS, NAT_SORT_KEY, StockEngine
+
+STATUS_OUT = "Немає в наявності"
+STATUS_RISK = "Ризик вичерпання"
+STATUS_OK = "Норма"
+STATUS_UNKNOWN = "Недостатньо даних"
+
+# Далі за цей горизонт прогнозну дату не показуємо (і не виходимо за межі datetime64[ns])
+FORECAST_HORIZON_DAYS = 3650
+
+
+def depletion_kernel(pair: np.ndarray, date_ns: np.ndarray, qty: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Згруповані розрахунки по парах (аптека, препарат) за один прохід.
+
+    Вхід — масиви, відсортовані за (pair, date). Інтервали між сусідніми візитами,
+    де залишок не зріс, вважаються «витратою»; інтервали з поповненням пропускаються,
+    бо продажі в них невідомі. Повертає масиви довжиною = кількість пар у вхідних даних.
+    """
+    n = len(pair)
+    if n == 0:
+        empty_i = np.empty(0, dtype=np.int64)
+        empty_f = np.empty(0, dtype=np.float64)
+        return {
+            "end": empty_i, "pair": empty_i, "visits": empty_i, "restocks": empty_i,
+            "stockout_visits": empty_i, "consumed": empty_f, "days": empty_f, "rate": empty_f,
+        }
+
+    is_start = np.r_[True, pair[1:] != pair[:-1]]
+    gid = np.cumsum(is_start) - 1
+    n_groups = int(gid[-1]) + 1
+    end = np.r_[np.flatnonzero(is_start)[1:], n] - 1
+
+    prev_qty = np.r_[np.nan, qty[:-1]]
+    elapsed = np.r_[0.0, np.diff(date_ns) / DAY_NS]
+    valid = ~is_start & (elapsed > 0)
+    drawdown = valid & (qty <= prev_qty)
+    restock = valid & (qty > prev_qty)
+
+    consumed = np.bincount(gid, weights=np.where(drawdown, prev_qty - qty, 0.0), minlength=n_groups)
+    days = np.bincount(gid, weights=np.where(drawdown, elapsed, 0.0), minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(days > 0, consumed / days, np.nan)
+
+    return {
+        "end": end,
+        "pair": pair[end],
+        "visits": np.bincount(gid, minlength=n_groups),
+        "restocks": np.bincount(gid, weights=restock, minlength=n_groups).astype(np.int64),
+        "stockout_visits": np.bincount(gid, weights=(qty == 0), minlength=n_groups).astype(np.int64),
+        "consumed": consumed,
+        "days": days,
+        "rate": rate,
+    }
+
+
+def compute_stock_analytics(
+    engine: StockEngine,
+    date_from=None,
+    date_to=None,
+    risk_horizon_days: int = 14,
+) -> pd.DataFrame:
+    """
+    Таблиця по кожній парі (аптека, препарат) у вікні дат:
+    поточний залишок, витрата/день, днів до нуля (inf — витрати немає),
+    прогнозна дата (NaT далі за FORECAST_HORIZON_DAYS) та статус.
+    Результат кешується на версію рушія та вікно.
+    """
+    window = (str(date_from), str(date_to), int(risk_horizon_days))
+    return engine.memoize(
+        "stock_analytics",
+        window,
+        lambda: _build_stock_analytics(engine, date_from, date_to, risk_horizon_days),
+    )
+
+
+def _build_stock_analytics(engine: StockEngine, date_from, date_to, risk_horizon_days: int) -> pd.DataFrame:
+    arr = engine.sorted_arrays(date_from, date_to)
+    k = depletion_kernel(arr["pair"], arr["date"], arr["qty"])
+    if len(k["end"]) == 0:
+        return pd.DataFrame()
+
+    last_qty = arr["qty"][k["end"]]
+    last_date = arr["date"][k["end"]]
+    rate = k["rate"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_left = np.where(last_qty <= 0, 0.0, np.where(rate > 0, last_qty / rate, np.inf))
+    days_left = np.where(np.isnan(rate) & (last_qty > 0), np.nan, days_left)
+
+    finite = np.isfinite(days_left)
+    dated = finite & (days_left <= FORECAST_HORIZON_DAYS) & (last_date != NAT_SORT_KEY)
+    out_date = np.full(len(days_left), np.datetime64("NaT"), dtype="datetime64[ns]")
+    out_date[dated] = (last_date[dated] + (days_left[dated] * DAY_NS).astype(np.int64)).astype("datetime64[ns]")
+
+    status = np.full(len(days_left), STATUS_OK, dtype=object)
+    status[np.isnan(days_left)] = STATUS_UNKNOWN
+    status[finite & (days_left <= risk_horizon_days)] = STATUS_RISK
+    status[last_qty <= 0] = STATUS_OUT
+
+    meta = engine.meta_at(arr["pos"][k["end"]])
+    return pd.DataFrame({
+        "pharmacy_id": meta["pharmacy_id"],
+        "pharmacy_name": meta["pharmacy_name"],
+        "pharmacy_city": meta["pharmacy_city"],
+        "drug_name": meta["drug_name"],
+        "last_visit": meta["visit_date"],
+        "quantity": last_qty,
+        "visits": k["visits"],
+        "restocks": k["restocks"],
+        "stockout_visits": k["stockout_visits"],
+        "depletion_per_day": rate,
+        "days_to_stockout": days_left,
+        "stockout_date": out_date,
+        "status": status,
+    })
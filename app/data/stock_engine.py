@@ -0,0 +1,314 @@
+# app/data/stock_engine.py
+# Інкрементальний розрахунок різниць залишків по (аптека, препарат)
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+# Колонки, які рушій зберігає як «метадані» рядка (без числових полів)
+META_COLS: list[str] = [
+    "id", "pharmacy_id", "pharmacy_name", "pharmacy_city", "drug_name",
+    "mp_id", "mp_full_name", "visit_date", "visit_session_id",
+]
+_STORED_META = [c for c in META_COLS if c != "visit_date"]
+
+# Дати в рушії — int64 наносекунди; NaT кодується як NAT_SORT_KEY (сортується в кінець, як sort_values)
+NAT_SORT_KEY = np.iinfo(np.int64).max
+DAY_NS = 86_400 * 10**9
+
+# Ключ порядку рядка: (ранг пари << _TIME_BITS) | секунди від 1900-01-01 (NaT — _TIME_MAX)
+_TIME_BITS = 34
+_TIME_MAX = (1 << _TIME_BITS) - 1
+_SEC0 = -2_208_988_800
+
+
+class StockEngine:
+    """
+    Тримає історію звітів про залишки по парах (pharmacy_id, drug_name).
+
+    Рядки зберігаються у numpy-масивах (додаються в кінець), а поруч —
+    індекс `_order`, впорядкований за (аптека, препарат, дата). Новий
+    візит вставляється в індекс бінарним пошуком, тож повторне
+    завантаження вже відомих візитів (за `id`) нічого не перераховує.
+    Вікно дат — це зріз searchsorted у сегменті кожної пари, вже у
+    порядку виводу, без сортування.
+    """
+
+    def __init__(self):
+        # кодування пар; ранг — позиція пари в порядку (pharmacy_id, drug_name)
+        self._pair_codes: dict[tuple, int] = {}
+        self._pair_keys: list[tuple] = []
+        self._rank = np.empty(0, dtype=np.int64)
+        self._seen_ids: set = set()
+
+        # рядки (індекс = позиція у сховищі)
+        self._n = 0
+        self._pair = np.empty(0, dtype=np.int64)
+        self._date = np.empty(0, dtype=np.int64)
+        self._time = np.empty(0, dtype=np.int64)
+        self._qty = np.empty(0, dtype=np.float64)
+        # метадані — словникове кодування: коди рядків + унікальні значення колонки
+        self._meta_codes: dict[str, np.ndarray] = {c: np.empty(0, dtype=np.int64) for c in _STORED_META}
+        self._meta_values: dict[str, pd.Index] = {c: pd.Index([]) for c in _STORED_META}
+
+        # позиції у порядку (аптека, препарат, дата) і їхні ключі порядку
+        self._order = np.empty(0, dtype=np.int64)
+        self._keys = np.empty(0, dtype=np.int64)
+
+        self.version = 0
+        self._memo: dict = {}
+
+    # ----------------- public API -----------------
+
+    def ingest(self, df: pd.DataFrame) -> int:
+        """
+        Додає нові візити з df (формат loader_stock.fetch_stock_reports).
+        Рядки з уже відомим `id` пропускаються. Повертає кількість нових рядків.
+        """
+        if df is None or df.empty:
+            return 0
+
+        new = df[~df["id"].isin(self._seen_ids)].drop_duplicates(subset=["id"])
+        if new.empty:
+            return 0
+
+        pair, ranks_changed = self._encode_pairs(new)
+        date = _dates_to_int(new["visit_date"])
+        qty = pd.to_numeric(new["quantity"], errors="coerce").to_numpy(dtype=np.float64)
+        k = len(new)
+
+        base = self._n
+        self._reserve(base + k)
+        self._pair[base:base + k] = pair
+        self._date[base:base + k] = date
+        self._time[base:base + k] = _time_keys(date)
+        self._qty[base:base + k] = qty
+        for col in _STORED_META:
+            values = new[col] if col in new.columns else pd.Series(None, index=new.index, dtype=object)
+            self._meta_codes[col][base:base + k] = self._encode_meta(col, values)
+        self._n = base + k
+        self._seen_ids.update(new["id"].tolist())
+
+        if ranks_changed:
+            # нова пара зсуває ранги, але не відносний порядок уже відомих рядків
+            self._keys = (self._rank[self._pair[self._order]] << _TIME_BITS) | self._time[self._order]
+
+        new_keys = (self._rank[pair] << _TIME_BITS) | self._time[base:base + k]
+        local = np.argsort(new_keys, kind="stable")
+        # side="right": візит того ж моменту йде після вже відомих (порядок завантаження)
+        at = np.searchsorted(self._keys, new_keys[local], side="right")
+        self._order = np.insert(self._order, at, base + local)
+        self._keys = np.insert(self._keys, at, new_keys[local])
+
+        self.version += 1
+        self._memo.clear()
+        return k
+
+    def history(self, date_from=None, date_to=None) -> pd.DataFrame:
+        """
+        Повна історія у вікні дат, відсортована за (pharmacy_id, drug_name, visit_date),
+        з колонками quantity, prev_quantity, diff та is_latest (останній візит пари у вікні).
+        prev_quantity першого візиту пари у вікні — NaN, незалежно від візитів поза вікном.
+        """
+        key = ("history", self.version, _window_key(date_from, date_to))
+        if key not in self._memo:
+            self._memo[key] = self._build_history(date_from, date_to)
+        return self._memo[key]
+
+    def latest(self, date_from=None, date_to=None) -> pd.DataFrame:
+        """Останній відомий залишок кожної пари у вікні дат."""
+        key = ("latest", self.version, _window_key(date_from, date_to))
+        if key not in self._memo:
+            hist = self.history(date_from, date_to)
+            self._memo[key] = hist[hist["is_latest"].to_numpy()]
+        return self._memo[key]
+
+    def pharmacy_index(self, date_from=None, date_to=None) -> dict:
+        """
+        Індекс аптек над history(): {"ranges": {pharmacy_id: (start, stop)},
+        "labels": {pharmacy_id: "Назва (Місто)"}}. Історія аптеки — це зріз
+        history().iloc[start:stop], вже впорядкований за (препарат, дата).
+        """
+        key = ("pharmacy_index", self.version, _window_key(date_from, date_to))
+        if key not in self._memo:
+            hist = self.history(date_from, date_to)
+            ph = hist["pharmacy_id"].to_numpy()
+            if len(ph) == 0:
+                self._memo[key] = {"ranges": {}, "labels": {}}
+                return self._memo[key]
+            starts = np.flatnonzero(np.r_[True, ph[1:] != ph[:-1]])
+            stops = np.r_[starts[1:], len(ph)]
+            # назва/місто — з останнього рядка аптеки
+            tail = hist.iloc[stops - 1]
+            labels = tail["pharmacy_name"].astype(str) + " (" + tail["pharmacy_city"].astype(str) + ")"
+            ids = ph[starts].tolist()
+            self._memo[key] = {
+                "ranges": dict(zip(ids, zip(starts.tolist(), stops.tolist()))),
+                "labels": dict(zip(ids, labels.tolist())),
+            }
+        return self._memo[key]
+
+    def sorted_arrays(self, date_from=None, date_to=None) -> dict[str, np.ndarray]:
+        """
+        Рядки вікна як масиви у порядку (аптека, препарат, дата) — рядки пари
+        йдуть підряд: pos (позиція у сховищі), pair, date (ns), qty.
+        """
+        key = ("arrays", self.version, _window_key(date_from, date_to))
+        if key not in self._memo:
+            pos, _ = self._window(date_from, date_to)
+            self._memo[key] = {
+                "pos": pos,
+                "pair": self._pair[pos],
+                "date": self._date[pos],
+                "qty": self._qty[pos],
+            }
+        return self._memo[key]
+
+    def meta_at(self, pos: np.ndarray) -> pd.DataFrame:
+        """Метадані рядків (аптека, препарат, МП, дата) за позиціями у сховищі."""
+        data = {col: self._meta_values[col].take(self._meta_codes[col][pos]) for col in _STORED_META}
+        data["visit_date"] = _ints_to_dates(self._date[pos])
+        return pd.DataFrame(data, columns=META_COLS)
+
+    def memoize(self, name: str, params: tuple, fn):
+        """
+        Кешує похідні результати (аналітика, стилі, індекси) на поточну версію рушія.
+        Кеш скидається при кожному ingest().
+        """
+        key = (name, self.version, params)
+        if key not in self._memo:
+            self._memo[key] = fn()
+        return self._memo[key]
+
+    # ----------------- internals -----------------
+
+    def _encode_pairs(self, df: pd.DataFrame) -> tuple[np.ndarray, bool]:
+        """Коди пар для рядків df; True — з'явились нові пари (ранги перераховано)"""
+        local = df.groupby(["pharmacy_id", "drug_name"], sort=False, dropna=False).ngroup().to_numpy()
+        uniq = df[["pharmacy_id", "drug_name"]].drop_duplicates()
+        codes = np.empty(len(uniq), dtype=np.int64)
+        n_before = len(self._pair_codes)
+        for i, key in enumerate(zip(uniq["pharmacy_id"], uniq["drug_name"])):
+            code = self._pair_codes.get(key)
+            if code is None:
+                code = len(self._pair_codes)
+                self._pair_codes[key] = code
+                self._pair_keys.append(key)
+            codes[i] = code
+        changed = len(self._pair_codes) != n_before
+        if changed:
+            keys = pd.DataFrame(self._pair_keys, columns=["pharmacy_id", "drug_name"])
+            order = keys.sort_values(["pharmacy_id", "drug_name"], kind="stable").index.to_numpy()
+            self._rank = np.empty(len(order), dtype=np.int64)
+            self._rank[order] = np.arange(len(order), dtype=np.int64)
+        return codes[local], changed
+
+    def _encode_meta(self, col: str, values: pd.Series) -> np.ndarray:
+        """Коди значень колонки; нові значення дописуються в словник"""
+        known = self._meta_values[col]
+        codes = known.get_indexer(values) if len(known) else np.full(len(values), -1, dtype=np.int64)
+        missing = codes < 0
+        if missing.any():
+            known = known.append(pd.Index(values[missing]).unique()) if len(known) else pd.Index(values[missing]).unique()
+            self._meta_values[col] = known
+            codes[missing] = known.get_indexer(values[missing])
+        return codes
+
+    def _window(self, date_from, date_to) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Позиції рядків вікна у порядку (аптека, препарат, дата) і початки
+        сегментів пар у них: два searchsorted на кожну пару, без сортування.
+        """
+        key = ("window", self.version, _window_key(date_from, date_to))
+        if key in self._memo:
+            return self._memo[key]
+
+        lo = 0 if date_from is None else int(_time_keys(np.array([_scalar_to_int(date_from)]))[0])
+        if date_to is None:
+            hi = _TIME_MAX + 1
+        else:
+            # date_to включно (цілий день)
+            hi = int(_time_keys(np.array([_scalar_to_int(date_to) + DAY_NS]))[0])
+
+        ranks = np.arange(len(self._pair_keys), dtype=np.int64) << _TIME_BITS
+        start = np.searchsorted(self._keys, ranks + lo, side="left")
+        stop = np.searchsorted(self._keys, ranks + hi, side="left")
+        lengths = stop - start
+        keep = lengths > 0
+        start, lengths = start[keep], lengths[keep]
+        seg = np.r_[0, np.cumsum(lengths)[:-1]] if len(lengths) else np.empty(0, dtype=np.int64)
+        idx = np.repeat(start - seg, lengths) + np.arange(int(lengths.sum()), dtype=np.int64)
+
+        self._memo[key] = (self._order[idx], seg.astype(np.int64))
+        return self._memo[key]
+
+    def _build_history(self, date_from, date_to) -> pd.DataFrame:
+        pos, seg = self._window(date_from, date_to)
+        if len(pos) == 0:
+            return pd.DataFrame(columns=META_COLS + ["quantity", "prev_quantity", "diff", "is_latest"])
+
+        qty = self._qty[pos]
+        # попередній візит — сусідній рядок сегмента пари; у першого візиту пари у вікні
+        # його немає (як groupby().shift() над вибіркою вікна)
+        prev = np.r_[np.nan, qty[:-1]]
+        prev[seg] = np.nan
+        is_latest = np.zeros(len(pos), dtype=bool)
+        is_latest[np.r_[seg[1:], len(pos)] - 1] = True
+
+        out = self.meta_at(pos)
+        out["quantity"] = qty.astype(np.int64) if not np.isnan(qty).any() else qty
+        out["prev_quantity"] = prev
+        out["diff"] = qty - prev
+        out["is_latest"] = is_latest
+        return out
+
+    def _reserve(self, size: int) -> None:
+        cap = len(self._pair)
+        if size <= cap:
+            return
+        new_cap = max(size, 2 * cap, 1024)
+        self._pair = _grow(self._pair, new_cap)
+        self._date = _grow(self._date, new_cap)
+        self._time = _grow(self._time, new_cap)
+        self._qty = _grow(self._qty, new_cap)
+        for col in _STORED_META:
+            self._meta_codes[col] = _grow(self._meta_codes[col], new_cap)
+
+
+# ----------------- helpers -----------------
+
+
+def _grow(arr: np.ndarray, size: int, fill=0) -> np.ndarray:
+    out = np.full(size, fill, dtype=arr.dtype)
+    out[:len(arr)] = arr
+    return out
+
+
+def _dates_to_int(s: pd.Series) -> np.ndarray:
+    d = pd.to_datetime(s, errors="coerce")
+    out = d.to_numpy(dtype="datetime64[ns]").view(np.int64).copy()
+    out[d.isna().to_numpy()] = NAT_SORT_KEY
+    return out
+
+
+def _ints_to_dates(values: np.ndarray) -> np.ndarray:
+    out = values.copy()
+    out[out == NAT_SORT_KEY] = np.iinfo(np.int64).min  # NaT
+    return out.view("datetime64[ns]")
+
+
+def _time_keys(date_ns: np.ndarray) -> np.ndarray:
+    """Секунди від 1900-01-01 для ключа порядку; NaT — _TIME_MAX (у кінці пари)"""
+    sec = np.clip(date_ns // 10**9 - _SEC0, 0, _TIME_MAX - 1)
+    return np.where(date_ns == NAT_SORT_KEY, _TIME_MAX, sec).astype(np.int64)
+
+
+def _scalar_to_int(value) -> int:
+    return int(pd.Timestamp(value).normalize().as_unit("ns").value)
+
+
+def _window_key(date_from, date_to) -> tuple:
+    return (
+        None if date_from is None else str(pd.Timestamp(date_from).date()),
+        None if date_to is None else str(pd.Timestamp(date_to).date()),
+    )
@@ -2,6 +2,7 @@
 #перетворення DataFrame — unpivot, приведення типів, підготовка агрегатів для діаграм
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
 def to_int_safe(series: pd.Series) -> pd.Series:
@@ -19,20 +20,38 @@ def unpivot_long(df_wide: pd.DataFrame, id_cols: list[str]) -> pd.DataFrame:
     - ідентифікаторні колонки = id_cols
     - всі інші колонки стають «Препарат», значення -> «К-сть»
     - фільтрує нульові/від’ємні значення
+
+    Рядки будуються лише для ненульових клітинок (див. unpivot_sparse),
+    порядок — як у melt (по колонках препаратів, усередині — по рядках).
     """
     value_cols = [c for c in df_wide.columns if c not in id_cols]
     if not value_cols:
         raise ValueError("Немає колонок для 'unpivot' після зафіксованих id_cols.")
+    return unpivot_sparse(df_wide[id_cols], df_wide[value_cols])
 
-    df_long = df_wide.melt(
-        id_vars=id_cols,
-        value_vars=value_cols,
-        var_name="Препарат",
-        value_name="К-сть",
-    )
-    df_long["К-сть"] = to_int_safe(df_long["К-сть"])
-    df_long = df_long[df_long["К-сть"] > 0].reset_index(drop=True)
-    return df_long
+def unpivot_sparse(
+    id_frame: pd.DataFrame,
+    value_frame: pd.DataFrame,
+    var_name: str = "Препарат",
+    value_name: str = "К-сть",
+) -> pd.DataFrame:
+    """
+    «Розріджений» unpivot: спершу знаходить додатні (після округлення) клітинки
+    у numpy-матриці значень, і лише по їх координатах бере рядки id_frame.
+    Назви препаратів повертаються як categorical.
+    """
+    values = _numeric_matrix(value_frame)
+    qty = np.nan_to_num(np.round(values), nan=0.0)
+
+    # транспонуємо, щоб порядок координат збігався з melt (колонка за колонкою)
+    col_idx, row_idx = np.nonzero(qty.T > 0)
+
+    out = id_frame.take(row_idx).reset_index(drop=True)
+    # категорії за абеткою, щоб сортування за препаратом лишилось алфавітним
+    categories, codes = np.unique(np.asarray(value_frame.columns.astype(str), dtype=object), return_inverse=True)
+    out[var_name] = pd.Categorical.from_codes(codes[col_idx], categories=categories)
+    out[value_name] = qty[row_idx, col_idx].astype(np.int64)
+    return out
 
 def group_by_drug_and_specialty(df_long: pd.DataFrame) -> pd.DataFrame:
     """
@@ -42,7 +61,7 @@ def group_by_drug_and_specialty(df_long: pd.DataFrame) -> pd.DataFrame:
     req = ["Препарат", "Спеціалізація лікаря", "К-сть"]
     _check_columns(df_long, req)
     grouped = (
-        df_long.groupby(["Препарат", "Спеціалізація лікаря"], as_index=False)["К-сть"]
+        df_long.groupby(["Препарат", "Спеціалізація лікаря"], as_index=False, observed=True)["К-сть"]
         .sum()
         .sort_values(by=["Препарат", "Спеціалізація лікаря"])
         .reset_index(drop=True)
@@ -69,7 +88,7 @@ def group_for_combo_chart(df_long: pd.DataFrame, order_by: list[str] | None = No
 
     order_by = order_by or ["Спеціалізація лікаря", "Препарат"]
     grouped = (
-        df_long.groupby(["Препарат", "Спеціалізація лікаря"], as_index=False)["К-сть"]
+        df_long.groupby(["Препарат", "Спеціалізація лікаря"], as_index=False, observed=True)["К-сть"]
         .sum()
         .sort_values(by=order_by)
         .reset_index(drop=True)
@@ -77,8 +96,35 @@ def group_for_combo_chart(df_long: pd.DataFrame, order_by: list[str] | None = No
     grouped = build_combo_category(grouped, left="Препарат", right="Спеціалізація лікаря")
     return grouped
 
+def sum_distinct_by(df: pd.DataFrame, keys: list[str], value_col: str, dropna: bool = True) -> pd.DataFrame:
+    """
+    Сума УНІКАЛЬНИХ значень value_col у кожній групі keys
+    (векторний еквівалент groupby(keys)[value_col].apply(lambda x: x.drop_duplicates().sum())).
+
+    Використовується для показників, що дублюються в кожному рядку лікаря/аптеки
+    (наприклад, «Сума Балів (поточ.міс.)», «Кіл-сть упаковок загальна»).
+    """
+    _check_columns(df, keys + [value_col])
+    return (
+        df[keys + [value_col]]
+        .drop_duplicates()
+        .groupby(keys, dropna=dropna, sort=True)[value_col]
+        .sum()
+        .reset_index()
+    )
+
 # ----------------- helpers -----------------
 
+def _numeric_matrix(df: pd.DataFrame) -> np.ndarray:
+    """float64-матриця значень; нечислові колонки приводяться через to_numeric(errors="coerce")"""
+    out = np.empty(df.shape, dtype=np.float64)
+    numeric = np.array([pd.api.types.is_numeric_dtype(dt) for dt in df.dtypes], dtype=bool)
+    if numeric.any():
+        out[:, numeric] = df.iloc[:, numeric].to_numpy(dtype=np.float64, na_value=np.nan)
+    for j in np.flatnonzero(~numeric):
+        out[:, j] = pd.to_numeric(df.iloc[:, j], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return out
+
 def _check_columns(df: pd.DataFrame, cols: list[str]) -> None:
     missing = [c for c in cols if c not in df.columns]
     if missing:
@@ -0,0 +1,132 @@
+# app/data/work_calendar.py
+# Робочі дні України: таблиця на діапазон років (bool-масив + кумулятивні суми)
+from __future__ import annotations
+
+import datetime as dt
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Типовий діапазон таблиці відносно поточного року
+DEFAULT_YEARS_BACK = 5
+DEFAULT_YEARS_AHEAD = 1
+
+_EPOCH = dt.date(1970, 1, 1)
+
+
+def _ukraine_calendar():
+    """workalendar Ukraine() або None (тоді робочі дні — пн–пт)"""
+    try:
+        from workalendar.europe import Ukraine  # type: ignore
+    except Exception:
+        return None
+    return Ukraine()
+
+
+class WorkCalendar:
+    """
+    Робочі дні за [start_year, end_year]: working[i] — чи робочий день
+    start + i, cum[i] — кількість робочих днів у [start, start + i).
+    Будь-який запит «скільки робочих днів між датами» — дві вибірки з cum.
+    Дати поза [start_year, end_year] дають ValueError — ширшу таблицю
+    повертає get_work_calendar(рік, ...).
+    """
+
+    def __init__(self, start_year: int, end_year: int, working: np.ndarray):
+        self.start_year = int(start_year)
+        self.end_year = int(end_year)
+        self.start_day = (dt.date(self.start_year, 1, 1) - _EPOCH).days
+        self.working = working.astype(bool)
+        self.cum = np.concatenate([[0], np.cumsum(self.working, dtype=np.int32)])
+
+    @classmethod
+    def build(cls, start_year: int, end_year: int) -> "WorkCalendar":
+        days = pd.date_range(dt.date(start_year, 1, 1), dt.date(end_year, 12, 31), freq="D")
+        cal = _ukraine_calendar()
+        if cal is None:
+            working = days.dayofweek.to_numpy() < 5
+        else:
+            # один прохід при побудові; далі — лише індексація масиву
+            working = np.fromiter((cal.is_working_day(d.date()) for d in days), dtype=bool, count=len(days))
+        return cls(start_year, end_year, working)
+
+    # ----------------- скалярні запити -----------------
+
+    def covers(self, year: int) -> bool:
+        return self.start_year <= int(year) <= self.end_year
+
+    def _check_years(self, first: int, last: int) -> None:
+        # індекс поза таблицею не можна допускати: від'ємний numpy «загорне» з кінця
+        if not (self.covers(first) and self.covers(last)):
+            raise ValueError(
+                f"Дати {first}–{last} поза таблицею робочих днів "
+                f"{self.start_year}–{self.end_year}; використовуйте get_work_calendar(рік)"
+            )
+
+    def _index(self, day: dt.date) -> int:
+        self._check_years(day.year, day.year)
+        return (day - _EPOCH).days - self.start_day
+
+    def is_working_day(self, day: dt.date) -> bool:
+        return bool(self.working[self._index(day)])
+
+    def working_days_between(self, start: dt.date, stop: dt.date) -> int:
+        """Робочі дні у [start, stop)"""
+        return int(self.cum[self._index(stop)] - self.cum[self._index(start)])
+
+    def month_progress(self, day: dt.date, include_today: bool = True) -> Tuple[int, int]:
+        """(робочих днів минуло, лишилось) у місяці day; day іде в «минуло», якщо include_today"""
+        passed, left = self.month_progress_many(np.array([np.datetime64(day, "D")]), include_today)
+        return int(passed[0]), int(left[0])
+
+    # ----------------- векторні запити -----------------
+
+    def _days(self, dates) -> np.ndarray:
+        """Дати як datetime64[D] з перевіркою, що всі вони в межах таблиці"""
+        days = pd.to_datetime(np.asarray(dates)).to_numpy().astype("datetime64[D]")
+        if len(days):
+            if np.isnat(days).any():
+                raise ValueError("Порожня дата (NaT) у запиті робочих днів")
+            years = days.astype("datetime64[Y]").astype(np.int64) + 1970
+            self._check_years(int(years.min()), int(years.max()))
+        return days
+
+    def _indices(self, dates) -> np.ndarray:
+        return self._days(dates).astype(np.int64) - self.start_day
+
+    def is_working_days(self, dates) -> np.ndarray:
+        """bool-масив для масиву/Series дат"""
+        return self.working[self._indices(dates)]
+
+    def month_progress_many(self, dates, include_today: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """(минуло, лишилось) робочих днів у місяці кожної дати — без циклу по рядках"""
+        days = self._days(dates)
+        month_start = days.astype("datetime64[M]").astype("datetime64[D]")
+        next_month = (days.astype("datetime64[M]") + 1).astype("datetime64[D]")
+        base = self.start_day
+        i_day = days.astype(np.int64) - base + (1 if include_today else 0)
+        i_start = month_start.astype(np.int64) - base
+        i_next = next_month.astype(np.int64) - base
+        passed = self.cum[i_day] - self.cum[i_start]
+        left = self.cum[i_next] - self.cum[i_day]
+        return passed, left
+
+
+@lru_cache(maxsize=8)
+def _calendar(start_year: int, end_year: int) -> WorkCalendar:
+    return WorkCalendar.build(start_year, end_year)
+
+
+def get_work_calendar(*years: int, today: Optional[dt.date] = None) -> WorkCalendar:
+    """
+    Кешована таблиця робочих днів. Типовий діапазон — від поточного року
+    мінус DEFAULT_YEARS_BACK до плюс DEFAULT_YEARS_AHEAD; якщо потрібні роки
+    виходять за нього — будується (і кешується) ширший діапазон.
+    """
+    current = (today or dt.date.today()).year
+    start, end = current - DEFAULT_YEARS_BACK, current + DEFAULT_YEARS_AHEAD
+    if years:
+        start, end = min(start, *years), max(end, *years)
+    return _calendar(start, end)
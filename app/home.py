@@ -31,8 +31,8 @@ load_css()
 
 from app.auth.authentication import load_auth_from_cookies, logout_user, get_current_user, is_authenticated
 from app.auth.login_form import render_login_form
-from app.dashboard.user_dashboard import display_user_profile, display_sales_data
 from app.ui.navigation import render_navigation_menu, handle_navigation
+from app.jobs.warmup import start_process_warmup, warm_home_slice
 
 
 def render_home_page():
@@ -41,6 +41,9 @@ def render_home_page():
     
     user = get_current_user()
     if user:
+        # Дашборд (pandas-сервіси, графіки) імпортуємо лише після входу —
+        # форма логіну рендериться без цих модулів
+        from app.dashboard.user_dashboard import display_user_profile, display_sales_data
         profile_data = display_user_profile(user)
         display_sales_data(profile_data, user)
     else:
@@ -59,11 +62,15 @@ def render_page_content(selected_page):
 # Основна логіка додатку
 def main():
     """Головна функція додатку"""
+    # Прогрів популярних зрізів — один раз на процес, у фоні
+    start_process_warmup()
+
     # Ініціалізація аутентифікації
     if 'auth_user' not in st.session_state:
         saved_auth = load_auth_from_cookies()
         if saved_auth:
             st.session_state['auth_user'] = saved_auth
+            warm_home_slice(saved_auth)
         else:
             st.session_state['auth_user'] = None
 
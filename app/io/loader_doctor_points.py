@@ -0,0 +1,140 @@
+# app/io/loader_doctor_points.py
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+import streamlit as st
+import pandas as pd
+
+from app.core.config import DOCTOR_POINTS_COLUMNS, postgrest_select
+from app.io.supabase_client import get_supabase_client
+from app.utils.partition_cache import PartitionCache
+
+TABLE = "doctor_points"
+MP_COL = "М.П."
+PAGE_SIZE = 1000
+MAX_FETCH_WORKERS = 6
+PARTITION_TTL = 1800
+
+_SELECT = postgrest_select(DOCTOR_POINTS_COLUMNS)
+_MP_FILTER_COL = '"М.П."'
+
+
+@st.cache_resource(show_spinner=False)
+def _points_partitions() -> PartitionCache:
+    """Спільний для процесу кеш партицій (МП × рік × місяць) таблиці doctor_points"""
+    return PartitionCache(ttl=PARTITION_TTL)
+
+
+def invalidate_doctor_points_cache(year: Optional[int] = None, month: Optional[int] = None) -> int:
+    """Скидає закешовані партиції (усі або лише за вказаний рік/місяць)"""
+    if year is None and month is None:
+        return _points_partitions().invalidate()
+    return _points_partitions().invalidate(
+        lambda key: (year is None or key[1] == int(year)) and (month is None or key[2] == int(month))
+    )
+
+
+def fetch_doctor_points(
+    mp_values: Iterable[str],
+    years: Iterable[int],
+    months: Iterable[int],
+) -> pd.DataFrame:
+    """
+    Повертає doctor_points для mp_values × years × months лише з потрібними колонками.
+
+    Дані кешуються партиціями «МП × рік × місяць»; відсутні партиції тягнуться
+    з Supabase посторінково й паралельно, тож результат не обрізається лімітом PostgREST.
+    """
+    if get_supabase_client() is None:
+        st.error("Supabase клієнт не ініціалізований.")
+        return pd.DataFrame()
+
+    mps = sorted({str(m) for m in mp_values if m})
+    periods = sorted({(int(y), int(m)) for y in years for m in months})
+    if not mps or not periods:
+        return pd.DataFrame()
+
+    cache = _points_partitions()
+    keys = [(mp, y, m) for (y, m) in periods for mp in mps]
+    found, missing = cache.get_many(keys)
+
+    if missing:
+        try:
+            fetched = _fetch_missing_partitions(missing)
+        except Exception as e:
+            st.error(f"Помилка читання з Supabase (doctor_points): {e}")
+            return pd.DataFrame()
+        cache.put_many(fetched)
+        found.update(fetched)
+
+    records = [r for key in keys for r in found.get(key, [])]
+    if not records:
+        return pd.DataFrame()
+    return pd.DataFrame.from_records(records, columns=DOCTOR_POINTS_COLUMNS)
+
+
+# ----------------- helpers -----------------
+
+def _fetch_missing_partitions(missing: list) -> dict:
+    """
+    Один запит на (рік, місяць) для всіх МП з відсутньою партицією.
+    Повертає {(mp, year, month): [records]} для ВСІХ запитаних партицій (включно з порожніми).
+    """
+    by_period: dict = {}
+    for mp, y, m in missing:
+        by_period.setdefault((y, m), []).append(mp)
+
+    tasks = [(mps, y, m) for (y, m), mps in by_period.items()]
+    with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(tasks))) as pool:
+        results = list(pool.map(lambda t: _fetch_period(*t), tasks))
+
+    out: dict = {key: [] for key in missing}
+    for rows in results:
+        for r in rows:
+            key = (str(r.get(MP_COL)), int(r["year"]), int(r["month"]))
+            if key in out:
+                out[key].append(r)
+    return out
+
+
+def _period_query(mps: list[str], year: int, month: int, count: Optional[str] = None):
+    return (
+        get_supabase_client().table(TABLE)
+        .select(_SELECT, count=count)
+        .eq("year", int(year))
+        .eq("month", str(int(month)))
+        .in_(_MP_FILTER_COL, mps)
+        .order("id", desc=False)
+    )
+
+
+def _fetch_period(mps: list[str], year: int, month: int) -> list[dict]:
+    """
+    Перша сторінка разом з точною кількістю рядків, решта сторінок — паралельно
+    (без st.* — виконується у потоках).
+    """
+    first = _period_query(mps, year, month, count="exact").range(0, PAGE_SIZE - 1).execute()
+    rows = list(first.data or [])
+
+    def _page(offset: int) -> list[dict]:
+        return _period_query(mps, year, month).range(offset, offset + PAGE_SIZE - 1).execute().data or []
+
+    if first.count is None:
+        # сервер не віддав count — гортаємо послідовно до неповної сторінки
+        offset = PAGE_SIZE
+        batch = rows
+        while len(batch) == PAGE_SIZE:
+            batch = _page(offset)
+            rows.extend(batch)
+            offset += PAGE_SIZE
+        return rows
+
+    offsets = list(range(PAGE_SIZE, first.count, PAGE_SIZE))
+    if not offsets:
+        return rows
+    with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(offsets))) as pool:
+        for batch in pool.map(_page, offsets):
+            rows.extend(batch)
+    return rows
@@ -1,14 +1,14 @@
 # app/io/loader_sales.py
 from __future__ import annotations
 
+import time
+
 import streamlit as st
 import pandas as pd
 from typing import List, Optional
 
-from app.io.supabase_client import init_supabase_client
-
-# Ініціалізуємо клієнт один раз (кеш ресурсу бажано у самій init_supabase_client)
-supabase = init_supabase_client()
+from app.io.supabase_client import get_supabase_client
+from app.utils.data_fingerprint import mark_fetched
 
 
 @st.cache_data(ttl=3600, show_spinner=False)
@@ -22,7 +22,7 @@ def fetch_all_sales_data(
     Завантажує дані з таблиці sales_data, використовуючи пагінацію та фільтри.
     Повертає DataFrame з колонкою quantity як int (NaN -> 0).
     """
-    if supabase is None:
+    if get_supabase_client() is None:
         st.error("Supabase клієнт не ініціалізований. Перевірте st.secrets.")
         return pd.DataFrame()
 
@@ -44,7 +44,7 @@ def fetch_all_sales_data(
 
     while True:
         try:
-            query = supabase.table("sales_data").select(select_query).range(offset, offset + page_size - 1)
+            query = get_supabase_client().table("sales_data").select(select_query).range(offset, offset + page_size - 1)
 
             # Фільтр за регіоном (людська назва)
             if region_name and region_name != "Оберіть регіон...":
@@ -85,43 +85,45 @@ def fetch_all_sales_data(
     # month_int: Int64 1..12 (для джоїнів та розрахунків)
     df["month_str"] = df.get("month").astype(str).str.zfill(2)
     df["month_int"] = pd.to_numeric(df["month_str"], errors="coerce").astype("Int64")
-    return df
+    # watermark завантаження — входить у відбиток вибірки (app.utils.data_fingerprint)
+    return mark_fetched(df, time.time())
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
-def fetch_price_data(region_id: int, months: List[str] | List[int]) -> pd.DataFrame:
+def fetch_region_prices(region_id: int, page_size: int = 1000) -> pd.DataFrame:
     """
-    Завантажує дані про ціни з таблиці 'price' для вказаного region_id та місяців.
-    Повертає: product_name, price (float), month (Int64)
+    Уся історія цін регіону (усі місяці) — для PriceCatalogService.
+    Повертає: product_name, price (float), month, month_int (Int64).
     """
-    if supabase is None:
-        st.error("Supabase клієнт не ініціалізований. Перевірте st.secrets.")
-        return pd.DataFrame()
-
-    if not months or not region_id:
+    if get_supabase_client() is None or not region_id:
         return pd.DataFrame()
 
+    rows = []
+    offset = 0
     try:
-        # Уніфікуємо місяці: працюємо в БД з int, оскільки price.month = int2
-        numeric_months = [int(m) for m in months]
-        query = (
-            supabase.table("price")
-            .select("product_name,price,month")
-            .eq("region_id", region_id)
-            .in_("month", numeric_months)
-        )
-        response = query.execute()
-        rows = response.data or []
-
-        if not rows:
-            return pd.DataFrame()
-
-        price_df = pd.DataFrame(rows).drop_duplicates(subset=["product_name", "month"], keep="last")
-        price_df["price"] = pd.to_numeric(price_df["price"], errors="coerce")
-        # додаємо уніфіковану колонку month_int для злиття
-        price_df["month_int"] = pd.to_numeric(price_df["month"], errors="coerce").astype("Int64")
-        return price_df
-
+        while True:
+            batch = (
+                get_supabase_client().table("price")
+                .select("product_name,price,month")
+                .eq("region_id", region_id)
+                .order("month")
+                .order("product_name")
+                .range(offset, offset + page_size - 1)
+                .execute()
+                .data
+                or []
+            )
+            rows.extend(batch)
+            if len(batch) < page_size:
+                break
+            offset += page_size
     except Exception as e:
         st.error(f"Помилка при завантаженні цін з Supabase: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
+
+    if not rows:
+        return pd.DataFrame()
+
+    price_df = pd.DataFrame(rows).drop_duplicates(subset=["product_name", "month"], keep="last")
+    price_df["price"] = pd.to_numeric(price_df["price"], errors="coerce")
+    price_df["month_int"] = pd.to_numeric(price_df["month"], errors="coerce").astype("Int64")
+    return price_df
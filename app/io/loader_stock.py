@@ -1,23 +1,40 @@
 # app/io/loader_stock.py
 from __future__ import annotations
 
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 import streamlit as st
 import pandas as pd
-from typing import Optional
 
-from app.io.supabase_client import init_supabase_client
+from app.io.supabase_client import get_supabase_client
+from app.utils.partition_cache import PartitionCache
+
+# Ключ партиції для запитів «всі МП»
+ALL_MPS = "*"
+PAGE_SIZE = 1000
+MAX_FETCH_WORKERS = 6
 
-supabase = init_supabase_client()
+_STOCK_SELECT = (
+    "id, drug_name, quantity, visit_date, mp_id, pharmacy_id, visit_session_id,"
+    "medical_representatives(id, full_name),"
+    "pharmacies(id, name, city)"
+)
+_STOCK_COLUMNS = [
+    "id", "pharmacy_id", "pharmacy_name", "pharmacy_city", "drug_name",
+    "mp_id", "mp_full_name", "quantity", "visit_date", "visit_session_id",
+]
 
 
 @st.cache_data(ttl=3600, show_spinner=False)
 def fetch_medical_representatives() -> pd.DataFrame:
-    if supabase is None:
+    if get_supabase_client() is None:
         st.error("Supabase клієнт не ініціалізований.")
         return pd.DataFrame()
     try:
         response = (
-            supabase.table("medical_representatives")
+            get_supabase_client().table("medical_representatives")
             .select("id, full_name, mp_line, region")
             .order("full_name")
             .execute()
@@ -31,74 +48,166 @@ def fetch_medical_representatives() -> pd.DataFrame:
         return pd.DataFrame()
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
+def _partition_ttl(key) -> float:
+    """Свіжі дні (сьогодні/вчора) ще поповнюються візитами — тримаємо їх коротше"""
+    _, day = key
+    recent = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+    return 600 if day >= recent else 3600
+
+
+@st.cache_resource(show_spinner=False)
+def _stock_partitions() -> PartitionCache:
+    """Спільний для процесу кеш партицій (МП × день) таблиці pharmacy_stock_reports"""
+    return PartitionCache(ttl=3600, ttl_for=_partition_ttl)
+
+
 def fetch_stock_reports(
     mp_ids: Optional[tuple],
     date_from: str,
     date_to: str,
 ) -> pd.DataFrame:
-    if supabase is None:
+    """
+    Повертає звіти про залишки за [date_from, date_to] для mp_ids (None = всі МП).
+
+    Дані кешуються партиціями «МП × день»: запит складається з уже завантажених
+    партицій, а з Supabase паралельно тягнуться лише відсутні дні/МП.
+    """
+    if get_supabase_client() is None:
         st.error("Supabase клієнт не ініціалізований.")
         return pd.DataFrame()
 
-    all_data = []
-    offset = 0
-    page_size = 1000
+    days = _day_range(date_from, date_to)
+    mp_keys = list(mp_ids) if mp_ids else [ALL_MPS]
+    cache = _stock_partitions()
 
-    select_query = (
-        "id, drug_name, quantity, visit_date, mp_id, pharmacy_id, visit_session_id,"
-        "medical_representatives(id, full_name),"
-        "pharmacies(id, name, city)"
-    )
+    records: list[dict] = []
+    missing: dict = {}
+    for mp in mp_keys:
+        for day in days:
+            part = cache.get((mp, day))
+            if part is None and mp != ALL_MPS:
+                # партиція «всі МП» за цей день теж підходить — фільтруємо її
+                all_part = cache.get((ALL_MPS, day))
+                if all_part is not None:
+                    part = [r for r in all_part if r["mp_id"] == mp]
+            if part is None:
+                missing.setdefault(mp, []).append(day)
+            else:
+                records.extend(part)
 
-    while True:
+    if missing:
         try:
-            query = (
-                supabase.table("pharmacy_stock_reports")
-                .select(select_query)
-                .gte("visit_date", date_from)
-                .lte("visit_date", date_to)
-                .order("visit_date", desc=False)
-                .range(offset, offset + page_size - 1)
-            )
-            if mp_ids:
-                query = query.in_("mp_id", list(mp_ids))
-
-            response = query.execute()
-
-            if response.data:
-                batch = response.data
-                all_data.extend(batch)
-                if len(batch) < page_size:
-                    break
-                offset += page_size
-            else:
-                break
+            fetched = _fetch_missing_partitions(missing)
         except Exception as e:
             st.error(f"Помилка при завантаженні залишків з Supabase: {e}")
             return pd.DataFrame()
+        cache.put_many(fetched)
+        for mp, mp_days in missing.items():
+            for day in mp_days:
+                records.extend(fetched.get((mp, day), []))
 
-    if not all_data:
+    if not records:
         return pd.DataFrame()
 
-    records = []
-    for r in all_data:
-        mr = r.get("medical_representatives") or {}
-        ph = r.get("pharmacies") or {}
-        records.append({
-            "id": r.get("id"),
-            "pharmacy_id": r.get("pharmacy_id"),
-            "pharmacy_name": ph.get("name", ""),
-            "pharmacy_city": ph.get("city", ""),
-            "drug_name": r.get("drug_name", ""),
-            "mp_id": r.get("mp_id"),
-            "mp_full_name": mr.get("full_name", ""),
-            "quantity": r.get("quantity", 0),
-            "visit_date": r.get("visit_date"),
-            "visit_session_id": r.get("visit_session_id"),
-        })
-
-    df = pd.DataFrame(records)
+    df = pd.DataFrame.from_records(records, columns=_STOCK_COLUMNS)
     df["quantity"] = pd.to_numeric(df["quantity"], errors="coerce").fillna(0).astype(int)
     df["visit_date"] = pd.to_datetime(df["visit_date"], errors="coerce")
-    return df
+    return df.sort_values("visit_date", kind="stable").reset_index(drop=True)
+
+
+# ----------------- helpers -----------------
+
+def _day_range(date_from: str, date_to: str) -> list[str]:
+    d0 = datetime.date.fromisoformat(str(date_from)[:10])
+    d1 = datetime.date.fromisoformat(str(date_to)[:10])
+    return [(d0 + datetime.timedelta(days=i)).isoformat() for i in range((d1 - d0).days + 1)]
+
+
+def _contiguous_runs(days: list[str]) -> list[tuple[str, str]]:
+    """Розбиває відсортований список днів на суцільні діапазони [from, to]"""
+    runs = []
+    start = prev = datetime.date.fromisoformat(days[0])
+    for d in days[1:]:
+        cur = datetime.date.fromisoformat(d)
+        if cur - prev > datetime.timedelta(days=1):
+            runs.append((start.isoformat(), prev.isoformat()))
+            start = cur
+        prev = cur
+    runs.append((start.isoformat(), prev.isoformat()))
+    return runs
+
+
+def _fetch_missing_partitions(missing: dict) -> dict:
+    """
+    Завантажує відсутні партиції. МП з однаковим набором відсутніх днів
+    об'єднуються в один запит; кожен суцільний діапазон днів — окрема задача.
+    Повертає {(mp, day): [records]} для ВСІХ запитаних партицій (включно з порожніми).
+    """
+    groups: dict = {}
+    for mp, mp_days in missing.items():
+        groups.setdefault(tuple(sorted(mp_days)), []).append(mp)
+
+    tasks = []
+    for mp_days, mps in groups.items():
+        mp_filter = None if ALL_MPS in mps else mps
+        for run_from, run_to in _contiguous_runs(list(mp_days)):
+            tasks.append((mp_filter, run_from, run_to))
+
+    with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(tasks))) as pool:
+        results = list(pool.map(lambda t: _fetch_range(*t), tasks))
+
+    out: dict = {}
+    for mp_days, mps in groups.items():
+        for mp in mps:
+            for day in mp_days:
+                out[(mp, day)] = []
+    for rows in results:
+        for r in rows:
+            day = str(r["visit_date"])[:10]
+            if ALL_MPS in missing and (ALL_MPS, day) in out:
+                out[(ALL_MPS, day)].append(r)
+            key = (r["mp_id"], day)
+            if key in out:
+                out[key].append(r)
+    return out
+
+
+def _fetch_range(mp_ids: Optional[list], date_from: str, date_to: str) -> list[dict]:
+    """Посторінково тягне звіти за діапазон днів (без st.* — виконується у потоках)"""
+    rows: list[dict] = []
+    offset = 0
+    while True:
+        query = (
+            get_supabase_client().table("pharmacy_stock_reports")
+            .select(_STOCK_SELECT)
+            .gte("visit_date", date_from)
+            .lte("visit_date", date_to)
+            .order("visit_date", desc=False)
+            .order("id", desc=False)
+            .range(offset, offset + PAGE_SIZE - 1)
+        )
+        if mp_ids:
+            query = query.in_("mp_id", list(mp_ids))
+        batch = query.execute().data or []
+        rows.extend(_normalize_record(r) for r in batch)
+        if len(batch) < PAGE_SIZE:
+            break
+        offset += PAGE_SIZE
+    return rows
+
+
+def _normalize_record(r: dict) -> dict:
+    mr = r.get("medical_representatives") or {}
+    ph = r.get("pharmacies") or {}
+    return {
+        "id": r.get("id"),
+        "pharmacy_id": r.get("pharmacy_id"),
+        "pharmacy_name": ph.get("name", ""),
+        "pharmacy_city": ph.get("city", ""),
+        "drug_name": r.get("drug_name", ""),
+        "mp_id": r.get("mp_id"),
+        "mp_full_name": mr.get("full_name", ""),
+        "quantity": r.get("quantity", 0),
+        "visit_date": r.get("visit_date"),
+        "visit_session_id": r.get("visit_session_id"),
+    }
@@ -1,7 +1,13 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 import streamlit as st
-from supabase import create_client, Client
 from app.core.config import get_supabase_conf
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 @st.cache_resource
 def init_supabase_client() -> Client | None:
     """
@@ -19,8 +25,24 @@ def init_supabase_client() -> Client | None:
         return None
 
     try:
+        # supabase (httpx, postgrest, ...) імпортується при першому зверненні до БД
+        from supabase import create_client
         client = create_client(conf.url, conf.key)
         return client
     except Exception as e:
         st.error(f"Не вдалося ініціалізувати Supabase: {e}")
-        return None
\ No newline at end of file
+        return None
+
+_client: Client | None = None
+
+
+def get_supabase_client() -> Client | None:
+    """
+    init_supabase_client(), запам'ятований у модулі: завантажувачі отримують
+    клієнт при першому запиті (а не під час імпорту) і без звернень до
+    st.cache_resource з фонових потоків.
+    """
+    global _client
+    if _client is None:
+        _client = init_supabase_client()
+    return _client
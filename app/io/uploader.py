@@ -2,11 +2,30 @@
 from __future__ import annotations
 
 import time
+from typing import Callable, Dict, List, Optional
+
 import pandas as pd
 import streamlit as st
 from app.core.config import SUPABASE_INSERT_BATCH
+from app.data.sales_keys import SALES_KEY_COLUMNS, SALES_VALUE_COLUMNS, plan_sales_upsert
+from app.io.loader_doctor_points import invalidate_doctor_points_cache
+from app.io.loader_sales import fetch_all_sales_data
+from app.services.filter_catalog_service import get_filter_catalog
+from app.utils.data_versions import bump_data_version
+
+# progress(fraction, message) — див. app.jobs.JobContext.progress
+ProgressFn = Callable[[float, str], None]
+ErrorFn = Callable[[str], None]
+
 
-def upload_doctor_points(client, df_long: pd.DataFrame, table_name: str = "doctor_points") -> int:
+def upload_doctor_points(
+    client,
+    df_long: pd.DataFrame,
+    table_name: str = "doctor_points",
+    progress: Optional[ProgressFn] = None,
+    on_error: Optional[ErrorFn] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> int:
     """
     Завантажує дані у Supabase таблицю `doctor_points` батчами.
     Повертає кількість успішно вставлених рядків.
@@ -14,23 +33,160 @@ def upload_doctor_points(client, df_long: pd.DataFrame, table_name: str = "docto
     - client: Supabase client (init_supabase_client())
     - df_long: DataFrame у довгому форматі
     - table_name: назва таблиці
+    - progress / on_error / should_stop: для запуску у фоновій задачі
+      (без них помилки показуються через st.error)
     """
     if client is None:
-        st.error("Supabase client не ініціалізовано.")
+        (on_error or st.error)("Supabase client не ініціалізовано.")
         return 0
 
     rows = df_long.to_dict(orient="records")
+    total_inserted = _insert_batches(client, table_name, rows, progress, on_error, should_stop)
+
+    if total_inserted:
+        notify_doctor_points_changed(table_name)
+    return total_inserted
+
+
+def upload_sales_data(
+    client,
+    records: list[dict],
+    table_name: str = "sales_data",
+    progress: Optional[ProgressFn] = None,
+    on_error: Optional[ErrorFn] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> int:
+    """Вставляє підготовлені рядки продажів батчами; повертає кількість вставлених"""
+    if client is None:
+        (on_error or st.error)("Supabase client не ініціалізовано.")
+        return 0
+    total_inserted = _insert_batches(client, table_name, records, progress, on_error, should_stop)
+    if total_inserted:
+        notify_sales_changed(table_name)
+    return total_inserted
+
+
+def upsert_sales_data(
+    client,
+    records: list[dict],
+    mode: str = "upsert",
+    table_name: str = "sales_data",
+    progress: Optional[ProgressFn] = None,
+    on_error: Optional[ErrorFn] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Dict[str, int]:
+    """
+    Завантаження без дублів: для кожної пари (region, adding) одним запитом
+    читає наявні рядки, зіставляє природні ключі (app.data.sales_keys) і
+    - нові рядки вставляє;
+    - змінені оновлює по id (mode="upsert") або пропускає (mode="skip");
+    - ідентичні пропускає.
+    Повертає {"inserted", "updated", "skipped"}.
+    """
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    report_error = on_error or st.error
+    if client is None:
+        report_error("Supabase client не ініціалізовано.")
+        return counts
+    if not records:
+        return counts
+
+    df_new = pd.DataFrame(records)
+    groups = list(df_new.groupby(["region", "adding"], dropna=False, sort=False))
+    for g, ((region, adding), part) in enumerate(groups):
+        if should_stop is not None and should_stop():
+            break
+        if progress is not None:
+            progress(g / len(groups), f"Перевірка наявних рядків: {region} / {adding}")
+        try:
+            existing = _fetch_sales_keys(client, table_name, region, adding)
+        except Exception as e:
+            report_error(f"Не вдалося прочитати наявні рядки {region} / {adding}: {e}")
+            continue
+
+        plan = plan_sales_upsert([records[i] for i in part.index], existing, mode=mode)
+        counts["skipped"] += plan.skipped
+        counts["inserted"] += _insert_batches(client, table_name, plan.to_insert, None, on_error, should_stop)
+        counts["updated"] += _insert_batches(
+            client, table_name, plan.to_update, None, on_error, should_stop, upsert=True
+        )
+
+    if progress is not None:
+        progress(1.0, f"Вставлено {counts['inserted']:,}, оновлено {counts['updated']:,}, пропущено {counts['skipped']:,}")
+    if counts["inserted"] or counts["updated"]:
+        notify_sales_changed(table_name)
+    return counts
+
+
+def notify_sales_changed(table_name: str = "sales_data") -> None:
+    """
+    Після запису в sales_data: нова версія даних і скидання кешу
+    fetch_all_sales_data (інакше сторінки годину бачать старі зрізи).
+    """
+    bump_data_version(table_name)
+    fetch_all_sales_data.clear()
+
+
+def notify_doctor_points_changed(table_name: str = "doctor_points") -> None:
+    """
+    Після запису в doctor_points: нова версія даних (куби на сторінці «Лікарі»
+    перебудуються), скидання кешу партицій та каталогу фільтрів.
+    """
+    bump_data_version(table_name)
+    invalidate_doctor_points_cache()
+    get_filter_catalog().invalidate(table_name)
+
+
+# ----------------- helpers -----------------
+
+def _insert_batches(
+    client,
+    table_name: str,
+    rows: list[dict],
+    progress: Optional[ProgressFn],
+    on_error: Optional[ErrorFn],
+    should_stop: Optional[Callable[[], bool]],
+    upsert: bool = False,
+) -> int:
+    report_error = on_error or st.error
     total_inserted = 0
+    n_batches = max(1, -(-len(rows) // SUPABASE_INSERT_BATCH))
 
-    for i in range(0, len(rows), SUPABASE_INSERT_BATCH):
+    for b, i in enumerate(range(0, len(rows), SUPABASE_INSERT_BATCH)):
+        if should_stop is not None and should_stop():
+            break
         batch = rows[i : i + SUPABASE_INSERT_BATCH]
         try:
-            response = client.table(table_name).insert(batch).execute()
+            table = client.table(table_name)
+            response = (table.upsert(batch) if upsert else table.insert(batch)).execute()
             if response.data is not None:
                 total_inserted += len(batch)
         except Exception as e:
-            st.error(f"Помилка при вставці батчу {i // SUPABASE_INSERT_BATCH + 1}: {e}")
+            report_error(f"Помилка при вставці батчу {i // SUPABASE_INSERT_BATCH + 1}: {e}")
             # невелика пауза перед наступною спробою
             time.sleep(1)
+        if progress is not None:
+            progress((b + 1) / n_batches, f"Батч {b + 1}/{n_batches}, вставлено {total_inserted:,}")
+
+    return total_inserted
+
+
+def _fetch_sales_keys(client, table_name: str, region, adding, page_size: int = 1000) -> pd.DataFrame:
+    """id + колонки природного ключа/значень для одного файлу (region, adding)"""
+    cols = ["id"] + SALES_KEY_COLUMNS + [c for c in SALES_VALUE_COLUMNS if c not in SALES_KEY_COLUMNS]
+    rows: List[dict] = []
+    offset = 0
+    while True:
+        query = client.table(table_name).select(",".join(cols))
+        query = query.is_("region", "null") if _is_missing(region) else query.eq("region", region)
+        query = query.is_("adding", "null") if _is_missing(adding) else query.eq("adding", adding)
+        batch = query.order("id").range(offset, offset + page_size - 1).execute().data or []
+        rows.extend(batch)
+        if len(batch) < page_size:
+            break
+        offset += page_size
+    return pd.DataFrame(rows, columns=cols)
+
 
-    return total_inserted
\ No newline at end of file
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and pd.isna(value))
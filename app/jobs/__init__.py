@@ -0,0 +1,21 @@
+# app/jobs/__init__.py
+"""
+Фонові задачі (завантаження у Supabase) поза потоком сторінки.
+"""
+
+from app.jobs.runner import JobCancelled, JobContext, JobRunner, get_job_runner
+from app.jobs.store import CANCELLED, DONE, FAILED, INTERRUPTED, QUEUED, RUNNING, JobStore
+
+__all__ = [
+    "JobCancelled",
+    "JobContext",
+    "JobRunner",
+    "JobStore",
+    "get_job_runner",
+    "QUEUED",
+    "RUNNING",
+    "DONE",
+    "FAILED",
+    "CANCELLED",
+    "INTERRUPTED",
+]
@@ -0,0 +1,145 @@
+# app/jobs/runner.py
+# Пул фонових задач поза потоком Streamlit-скрипта
+from __future__ import annotations
+
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import streamlit as st
+
+from app.jobs.store import CANCELLED, DONE, FAILED, RUNNING, JobStore
+
+MAX_JOB_WORKERS = 2
+RESULT_RETENTION_S = 7 * 24 * 3600
+# не пишемо прогрес у SQLite частіше, ніж раз на цей інтервал
+PROGRESS_WRITE_INTERVAL_S = 0.5
+
+
+class JobCancelled(Exception):
+    """Кидається з JobContext.check_cancelled(), коли користувач скасував задачу"""
+
+
+class JobContext:
+    """
+    Передається у функцію задачі: звітує прогрес і перевіряє скасування.
+    Функції задач не повинні викликати st.* — вони працюють поза скриптом сторінки.
+    """
+
+    def __init__(self, store: JobStore, job_id: str, cancel_event: threading.Event):
+        self.job_id = job_id
+        self._store = store
+        self._cancel = cancel_event
+        self._last_write = 0.0
+        self.messages: List[str] = []
+
+    def progress(self, fraction: float, message: Optional[str] = None) -> None:
+        now = time.monotonic()
+        if now - self._last_write < PROGRESS_WRITE_INTERVAL_S and fraction < 1.0:
+            return
+        self._last_write = now
+        fields: Dict[str, Any] = {"progress": max(0.0, min(1.0, float(fraction)))}
+        if message is not None:
+            fields["message"] = message
+        self._store.update(self.job_id, **fields)
+
+    def log(self, message: str) -> None:
+        """Повідомлення (наприклад, помилка батчу) — зберігається в результаті задачі"""
+        self.messages.append(message)
+        self._store.update(self.job_id, message=message)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+
+class JobRunner:
+    """
+    Фонові задачі: пул потоків + таблиця задач у SQLite.
+
+    submit() одразу повертає id задачі; статус, прогрес і результат
+    читаються з таблиці (get/list), тож переживають ререндери та перехід
+    між сторінками. Результат має бути JSON-серіалізовним (лічильники, підсумки).
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, max_workers: int = MAX_JOB_WORKERS):
+        self.store = store or JobStore()
+        self.store.mark_interrupted()
+        self.store.purge(RESULT_RETENTION_S)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="app-job")
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        kind: str,
+        title: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        owner: Optional[str] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Ставить fn(ctx, *args, **kwargs) у чергу; повертає id задачі"""
+        job_id = uuid.uuid4().hex
+        event = threading.Event()
+        with self._lock:
+            self._cancel_events[job_id] = event
+        self.store.create(job_id, kind, title, owner)
+        self._pool.submit(self._run, job_id, event, fn, args, kwargs)
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """Просить задачу зупинитися (кооперативно, на найближчій перевірці)"""
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        if event is None:
+            return False
+        event.set()
+        job = self.store.get(job_id)
+        if job and job["status"] != RUNNING:
+            # ще в черзі — _run побачить прапорець і не запускатиме функцію
+            self.store.update(job_id, status=CANCELLED, finished_at=time.time())
+        return True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def list(self, owner: Optional[str] = None, kinds: Optional[List[str]] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        return self.store.list(owner=owner, kinds=kinds, limit=limit)
+
+    def _run(self, job_id: str, event: threading.Event, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        try:
+            if event.is_set():
+                self.store.update(job_id, status=CANCELLED, finished_at=time.time())
+                return
+            self.store.update(job_id, status=RUNNING, started_at=time.time())
+            ctx = JobContext(self.store, job_id, event)
+            try:
+                result = fn(ctx, *args, **kwargs)
+            except JobCancelled:
+                self.store.update(job_id, status=CANCELLED, finished_at=time.time(), message="Скасовано")
+                return
+            except Exception as e:
+                self.store.update(
+                    job_id, status=FAILED, finished_at=time.time(),
+                    error=f"{e}\n{traceback.format_exc(limit=5)}",
+                )
+                return
+            status = CANCELLED if event.is_set() else DONE
+            self.store.update(job_id, status=status, progress=1.0, finished_at=time.time(), result=result)
+        finally:
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_runner() -> JobRunner:
+    """Спільний для процесу виконавець задач"""
+    return JobRunner()
@@ -0,0 +1,128 @@
+# app/jobs/store.py
+# Персистентна таблиця фонових задач (SQLite)
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Статуси задач
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"
+
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    title       TEXT NOT NULL,
+    owner       TEXT,
+    status      TEXT NOT NULL,
+    progress    REAL NOT NULL DEFAULT 0,
+    message     TEXT,
+    result_json TEXT,
+    error       TEXT,
+    created_at  REAL NOT NULL,
+    started_at  REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_owner_created ON jobs(owner, created_at);
+"""
+
+
+def default_db_path() -> str:
+    """Шлях до бази задач: $APP_JOBS_DB або <корінь проєкту>/.jobs/jobs.sqlite"""
+    env = os.environ.get("APP_JOBS_DB")
+    if env:
+        return env
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(project_root, ".jobs", "jobs.sqlite")
+
+
+class JobStore:
+    """
+    Таблиця задач у SQLite. Одне з'єднання на процес під замком —
+    записи короткі (статус/прогрес), тож конкуренції практично немає.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_db_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def create(self, job_id: str, kind: str, title: str, owner: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs(id, kind, title, owner, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, title, owner, QUEUED, time.time()),
+            )
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        if "result" in fields:
+            fields["result_json"] = json.dumps(fields.pop("result"), ensure_ascii=False, default=str)
+        if not fields:
+            return
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def list(self, owner: Optional[str] = None, kinds: Optional[List[str]] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        sql = "SELECT * FROM jobs WHERE 1 = 1"
+        params: list = []
+        if owner is not None:
+            sql += " AND owner = ?"
+            params.append(owner)
+        if kinds:
+            sql += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_row_to_dict(r) for r in rows]
+
+    def mark_interrupted(self) -> int:
+        """Задачі, що лишилися активними після перезапуску процесу, позначаються перерваними"""
+        with self._lock:
+            cur = self._conn.execute(
+                f"UPDATE jobs SET status = ?, finished_at = ? WHERE status IN ({', '.join('?' for _ in ACTIVE_STATUSES)})",
+                (INTERRUPTED, time.time(), *ACTIVE_STATUSES),
+            )
+            return cur.rowcount
+
+    def purge(self, older_than_s: float) -> int:
+        """Видаляє завершені задачі, старші за older_than_s секунд"""
+        cutoff = time.time() - older_than_s
+        with self._lock:
+            cur = self._conn.execute(
+                f"DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ? "
+                f"AND status NOT IN ({', '.join('?' for _ in ACTIVE_STATUSES)})",
+                (cutoff, *ACTIVE_STATUSES),
+            )
+            return cur.rowcount
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    out = dict(row)
+    raw = out.pop("result_json", None)
+    out["result"] = json.loads(raw) if raw else None
+    return out
@@ -0,0 +1,59 @@
+# app/jobs/tasks.py
+# Функції фонових задач: fn(ctx, ...) -> JSON-серіалізовний результат
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import pandas as pd
+
+from app.io.uploader import upload_doctor_points, upload_sales_data, upsert_sales_data
+from app.jobs.runner import JobContext
+
+KIND_DOCTOR_POINTS_UPLOAD = "doctor_points_upload"
+KIND_SALES_UPLOAD = "sales_upload"
+
+
+def doctor_points_upload_task(ctx: JobContext, client, df_long: pd.DataFrame) -> Dict[str, Any]:
+    inserted = upload_doctor_points(
+        client, df_long,
+        progress=ctx.progress, on_error=ctx.log, should_stop=lambda: ctx.cancelled,
+    )
+    return {
+        "summary": f"Завантажено {inserted:,} з {len(df_long):,} рядків у doctor_points",
+        "inserted": inserted,
+        "total": len(df_long),
+        "errors": ctx.messages,
+    }
+
+
+def sales_upload_task(ctx: JobContext, client, records: list[dict], mode: str = "upsert") -> Dict[str, Any]:
+    """
+    mode: "upsert" / "skip" — без дублів (див. upsert_sales_data),
+    "append" — вставити всі рядки як є.
+    """
+    if mode != "append":
+        counts = upsert_sales_data(
+            client, records, mode=mode,
+            progress=ctx.progress, on_error=ctx.log, should_stop=lambda: ctx.cancelled,
+        )
+        return {
+            "summary": (
+                f"sales_data: вставлено {counts['inserted']:,}, оновлено {counts['updated']:,}, "
+                f"пропущено {counts['skipped']:,} з {len(records):,} рядків"
+            ),
+            **counts,
+            "total": len(records),
+            "errors": ctx.messages,
+        }
+
+    inserted = upload_sales_data(
+        client, records,
+        progress=ctx.progress, on_error=ctx.log, should_stop=lambda: ctx.cancelled,
+    )
+    return {
+        "summary": f"Завантажено {inserted:,} з {len(records):,} рядків у sales_data",
+        "inserted": inserted,
+        "total": len(records),
+        "errors": ctx.messages,
+    }
+
@@ -0,0 +1,154 @@
+# app/jobs/warmup.py
+# Прогрів спільних кешів: зріз головної сторінки після входу і популярні зрізи на старті процесу
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import streamlit as st
+
+from app.services.profile_service import home_sales_slice
+
+logger = logging.getLogger(__name__)
+
+WARM_MAX_WORKERS = 2
+# Той самий зріз не гріємо частіше (кеш fetch_all_sales_data живе годину)
+WARM_REPEAT_S = 600
+# Скільки найпоширеніших зрізів профілів гріти на старті процесу (0 — вимкнено)
+POPULAR_SLICES = int(os.environ.get("WARMUP_POPULAR_SLICES", "5"))
+PROFILES_PAGE_SIZE = 1000
+
+
+class CacheWarmer:
+    """
+    Невеликий пул потоків для прогріву кешів поза потоком сторінки.
+    Один і той самий ключ не запускається вдруге, поки виконується
+    або поки не минуло WARM_REPEAT_S після завершення. Функції прогріву не
+    викликають st.* — вони лише наповнюють спільні кеші (st.cache_data /
+    каталог цін); сторінка, що прийде по ті самі дані, дочекається
+    обчислення через lock кешу і не піде в БД вдруге.
+    """
+
+    def __init__(self, max_workers: int = WARM_MAX_WORKERS, repeat_s: float = WARM_REPEAT_S):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="app-warm")
+        self._repeat_s = repeat_s
+        self._inflight: set = set()
+        self._finished: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> bool:
+        """True — прогрів поставлено в чергу; False — вже виконується або свіжий"""
+        now = time.monotonic()
+        with self._lock:
+            if key in self._inflight:
+                return False
+            done_at = self._finished.get(key)
+            if done_at is not None and now - done_at < self._repeat_s:
+                return False
+            self._inflight.add(key)
+        self._pool.submit(self._run, key, fn, args)
+        return True
+
+    def _run(self, key: Hashable, fn: Callable[..., Any], args: tuple) -> None:
+        started = time.monotonic()
+        try:
+            fn(*args)
+            logger.info("warm-up %s: %.2fs", key, time.monotonic() - started)
+        except Exception:  # прогрів — оптимізація; сторінка завантажить дані сама
+            logger.exception("warm-up %s failed", key)
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+                self._finished[key] = time.monotonic()
+
+
+@st.cache_resource(show_spinner=False)
+def get_cache_warmer() -> CacheWarmer:
+    """Спільний для процесу пул прогріву"""
+    return CacheWarmer()
+
+
+def _slice_key(params: Dict[str, Any]) -> tuple:
+    return ("home_slice", params["region_name"], params["territory"], params["line"], tuple(params["months_param"]))
+
+
+def warm_sales_slice(params: Dict[str, Any]) -> None:
+    """Завантажує зріз sales_data (кеш fetch_all_sales_data) і каталог цін регіону"""
+    # імпорти тут: pandas/лоадери вантажаться у фоновому потоці, а не на першому рендері
+    from app.io import loader_sales as data_loader
+    from app.services.price_catalog_service import get_price_catalog
+
+    data_loader.fetch_all_sales_data(
+        region_name=params["region_name"],
+        territory=params["territory"],
+        line=params["line"],
+        months=params["months_param"],
+    )
+    if params.get("region_id"):
+        get_price_catalog().catalog(params["region_id"])
+
+
+def warm_home_slice(profile: Optional[Dict[str, Any]]) -> bool:
+    """
+    Хук після входу: ставить у фон завантаження зрізу головної сторінки
+    (той самий, що fetch_user_sales_independent) і цін його регіону.
+    """
+    if not profile:
+        return False
+    params = home_sales_slice(profile)
+    return get_cache_warmer().submit(_slice_key(params), warm_sales_slice, params)
+
+
+def popular_home_slices(limit: int = POPULAR_SLICES) -> List[Dict[str, Any]]:
+    """Найпоширеніші серед профілів зрізи головної сторінки (регіон × територія × лінія)"""
+    from app.io.supabase_client import get_supabase_client
+
+    client = get_supabase_client()
+    if client is None or limit <= 0:
+        return []
+    counts: Counter = Counter()
+    by_key: Dict[tuple, Dict[str, Any]] = {}
+    offset = 0
+    while True:
+        batch = (
+            client.table("profiles")
+            .select("region,region_id,territory,line")
+            .order("id")
+            .range(offset, offset + PROFILES_PAGE_SIZE - 1)
+            .execute()
+            .data
+            or []
+        )
+        for row in batch:
+            if not row.get("region"):
+                continue
+            params = home_sales_slice(row)
+            key = _slice_key(params)
+            counts[key] += 1
+            by_key.setdefault(key, params)
+        if len(batch) < PROFILES_PAGE_SIZE:
+            break
+        offset += PROFILES_PAGE_SIZE
+    return [by_key[key] for key, _ in counts.most_common(limit)]
+
+
+def _warm_popular(limit: int) -> None:
+    warmer = get_cache_warmer()
+    for params in popular_home_slices(limit):
+        warmer.submit(_slice_key(params), warm_sales_slice, params)
+
+
+@st.cache_resource(show_spinner=False)
+def start_process_warmup() -> bool:
+    """
+    Один раз на процес (перший запуск скрипта): у фоні визначає популярні
+    зрізи з profiles і гріє їх, щоб перший дашборд після входу був з кешу.
+    """
+    if POPULAR_SLICES <= 0:
+        return False
+    return get_cache_warmer().submit(("popular", POPULAR_SLICES), _warm_popular, POPULAR_SLICES)
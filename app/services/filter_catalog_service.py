@@ -0,0 +1,198 @@
+# app/services/filter_catalog_service.py
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import streamlit as st
+
+from app.core.config import postgrest_column
+from app.io.supabase_client import init_supabase_client
+
+DOCTOR_POINTS_TABLE = "doctor_points"
+
+# Колонки doctor_points, для яких сервіс віддає списки значень
+DOCTOR_POINTS_FACETS: Dict[str, str] = {
+    "year": "year",
+    "month": "month",
+    "mp": "М.П.",
+    "city": "Місто",
+    "lpz": "ЛПЗ",
+    "specialization": "Спеціалізація лікаря",
+}
+
+# Скільки кроків «стрибкового» сканування індексу робимо, перш ніж перейти
+# на читання однієї колонки. Кроки послідовні (кожен чекає попереднє значення),
+# тож межа мала: вистачає на роки й 12 місяців, для довших списків дешевше скан
+LOOSE_SCAN_MAX_STEPS = 13
+# Фасети з кількома значеннями, для яких «стрибкове» сканування має сенс;
+# МП, міста, ЛПЗ і спеціалізації майже завжди довші за LOOSE_SCAN_MAX_STEPS
+LOOSE_SCAN_FACETS = {"year", "month"}
+PAGE_SIZE = 1000
+# Через скільки секунд знову пробувати RPC distinct_values, якщо її не було в базі
+RPC_RETRY_S = 600
+# Коди PostgREST/Postgres «функцію не знайдено»
+_RPC_MISSING_CODES = {"PGRST202", "42883"}
+
+
+class FilterCatalogService:
+    """
+    Каталог значень для фільтрів (роки, місяці, МП, міста, ЛПЗ, спеціалізації).
+
+    Значення беруться в такому порядку:
+    1) RPC `distinct_values(p_table text, p_column text)` — якщо функція є в базі
+       (SELECT DISTINCT по індексу, O(кількість значень));
+    2) «стрибкове» сканування: order + gt(останнє) + limit(1) — один запит на значення
+       (лише для LOOSE_SCAN_FACETS);
+    3) посторінкове читання лише потрібної колонки.
+
+    Результати тримаються в пам'яті процесу з TTL і скидаються через invalidate()
+    після завантаження нових даних. Невдалі запити не кешуються.
+    """
+
+    def __init__(self, ttl: float = 3600):
+        self.client = init_supabase_client()
+        self._ttl = ttl
+        self._cache: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+        # monotonic-час, до якого RPC distinct_values вважається відсутньою
+        self._rpc_missing_until = 0.0
+
+    # ----------------- public API -----------------
+
+    def years(self) -> List[int]:
+        """Роки, наявні в doctor_points"""
+        return sorted({int(v) for v in self.doctor_points_values("year") if str(v).strip().isdigit()})
+
+    def months(self, year: Optional[int] = None) -> List[int]:
+        """Місяці (числа 1–12), наявні в doctor_points (опційно за рік)"""
+        filters = {"year": int(year)} if year is not None else None
+        values = self.doctor_points_values("month", filters)
+        return sorted({int(v) for v in values if str(v).strip().isdigit()})
+
+    def mp_names(self) -> List[str]:
+        """ПІБ медпредставників з profiles.full_name"""
+        key = ("profiles", "full_name", ())
+
+        def load() -> Optional[List[str]]:
+            values = self._distinct("profiles", "full_name", {}, loose_scan=False)
+            if values is None:
+                return None
+            return sorted({str(v).strip() for v in values if str(v).strip()})
+
+        return self._cached(key, load)
+
+    def doctor_points_values(self, facet: str, filters: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """Відсортовані унікальні значення колонки doctor_points (facet — ключ DOCTOR_POINTS_FACETS)"""
+        column = DOCTOR_POINTS_FACETS[facet]
+        frozen = tuple(sorted((filters or {}).items()))
+        key = (DOCTOR_POINTS_TABLE, column, frozen)
+        loose_scan = facet in LOOSE_SCAN_FACETS
+        return self._cached(key, lambda: self._distinct(DOCTOR_POINTS_TABLE, column, dict(frozen), loose_scan))
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """Скидає кеш (усіх таблиць або лише однієї)"""
+        with self._lock:
+            if table is None:
+                self._cache.clear()
+            else:
+                for key in [k for k in self._cache if k[0] == table]:
+                    del self._cache[key]
+
+    # ----------------- internals -----------------
+
+    def _cached(self, key: tuple, loader) -> List[Any]:
+        """loader повертає None при помилці — тоді порожній список без кешування"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._cache.get(key)
+            if item is not None and item[0] > now:
+                return item[1]
+        values = loader()
+        if values is None:
+            return []
+        with self._lock:
+            self._cache[key] = (now + self._ttl, values)
+        return values
+
+    def _distinct(
+        self, table: str, column: str, filters: Dict[str, Any], loose_scan: bool = True
+    ) -> Optional[List[Any]]:
+        """Унікальні значення колонки; None — запит не вдався (попередження вже показано)"""
+        if not self.client:
+            return []
+        try:
+            if not filters:
+                values = self._distinct_rpc(table, column)
+                if values is not None:
+                    return values
+            if loose_scan:
+                values = self._distinct_loose_scan(table, column, filters)
+                if values is not None:
+                    return values
+            return sorted({v for v in self._scan_column(table, column, filters) if v not in (None, "")})
+        except Exception as e:
+            st.warning(f"Не вдалося отримати значення фільтра «{column}»: {e}")
+            return None
+
+    def _distinct_rpc(self, table: str, column: str) -> Optional[List[Any]]:
+        """None — RPC недоступна (тоді спрацьовують запасні способи)"""
+        if time.monotonic() < self._rpc_missing_until:
+            return None
+        try:
+            rows = self.client.rpc("distinct_values", {"p_table": table, "p_column": column}).execute().data or []
+        except Exception as e:
+            # вимикаємо RPC лише коли її справді немає в базі, і не назавжди;
+            # інші помилки (мережа, таймаут) стосуються тільки цього запиту
+            if _is_missing_function(e):
+                self._rpc_missing_until = time.monotonic() + RPC_RETRY_S
+            return None
+        values = [r.get("value") if isinstance(r, dict) else r for r in rows]
+        return sorted(v for v in values if v not in (None, ""))
+
+    def _distinct_loose_scan(self, table: str, column: str, filters: Dict[str, Any]) -> Optional[List[Any]]:
+        """Один запит на кожне значення; None — якщо значень більше за LOOSE_SCAN_MAX_STEPS"""
+        quoted = postgrest_column(column)
+        values: List[Any] = []
+        last = None
+        for _ in range(LOOSE_SCAN_MAX_STEPS):
+            q = self.client.table(table).select(quoted).not_.is_(quoted, "null")
+            for col, val in filters.items():
+                q = q.eq(postgrest_column(col), val)
+            if last is not None:
+                q = q.gt(quoted, last)
+            rows = q.order(quoted, desc=False).limit(1).execute().data or []
+            if not rows:
+                return [v for v in values if v != ""]
+            last = rows[0].get(column)
+            values.append(last)
+        return None
+
+    def _scan_column(self, table: str, column: str, filters: Optional[Dict[str, Any]] = None) -> List[Any]:
+        quoted = postgrest_column(column)
+        out: List[Any] = []
+        offset = 0
+        while True:
+            q = self.client.table(table).select(quoted)
+            for col, val in (filters or {}).items():
+                q = q.eq(postgrest_column(col), val)
+            batch = q.order(quoted, desc=False).range(offset, offset + PAGE_SIZE - 1).execute().data or []
+            out.extend(r.get(column) for r in batch)
+            if len(batch) < PAGE_SIZE:
+                return out
+            offset += PAGE_SIZE
+
+
+def _is_missing_function(error: Exception) -> bool:
+    """Помилка PostgREST «функцію не знайдено» (PGRST202 / 42883)"""
+    code = getattr(error, "code", None)
+    if code in _RPC_MISSING_CODES:
+        return True
+    return "Could not find the function" in str(error)
+
+
+@st.cache_resource(show_spinner=False)
+def get_filter_catalog() -> FilterCatalogService:
+    """Спільний для процесу каталог фільтрів"""
+    return FilterCatalogService()
@@ -0,0 +1,102 @@
+# app/services/price_catalog_service.py
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from app.io import loader_sales as data_loader
+from app.utils.data_fingerprint import stamp
+from app.utils.data_versions import get_data_version
+
+PRICE_TABLE = "price"
+PRICE_COLUMNS = ["product_name", "price", "month", "month_int"]
+
+
+class PriceCatalog:
+    """
+    Уся історія цін регіону, відсортована за (month_int, product_name).
+    Будь-яка підмножина місяців — це конкатенація готових зрізів без запитів у БД.
+    """
+
+    def __init__(self, region_id: int, prices: pd.DataFrame):
+        self.region_id = region_id
+        self.loaded_at = time.time()
+        if prices is None or prices.empty:
+            prices = pd.DataFrame(columns=PRICE_COLUMNS)
+        df = prices.dropna(subset=["month_int"]).sort_values(["month_int", "product_name"], kind="stable")
+        self.frame = df.reset_index(drop=True)
+        months = self.frame["month_int"].astype(int).to_numpy()
+        bounds = np.flatnonzero(np.diff(months)) + 1
+        starts = np.r_[0, bounds] if len(months) else np.array([], dtype=int)
+        stops = np.r_[bounds, len(months)] if len(months) else np.array([], dtype=int)
+        self._ranges: Dict[int, Tuple[int, int]] = {
+            int(months[a]): (int(a), int(b)) for a, b in zip(starts, stops)
+        }
+
+    @property
+    def months(self) -> List[int]:
+        return sorted(self._ranges)
+
+    def for_months(self, months: Iterable[int]) -> pd.DataFrame:
+        """Ціни для підмножини місяців (ті самі колонки, що й fetch_region_prices)"""
+        wanted = sorted({int(m) for m in months if pd.notna(m)})
+        parts = [self._ranges[m] for m in wanted if m in self._ranges]
+        if not parts:
+            return pd.DataFrame()
+        idx = np.concatenate([np.arange(a, b) for a, b in parts])
+        return self.frame.iloc[idx].reset_index(drop=True)
+
+
+class PriceCatalogService:
+    """
+    Один запит до таблиці price на регіон: повна історія цін будується в
+    PriceCatalog і тримається в пам'яті процесу з TTL та з прив'язкою до
+    версії даних `price` (bump_data_version("price") — перечитати).
+    """
+
+    def __init__(self, ttl: float = 3600):
+        self._ttl = ttl
+        self._catalogs: Dict[int, Tuple[PriceCatalog, int, float]] = {}
+        self._lock = threading.Lock()
+
+    def catalog(self, region_id: int) -> PriceCatalog:
+        region_id = int(region_id)
+        version = get_data_version(PRICE_TABLE)
+        now = time.monotonic()
+        with self._lock:
+            hit = self._catalogs.get(region_id)
+            if hit is not None and hit[1] == version and now - hit[2] < self._ttl:
+                return hit[0]
+        catalog = PriceCatalog(region_id, data_loader.fetch_region_prices(region_id))
+        with self._lock:
+            self._catalogs[region_id] = (catalog, version, now)
+        return catalog
+
+    def prices(self, region_id: Optional[int], months: Iterable[int]) -> pd.DataFrame:
+        """Ціни регіону для місяців; порожній DataFrame, якщо регіон не задано"""
+        if not region_id:
+            return pd.DataFrame()
+        months = list(months or [])
+        if not months:
+            return pd.DataFrame()
+        catalog = self.catalog(region_id)
+        wanted = tuple(sorted({int(m) for m in months if pd.notna(m)}))
+        return stamp(catalog.for_months(wanted), PRICE_TABLE, catalog.region_id, catalog.loaded_at, wanted)
+
+    def invalidate(self, region_id: Optional[int] = None) -> None:
+        with self._lock:
+            if region_id is None:
+                self._catalogs.clear()
+            else:
+                self._catalogs.pop(int(region_id), None)
+
+
+@st.cache_resource(show_spinner=False)
+def get_price_catalog() -> PriceCatalogService:
+    """Спільний для процесу каталог цін"""
+    return PriceCatalogService()
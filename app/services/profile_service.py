@@ -0,0 +1,95 @@
+# app/services/profile_service.py
+from __future__ import annotations
+
+import datetime as dt
+import time
+from typing import Any, Dict, Optional
+
+import streamlit as st
+
+from app.io.supabase_client import init_supabase_client
+
+PROFILES_TABLE = "profiles"
+# Профіль майже не змінюється; короткий TTL — щоб зміни в БД підхоплювались без перелогіну
+PROFILE_TTL = 300
+_SESSION_KEY = "_profile_cache"
+
+
+class ProfileService:
+    """
+    Повний рядок profiles поточного користувача: один запит на сесію,
+    далі — з st.session_state до закінчення TTL або invalidate().
+    Усі сторінки (головна, аптеки) читають профіль звідси.
+    """
+
+    def __init__(self, ttl: float = PROFILE_TTL):
+        self._ttl = ttl
+
+    def get(self, user: Optional[dict], refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Профіль за user['id'] (або за email, якщо id немає).
+        None — користувача/рядка немає або Supabase не ініціалізовано.
+        Помилки запиту прокидаються — повідомлення показує сторінка.
+        """
+        lookup = self._lookup(user)
+        if lookup is None:
+            return None
+        cache: Dict[tuple, tuple] = st.session_state.setdefault(_SESSION_KEY, {})
+        now = time.monotonic()
+        hit = cache.get(lookup)
+        if hit is not None and not refresh and hit[0] > now:
+            return hit[1]
+
+        client = init_supabase_client()
+        if not client:
+            return None
+        column, value = lookup
+        result = client.table(PROFILES_TABLE).select("*").eq(column, value).limit(1).execute()
+        profile = (result.data or [None])[0]
+        cache[lookup] = (now + self._ttl, profile)
+        return profile
+
+    def region_id(self, user: Optional[dict]) -> Optional[int]:
+        profile = self.get(user)
+        return profile.get("region_id") if profile else None
+
+    def invalidate(self) -> None:
+        """Скидає профіль сесії (вихід, зміна профілю)"""
+        st.session_state.pop(_SESSION_KEY, None)
+
+    @staticmethod
+    def _lookup(user: Optional[dict]) -> Optional[tuple]:
+        if not user:
+            return None
+        if user.get("id"):
+            return ("id", user["id"])
+        if user.get("email"):
+            return ("email", user["email"])
+        return None
+
+
+def home_sales_slice(profile: Dict[str, Any], today: Optional[dt.date] = None) -> Dict[str, Any]:
+    """
+    Параметри зрізу продажів головної сторінки з профілю: регіон (назва та id),
+    технічна територія, лінія і поточний календарний місяць.
+    Ті самі аргументи fetch_all_sales_data використовує і прогрів кешу (app.jobs.warmup).
+    """
+    region_name = profile.get("region")  # повна назва з профілю, напр. '24. Тернопіль'
+    if isinstance(region_name, str):
+        region_name = region_name.strip()
+    today = today or dt.date.today()
+    return {
+        "region_id": profile.get("region_id"),
+        "region_name": region_name or None,
+        "territory": (profile.get("territory") or "").strip() or "Всі",  # у профілі вже технічна назва
+        "line": (profile.get("line") or "Всі").strip() or "Всі",
+        "year": today.year,
+        "month": today.month,
+        "months_param": [f"{today.month:02d}"],  # лоадер очікує рядки "MM"
+    }
+
+
+@st.cache_resource(show_spinner=False)
+def get_profile_service() -> ProfileService:
+    """Спільний сервіс профілів (дані — у сесії користувача)"""
+    return ProfileService()
@@ -1,14 +1,17 @@
 # app/services/sales_analytics_service.py
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 from typing import Dict, Any, List, Tuple
 from app.data import processing_sales as data_processing
+from app.utils.data_fingerprint import memoize_by_fingerprint
 
 
 class SalesAnalyticsService:
     """Сервіс для аналітичних розрахунків продажів"""
     
+    @memoize_by_fingerprint
     def calculate_kpis(self, df_latest_decade: pd.DataFrame, df_latest_with_revenue: pd.DataFrame, 
                       df_period_top: pd.DataFrame) -> Dict[str, Any]:
         """Розраховує основні KPI"""
@@ -65,6 +68,7 @@ class SalesAnalyticsService:
         else:
             return 0
     
+    @memoize_by_fingerprint
     def calculate_product_summary(self, df_latest_decade: pd.DataFrame, df_latest_with_revenue: pd.DataFrame) -> pd.DataFrame:
         """Розраховує зведення по продуктах"""
         # вибираємо колонку продукту (очищену, якщо доступна)
@@ -99,6 +103,7 @@ class SalesAnalyticsService:
         
         return combined_prod
     
+    @memoize_by_fingerprint
     def calculate_abc_analysis(self, df_period: pd.DataFrame, metric: str = 'revenue') -> pd.DataFrame:
         """Розраховує ABC аналіз"""
         prod_col = 'product_name_clean' if 'product_name_clean' in df_period.columns else 'product_name'
@@ -132,6 +137,7 @@ class SalesAnalyticsService:
         
         return abc_data
     
+    @memoize_by_fingerprint
     def calculate_bcg_matrix(self, df_period: pd.DataFrame) -> pd.DataFrame:
         """Розраховує BCG матрицю"""
         if not {'month_int','quantity','product_name'}.issubset(df_period.columns):
@@ -183,24 +189,18 @@ class SalesAnalyticsService:
             bcg = bcg.rename(columns={prod_col_bcg:'Препарат'})
             
             # Кольорове кодування за темпом росту
-            def _bucket_growth(g):
-                try:
-                    g = float(g)
-                except Exception:
-                    g = 0.0
-                if g < 0:
-                    return 'Падіння (<0%)'
-                elif g < 3:
-                    return 'Стабільно (0–3%)'
-                else:
-                    return 'Ріст (>3%)'
-            
-            bcg['Категорія'] = bcg['growth_%'].apply(_bucket_growth)
+            growth = pd.to_numeric(bcg['growth_%'], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+            bcg['Категорія'] = np.select(
+                [growth < 0, growth < 3],
+                ['Падіння (<0%)', 'Стабільно (0–3%)'],
+                default='Ріст (>3%)',
+            )
             
             return bcg
         
         return pd.DataFrame()
     
+    @memoize_by_fingerprint
     def calculate_growth_metrics(self, df_period: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """Розраховує метрики росту між місяцями"""
         prod_col_full = 'product_name_clean' if 'product_name_clean' in df_period.columns else 'product_name'
@@ -251,6 +251,7 @@ class SalesAnalyticsService:
         
         return pd.DataFrame(), pd.DataFrame()
     
+    @memoize_by_fingerprint
     def calculate_top_pharmacies(self, df_with_revenue: pd.DataFrame) -> pd.DataFrame:
         """Розраховує топ аптек"""
         if 'revenue' not in df_with_revenue.columns:
@@ -3,10 +3,11 @@ from __future__ import annotations
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from typing import Optional, List
 from app.utils import UKRAINIAN_MONTHS
+from app.utils.data_fingerprint import memoize_by_fingerprint
+from app.charts import chart_data, figure_cache
 
 
 class SalesChartsService:
@@ -21,8 +22,9 @@ class SalesChartsService:
         else:
             self._render_single_month_quantity_chart(df_latest_decade, last_decade, cur_month, cur_year)
     
-    def _render_multi_month_quantity_chart(self, df_work: pd.DataFrame, sel_months_int: List[int]) -> None:
-        """Рендерить графік для кількох місяців"""
+    @memoize_by_fingerprint
+    def quantity_by_product_months(self, df_work: pd.DataFrame, sel_months_int: List[int]) -> pd.DataFrame:
+        """К-сть по продуктах і місяцях (остання декада кожного обраного місяця)"""
         prod_col_chart = 'product_name_clean' if 'product_name_clean' in df_work.columns else 'product_name'
         
         # Drop first 3 symbols from names for chart labels
@@ -58,29 +60,41 @@ class SalesChartsService:
         
         if not multi_df.empty:
             multi_df['Місяць'] = multi_df['month_int'].astype(int).map(lambda m: UKRAINIAN_MONTHS.get(int(m), str(m)))
-            
-            # Впорядкуємо продукти за загальною к-стю
-            order_df = multi_df.groupby(prod_col_chart, as_index=False)['total_quantity'].sum().sort_values('total_quantity', ascending=False)
-            category_order = order_df[prod_col_chart].tolist()
-            
+        return multi_df
+
+    def _render_multi_month_quantity_chart(self, df_work: pd.DataFrame, sel_months_int: List[int]) -> None:
+        """Рендерить графік для кількох місяців"""
+        prod_col_chart = 'product_name_clean' if 'product_name_clean' in df_work.columns else 'product_name'
+        multi_df = self.quantity_by_product_months(df_work, sel_months_int)
+        
+        if not multi_df.empty:
+            def _build():
+                # Топ-K продуктів + «Інші»: розмір графіка не росте з каталогом
+                bars_df = chart_data.product_month_bars(multi_df, prod_col_chart)
+                category_order = chart_data.category_order(bars_df, prod_col_chart)
+                fig = go.Figure()
+                for month_int, part in bars_df.groupby('month_int', sort=True):
+                    cols = chart_data.column_arrays(part, [prod_col_chart, 'total_quantity'])
+                    fig.add_trace(go.Bar(
+                        x=cols[prod_col_chart],
+                        y=cols['total_quantity'],
+                        name=part['Місяць'].iloc[0],
+                        text=cols['total_quantity'],
+                    ))
+                fig.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+                fig.update_layout(
+                    barmode='group',
+                    xaxis=dict(title='Продукт', categoryorder='array', categoryarray=category_order),
+                    yaxis=dict(title='К-сть'),
+                    legend_title_text='Місяць',
+                    xaxis_tickangle=-45,
+                    margin=dict(l=10, r=10, t=10, b=80),
+                    height=550,
+                )
+                return fig
+
             st.subheader("Кількість по продуктах (останні декади обраних місяців)")
-            fig_qty_grouped = px.bar(
-                multi_df,
-                x=prod_col_chart,
-                y='total_quantity',
-                color='Місяць',
-                barmode='group',
-                category_orders={prod_col_chart: category_order},
-                labels={prod_col_chart: 'Продукт', 'total_quantity': 'К-сть'},
-                text='total_quantity',
-            )
-            fig_qty_grouped.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-            fig_qty_grouped.update_layout(
-                xaxis_tickangle=-45,
-                margin=dict(l=10, r=10, t=10, b=80),
-                height=550,
-            )
-            st.plotly_chart(fig_qty_grouped, use_container_width=True)
+            figure_cache.render_plotly("qty_by_product_months", _build, multi_df, prod_col_chart)
         else:
             st.info("Немає даних для побудови діаграми за кілька місяців.")
     
@@ -88,73 +102,101 @@ class SalesChartsService:
                                           cur_month: Optional[int], cur_year: Optional[int]) -> None:
         """Рендерить графік для одного місяця"""
         prod_col_chart = 'product_name_clean' if 'product_name_clean' in df_latest_decade.columns else 'product_name'
+        qty_df = self.quantity_by_product(df_latest_decade)
         
-        # Drop first 3 symbols from names for chart labels
-        df_latest_decade = df_latest_decade.copy()
-        df_latest_decade[prod_col_chart] = df_latest_decade[prod_col_chart].astype(str).str[3:].str.strip()
-        
-        qty_chart_df = (
-            df_latest_decade.groupby(prod_col_chart, as_index=False)['quantity']
-            .sum()
-            .rename(columns={'quantity': 'total_quantity'})
-            .sort_values('total_quantity', ascending=False)
-        )
-        
-        if not qty_chart_df.empty:
+        if not qty_df.empty:
             title_text = "Кількість по продуктах (остання декада)"
             if last_decade is not None and cur_month is not None and cur_year is not None:
                 title_text += f" — декада {int(last_decade)}, {UKRAINIAN_MONTHS.get(int(cur_month), str(cur_month))} {cur_year}"
+
+            def _build():
+                qty_chart_df = chart_data.product_bars(qty_df, prod_col_chart)
+                cols = chart_data.column_arrays(qty_chart_df, [prod_col_chart, 'total_quantity'])
+                fig = go.Figure(go.Bar(x=cols[prod_col_chart], y=cols['total_quantity'], text=cols['total_quantity']))
+                fig.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+                fig.update_layout(
+                    xaxis=dict(title='Продукт'),
+                    yaxis=dict(title='К-сть'),
+                    xaxis_tickangle=-45,
+                    margin=dict(l=10, r=10, t=10, b=80),
+                    height=550,
+                )
+                return fig
             
             st.subheader(title_text)
-            fig_qty_overall = px.bar(
-                qty_chart_df,
-                x=prod_col_chart,
-                y='total_quantity',
-                labels={prod_col_chart: 'Продукт', 'total_quantity': 'К-сть'},
-                text='total_quantity',
-            )
-            fig_qty_overall.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-            fig_qty_overall.update_layout(
-                xaxis_tickangle=-45,
-                margin=dict(l=10, r=10, t=10, b=80),
-                height=550,
-            )
-            st.plotly_chart(fig_qty_overall, use_container_width=True)
+            figure_cache.render_plotly("qty_by_product", _build, qty_df, prod_col_chart)
         else:
             st.info("Немає даних для побудови діаграми (остання декада).")
     
+    @memoize_by_fingerprint
+    def quantity_by_product(self, df_latest_decade: pd.DataFrame) -> pd.DataFrame:
+        """К-сть по продуктах за зріз (підписи без перших 3 символів)"""
+        prod_col_chart = 'product_name_clean' if 'product_name_clean' in df_latest_decade.columns else 'product_name'
+        labels = df_latest_decade[prod_col_chart].astype(str).str[3:].str.strip()
+        return (
+            df_latest_decade.assign(**{prod_col_chart: labels})
+            .groupby(prod_col_chart, as_index=False)['quantity']
+            .sum()
+            .rename(columns={'quantity': 'total_quantity'})
+            .sort_values('total_quantity', ascending=False)
+        )
+
+    @memoize_by_fingerprint
+    def revenue_by_city(self, df_city_src: pd.DataFrame, top_n: int = 30) -> Optional[pd.DataFrame]:
+        """Виручка і к-сть по містах (топ-N за виручкою); None — колонки міста немає"""
+        if 'city' not in df_city_src.columns:
+            return None
+        src = df_city_src if 'revenue' in df_city_src.columns else df_city_src.assign(revenue=0.0)
+        return (
+            src.groupby('city', as_index=False)[['revenue','quantity']]
+            .sum()
+            .sort_values('revenue', ascending=False)
+            .head(top_n)
+        )
+
+    @memoize_by_fingerprint
+    def trend_by_decade(self, df_period_trend: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """Виручка і к-сть по (рік, місяць, декада); None — немає потрібних колонок"""
+        if not {'year','month_int','decade'}.issubset(df_period_trend.columns):
+            return None
+        src = df_period_trend if 'revenue' in df_period_trend.columns else df_period_trend.assign(revenue=0.0)
+        trend_df = (
+            src
+            .dropna(subset=['year','month_int','decade'])
+            .groupby(['year','month_int','decade'], as_index=False)[['revenue','quantity']].sum()
+        )
+        if not trend_df.empty:
+            trend_df['Місяць'] = trend_df['month_int'].astype(int).map(lambda m: UKRAINIAN_MONTHS.get(int(m), str(m)))
+        return trend_df
+
     def render_city_revenue_chart(self, df_city_src: pd.DataFrame) -> None:
         """Рендерить комбіновану діаграму виручки по містах"""
-        if 'revenue' not in df_city_src.columns:
-            df_city_src['revenue'] = 0.0
-        
-        city_col2 = 'city' if 'city' in df_city_src.columns else None
-        if city_col2:
-            by_city = (
-                df_city_src.groupby(city_col2, as_index=False)[['revenue','quantity']]
-                .sum()
-                .sort_values('revenue', ascending=False)
-                .head(30)
-            )
+        by_city = self.revenue_by_city(df_city_src)
+        city_col2 = 'city'
+        if by_city is not None:
             
             if not by_city.empty:
+                def _build():
+                    fig_combo = go.Figure()
+                    cols = chart_data.column_arrays(by_city, [city_col2, 'revenue', 'quantity'])
+                    
+                    # Бар по виручці
+                    fig_combo.add_trace(go.Bar(x=cols[city_col2], y=cols['revenue'], name='Сума'))
+                    
+                    # Лінія по кількості на вторинній осі
+                    fig_combo.add_trace(go.Scatter(x=cols[city_col2], y=cols['quantity'], name='К-сть', mode='lines+markers', yaxis='y2'))
+                    
+                    fig_combo.update_layout(
+                        yaxis=dict(title='Сума, грн'),
+                        yaxis2=dict(title='К-сть', overlaying='y', side='right'),
+                        xaxis=dict(tickangle=-45),
+                        margin=dict(l=10, r=10, t=10, b=80), height=550,
+                        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
+                    )
+                    return fig_combo
+
                 st.subheader("Виручка по містах (+ кількість)")
-                fig_combo = go.Figure()
-                
-                # Бар по виручці
-                fig_combo.add_trace(go.Bar(x=by_city[city_col2], y=by_city['revenue'], name='Сума'))
-                
-                # Лінія по кількості на вторинній осі
-                fig_combo.add_trace(go.Scatter(x=by_city[city_col2], y=by_city['quantity'], name='К-сть', mode='lines+markers', yaxis='y2'))
-                
-                fig_combo.update_layout(
-                    yaxis=dict(title='Сума, грн'),
-                    yaxis2=dict(title='К-сть', overlaying='y', side='right'),
-                    xaxis=dict(tickangle=-45),
-                    margin=dict(l=10, r=10, t=10, b=80), height=550,
-                    legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
-                )
-                st.plotly_chart(fig_combo, use_container_width=True)
+                figure_cache.render_plotly("revenue_by_city", _build, by_city)
             else:
                 st.info("Немає даних для міст.")
         else:
@@ -164,29 +206,26 @@ class SalesChartsService:
         """Рендерить трендовий графік по декадах"""
         st.subheader("Тренд по декадах у вибраному періоді")
         
-        if 'revenue' not in df_period_trend.columns:
-            df_period_trend = df_period_trend.copy()
-            df_period_trend['revenue'] = 0.0
-        
-        if {'year','month_int','decade','revenue'}.issubset(df_period_trend.columns):
-            trend_df = (
-                df_period_trend
-                .dropna(subset=['year','month_int','decade'])
-                .groupby(['year','month_int','decade'], as_index=False)[['revenue','quantity']].sum()
-            )
-            
+        trend_df = self.trend_by_decade(df_period_trend)
+        if trend_df is not None:
             if not trend_df.empty:
-                trend_df['Місяць'] = trend_df['month_int'].astype(int).map(lambda m: UKRAINIAN_MONTHS.get(int(m), str(m)))
-                fig_trend = px.line(
-                    trend_df.sort_values(['year','month_int','decade']),
-                    x='decade',
-                    y='revenue',
-                    color='Місяць',
-                    markers=True,
-                    labels={'decade':'Декада','revenue':'Сума'},
-                )
-                fig_trend.update_layout(margin=dict(l=10,r=10,t=10,b=10), height=550)
-                st.plotly_chart(fig_trend, use_container_width=True)
+                def _build():
+                    # До MAX_TREND_SERIES місяців — лінія на місяць, далі — помісячна лінія
+                    series_df = chart_data.trend_series(trend_df)
+                    fig_trend = go.Figure()
+                    if 'Серія' in series_df.columns:
+                        for label, part in series_df.groupby('Серія', sort=False):
+                            cols = chart_data.column_arrays(part, ['decade', 'revenue'])
+                            fig_trend.add_trace(go.Scatter(x=cols['decade'], y=cols['revenue'], name=label, mode='lines+markers'))
+                        fig_trend.update_layout(xaxis=dict(title='Декада'), legend_title_text='Місяць')
+                    else:
+                        cols = chart_data.column_arrays(series_df, ['Період', 'revenue'])
+                        fig_trend.add_trace(go.Scatter(x=cols['Період'], y=cols['revenue'], name='Сума', mode='lines+markers'))
+                        fig_trend.update_layout(xaxis=dict(title='Місяць', tickangle=-45))
+                    fig_trend.update_layout(yaxis=dict(title='Сума'), margin=dict(l=10,r=10,t=10,b=10), height=550)
+                    return fig_trend
+
+                figure_cache.render_plotly("trend_by_decade", _build, trend_df)
             else:
                 st.info("Недостатньо даних для побудови тренду по декадах.")
         else:
@@ -218,6 +257,14 @@ class SalesChartsService:
             st.info("Недостатньо числових даних для побудови BCG-матриці.")
             return
 
+        fig_bcg = figure_cache.plotly_figure("bcg_matrix", lambda: self._bcg_figure(bcg_data), bcg_data)
+        if fig_bcg is None:
+            st.info("Після очищення даних для BCG не залишилось рядків з валідними числами.")
+            return
+        st.plotly_chart(fig_bcg, use_container_width=True)
+
+    def _bcg_figure(self, bcg_data: pd.DataFrame) -> Optional[go.Figure]:
+        """Фігура BCG-матриці; None — після очищення не лишилось валідних рядків"""
         # Побудова графіка (безпечні hover-поля: включає лише існуючі стовпці)
         hover = {
             'Препарат': True,
@@ -232,16 +279,17 @@ class SalesChartsService:
         # Підготуємо окремий DataFrame для побудови — залишимо лише потрібні/hover колонки
         keep_cols = ['Препарат', 'qty_last', 'growth_%', 'qty_prev', 'Категорія']
         keep_cols += [c for c in hover.keys() if c not in keep_cols and c in bcg_data.columns]
-        df_plot = bcg_data.copy()[[c for c in keep_cols if c in bcg_data.columns]]
+        df_plot = bcg_data[[c for c in keep_cols if c in bcg_data.columns]].copy()
 
         # Приведемо типи: числові колонки — до numeric, інші — до простих скалярів (str)
         for num_c in ['qty_last', 'qty_prev', 'growth_%']:
             if num_c in df_plot.columns:
                 df_plot[num_c] = pd.to_numeric(df_plot[num_c], errors='coerce')
 
-        # Приводимо складні об'єкти (list/dict) до рядків, щоб Plotly не падав
+        # Текстові колонки (підписи) — рядками одним векторним кроком, щоб Plotly не падав на list/dict
         for c in df_plot.select_dtypes(include=['object']).columns:
-            df_plot[c] = df_plot[c].apply(lambda v: v if (v is None or pd.isna(v)) else (v if isinstance(v, (str, int, float)) else str(v)))
+            col = df_plot[c]
+            df_plot[c] = col.astype(str).where(col.notna(), None)
 
         # Заповнимо категорію дефолтним значенням, якщо відсутня
         if 'Категорія' in df_plot.columns:
@@ -254,8 +302,9 @@ class SalesChartsService:
             df_plot = df_plot.dropna(subset=['qty_last'])
 
         if df_plot.empty:
-            st.info("Після очищення даних для BCG не залишилось рядків з валідними числами.")
-            return
+            return None
+
+        import plotly.express as px  # лише для BCG; решта графіків — graph_objects
 
         fig_bcg = px.scatter(
             df_plot,
@@ -279,4 +328,4 @@ class SalesChartsService:
         )
         fig_bcg.update_traces(textposition='top center')
         fig_bcg.update_layout(margin=dict(l=10,r=10,t=10,b=10), height=550, legend_title_text='Статус')
-        st.plotly_chart(fig_bcg, use_container_width=True)
+        return fig_bcg
@@ -7,6 +7,8 @@ from typing import Optional, Dict, Any, List
 from app.io import loader_sales as data_loader
 from app.io.supabase_client import init_supabase_client
 from app.data import processing_sales as data_processing
+from app.services.price_catalog_service import get_price_catalog
+from app.utils.data_fingerprint import derive
 
 
 class SalesDataService:
@@ -31,10 +33,9 @@ class SalesDataService:
             months=months,
         )
     
-    @st.cache_data(show_spinner=False, ttl=1800)
-    def fetch_price_data(_self, region_id: int, months: List[int]) -> pd.DataFrame:
-        """Завантажує дані цін з кешуванням"""
-        return data_loader.fetch_price_data(region_id=region_id, months=months)
+    def fetch_price_data(self, region_id: int, months: List[int]) -> pd.DataFrame:
+        """Ціни для місяців — зріз з каталогу цін регіону (один запит на регіон)"""
+        return get_price_catalog().prices(region_id, months)
     
     @st.cache_data(show_spinner=False, ttl=1800)
     def fetch_regions(_self) -> List[Dict[str, Any]]:
@@ -103,10 +104,13 @@ class SalesDataService:
                 .str.strip()
             )
         
-        return df_work
+        return derive(df_work, "work", df_loaded)
     
     def add_revenue_data(self, df_work: pd.DataFrame, price_df: pd.DataFrame) -> pd.DataFrame:
         """Додає дані про доходи до DataFrame"""
+        return derive(self._merge_revenue(df_work, price_df), "revenue", df_work, price_df)
+
+    def _merge_revenue(self, df_work: pd.DataFrame, price_df: pd.DataFrame) -> pd.DataFrame:
         df_with_revenue = df_work.copy()
         if price_df is None or price_df.empty:
             df_with_revenue['revenue'] = 0.0
@@ -204,4 +208,4 @@ class SalesDataService:
                     (latest_per_month['year'] == cur_year) & (latest_per_month['month_int'] == cur_month)
                 ].copy()
         
-        return df_latest_decade, last_decade, cur_year, cur_month
+        return derive(df_latest_decade, "latest_decade", df_work), last_decade, cur_year, cur_month
@@ -0,0 +1,92 @@
+# app/ui/jobs_panel.py
+# Панель фонових задач: статус, прогрес, скасування, результат
+from __future__ import annotations
+
+import datetime
+from typing import List, Optional
+
+import streamlit as st
+
+from app.jobs import CANCELLED, DONE, FAILED, INTERRUPTED, QUEUED, RUNNING, get_job_runner
+
+_STATUS_LABELS = {
+    QUEUED: "⏳ У черзі",
+    RUNNING: "🔄 Виконується",
+    DONE: "✅ Готово",
+    FAILED: "❌ Помилка",
+    CANCELLED: "⛔ Скасовано",
+    INTERRUPTED: "⚠️ Перервано (перезапуск)",
+}
+
+REFRESH_INTERVAL_S = 2
+
+
+def current_job_owner() -> Optional[str]:
+    """Власник задач — email поточного користувача"""
+    user = st.session_state.get("auth_user") or {}
+    return user.get("email")
+
+
+def render_jobs_panel(kinds: Optional[List[str]] = None, title: str = "Фонові задачі", limit: int = 10) -> None:
+    """
+    Список задач поточного користувача. Без користувача нічого не показує.
+    Поки є активні задачі, панель оновлюється кожні REFRESH_INTERVAL_S,
+    інакше — лише разом зі сторінкою.
+    """
+    owner = current_job_owner()
+    if owner is None:
+        return
+    st.markdown(f"#### {title}")
+    jobs = get_job_runner().list(owner=owner, kinds=kinds, limit=limit)
+    if _has_active(jobs):
+        _live_jobs_fragment(owner, kinds, limit)
+    else:
+        _render_jobs(jobs)
+
+
+def _has_active(jobs: List[dict]) -> bool:
+    return any(job["status"] in (QUEUED, RUNNING) for job in jobs)
+
+
+def _render_jobs(jobs: List[dict]) -> None:
+    if not jobs:
+        st.caption("Задач ще немає.")
+        return
+
+    runner = get_job_runner()
+    for job in jobs:
+        status = job["status"]
+        created = datetime.datetime.fromtimestamp(job["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+        with st.container(border=True):
+            col_t, col_s, col_b = st.columns([5, 2, 1])
+            col_t.markdown(f"**{job['title']}**  \n<small>{created}</small>", unsafe_allow_html=True)
+            col_s.write(_STATUS_LABELS.get(status, status))
+            if status in (QUEUED, RUNNING):
+                if col_b.button("Скасувати", key=f"job_cancel_{job['id']}"):
+                    runner.cancel(job["id"])
+                st.progress(float(job["progress"] or 0.0), text=job.get("message") or None)
+            elif status == DONE and job.get("result") is not None:
+                result = job["result"]
+                if isinstance(result, dict) and result.get("summary"):
+                    st.success(result["summary"])
+                with st.expander("Результат"):
+                    st.json(result)
+            elif status == FAILED:
+                st.error((job.get("error") or "").splitlines()[0] if job.get("error") else "Невідома помилка")
+            elif job.get("message"):
+                st.caption(job["message"])
+
+
+# st.fragment(run_every=...) перерендерює лише панель, не всю сторінку
+if hasattr(st, "fragment"):
+    @st.fragment(run_every=REFRESH_INTERVAL_S)
+    def _live_jobs_fragment(owner: str, kinds: Optional[List[str]], limit: int) -> None:
+        jobs = get_job_runner().list(owner=owner, kinds=kinds, limit=limit)
+        _render_jobs(jobs)
+        if not _has_active(jobs):
+            # усе завершилось — повний rerun малює панель без таймера
+            st.rerun()
+else:  # pragma: no cover - старі версії Streamlit
+    def _live_jobs_fragment(owner: str, kinds: Optional[List[str]], limit: int) -> None:
+        _render_jobs(get_job_runner().list(owner=owner, kinds=kinds, limit=limit))
+        st.button("Оновити", key="jobs_panel_refresh")
@@ -0,0 +1,83 @@
+# app/ui/lazy_sections.py
+# Ліниві секції сторінок: рахуємо лише видимий блок, результати — у мемо сесії
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+import streamlit as st
+
+from app.utils.data_versions import get_data_version
+
+# Скільки обчислених блоків тримаємо в сесії (старші витісняються)
+SECTION_MEMO_MAX_ENTRIES = 48
+_MEMO_KEY = "_lazy_section_memo"
+
+
+def data_key(*parts: Hashable, tables: Sequence[str] = ()) -> tuple:
+    """
+    Ідентичність даних, з яких рахуються секції: параметри вибірки (фільтри)
+    плюс версії таблиць (після завантаження нових даних мемо стає неактуальним).
+    """
+    return tuple(parts) + tuple((t, get_data_version(t)) for t in tables)
+
+
+def section_memo(name: str, key: tuple, params: Hashable, fn: Callable[[], Any]) -> Any:
+    """
+    Результат fn() для (name, key, params) з мемо сесії.
+    key — data_key(...) поточної вибірки, params — параметри самого блоку
+    (локальні фільтри, метрика тощо). Має бути хешованим.
+    """
+    memo: OrderedDict = st.session_state.setdefault(_MEMO_KEY, OrderedDict())
+    memo_key = (name, key, params)
+    if memo_key in memo:
+        memo.move_to_end(memo_key)
+        return memo[memo_key]
+    value = fn()
+    memo[memo_key] = value
+    while len(memo) > SECTION_MEMO_MAX_ENTRIES:
+        memo.popitem(last=False)
+    return value
+
+
+def clear_section_memo() -> None:
+    """Скидає мемо секцій сесії (вихід користувача)"""
+    st.session_state.pop(_MEMO_KEY, None)
+
+
+def lazy_tabs(labels: List[str], key: str, default: Optional[str] = None) -> str:
+    """
+    Замінник st.tabs: st.tabs рендерить (і рахує) вміст усіх вкладок,
+    а тут повертається лише обрана — код інших вкладок не виконується.
+    """
+    default = default if default in labels else labels[0]
+    if hasattr(st, "segmented_control"):
+        selected = st.segmented_control(
+            "Розділ", labels, default=default, key=key, label_visibility="collapsed"
+        )
+    else:  # pragma: no cover - старі версії Streamlit
+        selected = st.radio(
+            "Розділ", labels, index=labels.index(default), key=key,
+            horizontal=True, label_visibility="collapsed",
+        )
+    # segmented_control дозволяє «зняти» вибір — тоді показуємо типову вкладку
+    return selected or default
+
+
+def render_lazy_tabs(sections: Dict[str, Callable[[], None]], key: str, default: Optional[str] = None) -> str:
+    """Показує перемикач і викликає render лише для обраної секції"""
+    selected = lazy_tabs(list(sections), key=key, default=default)
+    sections[selected]()
+    return selected
+
+
+def lazy_expander(label: str, render: Callable[[], None], key: str, expanded: bool = False) -> bool:
+    """
+    Замінник st.expander для важких блоків: вміст рахується лише коли
+    перемикач увімкнено (стан st.expander серверу невідомий).
+    """
+    opened = st.toggle(label, value=expanded, key=key)
+    if opened:
+        with st.container(border=True):
+            render()
+    return opened
@@ -0,0 +1,202 @@
+# app/utils/data_fingerprint.py
+# Відбитки версій вибірок даних і мемоізація методів сервісів за ними
+from __future__ import annotations
+
+import functools
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from app.utils.data_versions import get_data_version
+
+# Мітка часу завантаження вибірки з БД (df.attrs; переживає pickle у st.cache_data)
+FETCHED_AT_ATTR = "fetched_at"
+SERVICE_MEMO_MAX_ENTRIES = 256
+
+# id(df) -> (weakref(df), fingerprint).
+# Відбиток прив'язаний саме до об'єкта: pandas копіює df.attrs у похідні
+# фрейми (фільтри, copy), тож зберігати відбиток в attrs було б небезпечно —
+# відфільтрований зріз отримав би відбиток повної вибірки.
+_fingerprints: Dict[int, Tuple[weakref.ref, str]] = {}
+_fp_lock = threading.Lock()
+
+
+def _digest(parts: tuple) -> str:
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _register(df: pd.DataFrame, fingerprint: str) -> None:
+    key = id(df)
+
+    def _forget(_ref, key=key):
+        with _fp_lock:
+            entry = _fingerprints.get(key)
+            if entry is not None and entry[0] is _ref:
+                del _fingerprints[key]
+
+    with _fp_lock:
+        _fingerprints[key] = (weakref.ref(df, _forget), fingerprint)
+
+
+def stamp(df: pd.DataFrame, *key_parts: Hashable, tables: Tuple[str, ...] = ()) -> pd.DataFrame:
+    """
+    Ставить відбиток завантаженій вибірці: ключ фільтрів + watermark
+    завантаження (df.attrs["fetched_at"]) + версії таблиць. Повертає той самий df.
+    """
+    if isinstance(df, pd.DataFrame):
+        watermark = df.attrs.get(FETCHED_AT_ATTR)
+        versions = tuple((t, get_data_version(t)) for t in tables)
+        _register(df, _digest(("slice", key_parts, watermark, versions)))
+    return df
+
+
+def derive(df: pd.DataFrame, op: str, *sources: Any) -> pd.DataFrame:
+    """
+    Відбиток похідного фрейму: op + відбитки фреймів-джерел + інші параметри.
+    Якщо хоч одне джерело без відбитка — df лишається без нього (без мемо).
+    """
+    if not isinstance(df, pd.DataFrame):
+        return df
+    parts = []
+    for src in sources:
+        if isinstance(src, pd.DataFrame):
+            fp = fingerprint_of(src)
+            if fp is None:
+                return df
+            parts.append(fp)
+        else:
+            parts.append(src)
+    _register(df, _digest(("derived", op, tuple(parts))))
+    return df
+
+
+def fingerprint_of(df: Any) -> Optional[str]:
+    """Відбиток саме цього об'єкта (None — не проставлений)"""
+    if not isinstance(df, pd.DataFrame):
+        return None
+    if df.empty:
+        # порожній фрейм повністю описується своїми колонками
+        return _digest(("empty", tuple(map(str, df.columns))))
+    with _fp_lock:
+        entry = _fingerprints.get(id(df))
+    if entry is None or entry[0]() is not df:
+        return None
+    return entry[1]
+
+
+def mark_fetched(df: pd.DataFrame, fetched_at: float) -> pd.DataFrame:
+    """Записує watermark завантаження у df.attrs (викликається лоадерами)"""
+    if isinstance(df, pd.DataFrame):
+        df.attrs[FETCHED_AT_ATTR] = fetched_at
+    return df
+
+
+class MemoStore:
+    """Потокобезпечний LRU з лічильниками влучань/промахів"""
+
+    def __init__(self, max_entries: int):
+        self._max = max_entries
+        self._data: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, self._data[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: tuple, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            while len(self._data) > self._max:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+@st.cache_resource(show_spinner=False)
+def _memo_store() -> MemoStore:
+    """Спільне для процесу сховище (відбиток уже містить ключ фільтрів)"""
+    return MemoStore(SERVICE_MEMO_MAX_ENTRIES)
+
+
+def _freeze(value: Any) -> Tuple[bool, Any]:
+    """(ok, хешоване представлення аргументу)"""
+    if isinstance(value, pd.DataFrame):
+        fp = fingerprint_of(value)
+        return (fp is not None), ("df", fp)
+    if isinstance(value, (list, tuple)):
+        items = [_freeze(v) for v in value]
+        return all(ok for ok, _ in items), tuple(v for _, v in items)
+    if isinstance(value, (set, frozenset)):
+        return _freeze(sorted(value, key=repr))
+    if isinstance(value, dict):
+        ok, items = _freeze(sorted(value.items(), key=lambda kv: repr(kv[0])))
+        return ok, ("dict", items)
+    try:
+        hash(value)
+    except TypeError:
+        return False, None
+    return True, value
+
+
+def memo_key(*parts: Any) -> Optional[tuple]:
+    """
+    Хешований ключ з частин (фрейми — за відбитком); None — якщо якийсь
+    фрейм без відбитка або частина нехешована (кешувати не можна).
+    """
+    ok, frozen = _freeze(parts)
+    return frozen if ok else None
+
+
+def _copy_result(value: Any) -> Any:
+    """Кешований результат не можна віддавати на мутацію викликачу"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy_result(v) for v in value)
+    if isinstance(value, list):
+        return [_copy_result(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _copy_result(v) for k, v in value.items()}
+    return value
+
+
+def memoize_by_fingerprint(fn: Callable) -> Callable:
+    """
+    Декоратор методів сервісів: результат кешується на (метод, відбитки
+    фреймів-аргументів, решта аргументів) — без хешування самих даних.
+    Якщо якийсь фрейм без відбитка або аргумент нехешований — звичайний виклик.
+    """
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        ok, frozen = _freeze((args, kwargs))
+        if not ok:
+            return fn(self, *args, **kwargs)
+        key = (name, frozen)
+        store = _memo_store()
+        hit, value = store.get(key)
+        if not hit:
+            value = fn(self, *args, **kwargs)
+            store.put(key, value)
+        result = _copy_result(value)
+        # результат від фреймів з відбитками сам отримує відбиток (для кешу графіків)
+        if isinstance(result, pd.DataFrame):
+            _register(result, _digest(("memo", key)))
+        return result
+
+    return wrapper
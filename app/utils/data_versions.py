@@ -0,0 +1,40 @@
+# app/utils/data_versions.py
+# Лічильники версій даних по таблицях: змінюються після кожного запису в базу
+from __future__ import annotations
+
+import threading
+from typing import Dict
+
+import streamlit as st
+
+
+class _VersionRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            return self._versions.get(name, 0)
+
+    def bump(self, name: str) -> int:
+        with self._lock:
+            version = self._versions.get(name, 0) + 1
+            self._versions[name] = version
+            return version
+
+
+@st.cache_resource(show_spinner=False)
+def _registry() -> _VersionRegistry:
+    """Спільний для процесу реєстр версій"""
+    return _VersionRegistry()
+
+
+def get_data_version(name: str) -> int:
+    """Поточна версія даних таблиці (0 — змін з моменту старту процесу не було)"""
+    return _registry().get(name)
+
+
+def bump_data_version(name: str) -> int:
+    """Позначає, що дані таблиці змінилися; повертає нову версію"""
+    return _registry().bump(name)
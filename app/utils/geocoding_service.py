@@ -6,21 +6,25 @@ import streamlit as st
 import pandas as pd
 from typing import Optional, Dict, Any
 
-# Optional online geocoding (wrapped in try/except)
-try:
-    from geopy.geocoders import Nominatim
-    from geopy.extra.rate_limiter import RateLimiter
-except Exception:  # geopy is optional
-    Nominatim = None
-    RateLimiter = None
+def _load_geopy():
+    """
+    Optional online geocoding: geopy імпортується лише під час геокодування.
+    Повертає (Nominatim, RateLimiter) або (None, None).
+    """
+    try:
+        from geopy.geocoders import Nominatim
+        from geopy.extra.rate_limiter import RateLimiter
+    except Exception:  # geopy is optional
+        return None, None
+    return Nominatim, RateLimiter
 
 
 class GeocodingService:
     """Сервіс для геокодування адрес"""
     
     def __init__(self):
-        self.nominatim = Nominatim
-        self.rate_limiter = RateLimiter
+        self.nominatim = None
+        self.rate_limiter = None
     
     @st.cache_data(show_spinner=False, ttl=3600)
     def load_coords_catalog(self, path: str) -> pd.DataFrame:
@@ -77,6 +81,8 @@ class GeocodingService:
     
     def online_geocode_missing(self, df_addr: pd.DataFrame, user_agent: str = 'sales-analytics-app') -> pd.DataFrame:
         """Геокодує відсутні координати через Nominatim"""
+        if self.nominatim is None or self.rate_limiter is None:
+            self.nominatim, self.rate_limiter = _load_geopy()
         if self.nominatim is None or self.rate_limiter is None:
             st.info("Бібліотека geopy не встановлена — онлайн-геокодування вимкнено.")
             return df_addr
@@ -0,0 +1,132 @@
+# app/utils/import_audit.py
+# Аудит часу імпорту модулів (холодний старт сторінок)
+#
+#   python -m app.utils.import_audit                      # модулі першого рендеру
+#   python -m app.utils.import_audit app.views.sales_page --top 30
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+# Точка входу (перший рендер — форма логіну) і головна сторінка після входу
+FIRST_PAINT_MODULES = [
+    "app.home",
+    "app.dashboard.user_dashboard",
+]
+# Важкі залежності, які мають вантажитись лише на сторінках, що їх використовують
+HEAVY_MODULES = ["plotly", "pydeck", "geopy", "openpyxl", "workalendar", "matplotlib", "altair", "supabase"]
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportReport:
+    target: str
+    records: List[ImportRecord]
+    error: Optional[str] = None
+
+    @property
+    def total_us(self) -> int:
+        """Кумулятивний час target разом з батьківськими пакетами"""
+        parts = self.target.split(".")
+        names = {".".join(parts[:i]) for i in range(1, len(parts) + 1)}
+        return sum(r.cumulative_us for r in self.records if r.depth == 0 and r.module in names)
+
+    def heavy(self, heavy: Sequence[str] = HEAVY_MODULES) -> Dict[str, int]:
+        """Які важкі пакети потрапили в імпорт і скільки коштували (кумулятивно, мкс)"""
+        found: Dict[str, int] = {}
+        # вивід importtime — post-order (діти перед батьком): ідемо з кінця,
+        # тримаючи стек предків за глибиною, і рахуємо лише найвищі записи пакета
+        stack: List[str] = []
+        for r in reversed(self.records):
+            del stack[r.depth:]
+            root = r.module.split(".", 1)[0]
+            parent_root = stack[-1].split(".", 1)[0] if stack else None
+            if root in heavy and parent_root != root:
+                found[root] = found.get(root, 0) + r.cumulative_us
+            stack.append(r.module)
+        return found
+
+    def top(self, n: int = 20, prefix: Optional[str] = None) -> List[ImportRecord]:
+        rows = [r for r in self.records if prefix is None or r.module.startswith(prefix)]
+        return sorted(rows, key=lambda r: r.cumulative_us, reverse=True)[:n]
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    """Розбирає вивід `python -X importtime` (рядки 'import time: self | cumulative | name')"""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_s, cum_s, name = parts
+        if not self_s.strip().isdigit():
+            continue  # заголовок таблиці
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        records.append(ImportRecord(name.strip(), int(self_s), int(cum_s), max(depth, 0)))
+    return records
+
+
+def audit_module(target: str, python: str = sys.executable) -> ImportReport:
+    """Імпортує target у чистому процесі з -X importtime"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [PROJECT_ROOT, env.get("PYTHONPATH")] if p)
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, cwd=PROJECT_ROOT, env=env,
+    )
+    error = None
+    if proc.returncode != 0:
+        tail = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        error = tail[-1] if tail else f"exit code {proc.returncode}"
+    return ImportReport(target, parse_importtime(proc.stderr), error)
+
+
+def format_report(report: ImportReport, top_n: int = 20) -> str:
+    if report.error:
+        # час неповного імпорту нічого не означає — показуємо лише помилку
+        return f"== {report.target}: імпорт не вдався\n   ! {report.error}"
+    lines = [f"== {report.target}: {report.total_us / 1000:.1f} ms"]
+    heavy = report.heavy()
+    if heavy:
+        lines.append("   важкі залежності: " + ", ".join(
+            f"{name} {us / 1000:.1f} ms" for name, us in sorted(heavy.items(), key=lambda kv: -kv[1])
+        ))
+    lines.append(f"   {'cumulative':>12} {'self':>10}  module")
+    for r in report.top(top_n):
+        lines.append(f"   {r.cumulative_us / 1000:>9.1f} ms {r.self_us / 1000:>7.1f} ms  {'  ' * r.depth}{r.module}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Час імпорту модулів застосунку")
+    parser.add_argument("modules", nargs="*", default=FIRST_PAINT_MODULES)
+    parser.add_argument("--top", type=int, default=20, help="скільки найдорожчих модулів показати")
+    parser.add_argument("--fail-on-heavy", action="store_true",
+                        help="код виходу 1, якщо модулі тягнуть важкі залежності або не імпортуються")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for target in args.modules:
+        report = audit_module(target)
+        print(format_report(report, args.top))
+        failed = failed or bool(report.error) or bool(report.heavy())
+    return 1 if (args.fail_on_heavy and failed) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+# app/utils/partition_cache.py
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class PartitionCache:
+    """
+    Потокобезпечний кеш «партицій» (наприклад, день × МП) з TTL.
+
+    На відміну від st.cache_data, ключем є окрема партиція, а не весь запит,
+    тож будь-який діапазон складається з уже завантажених шматків,
+    а з бази тягнуться лише відсутні.
+    """
+
+    def __init__(self, ttl: float, ttl_for: Optional[Callable[[Hashable], float]] = None):
+        self._ttl = ttl
+        self._ttl_for = ttl_for
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Повертає значення партиції або None, якщо її немає чи TTL минув"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Tuple[Dict[Hashable, Any], List[Hashable]]:
+        """Повертає (знайдені партиції, список відсутніх ключів)"""
+        found: Dict[Hashable, Any] = {}
+        missing: List[Hashable] = []
+        for key in keys:
+            value = self.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        return found, missing
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Зберігає партицію"""
+        ttl = self._ttl_for(key) if self._ttl_for else self._ttl
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def put_many(self, items: Dict[Hashable, Any]) -> None:
+        """Зберігає кілька партицій і прибирає прострочені (щоб старі дні не накопичувались)"""
+        for key, value in items.items():
+            self.put(key, value)
+        now = time.monotonic()
+        with self._lock:
+            for k in [k for k, (expires_at, _) in self._data.items() if expires_at < now]:
+                del self._data[k]
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Видаляє всі партиції (або лише ті, для яких predicate(key) істинний)"""
+        with self._lock:
+            if predicate is None:
+                n = len(self._data)
+                self._data.clear()
+                return n
+            doomed = [k for k in self._data if predicate(k)]
+            for k in doomed:
+                del self._data[k]
+            return len(doomed)
@@ -0,0 +1,69 @@
+# app/utils/table_styling.py
+# Векторизоване оформлення таблиць для st.dataframe (Styler.apply з axis=None)
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+# Кольори статусів залишків
+STOCK_ZERO_CSS = "background-color: #f8d7da; color: #721c24"
+STOCK_DOWN_CSS = "background-color: #d4edda; color: #155724"
+STOCK_UP_CSS = "background-color: #cce5ff; color: #004085"
+STOCK_SAME_CSS = "background-color: #fff3cd; color: #856404"
+
+POSITIVE_CSS = "background-color: #4B6F44"
+
+DEFAULT_PAGE_SIZE = 500
+
+
+def stock_row_styles(
+    df: pd.DataFrame,
+    qty_col: str = "Поточний залишок",
+    diff_col: str = "Різниця",
+) -> pd.DataFrame:
+    """
+    CSS для таблиці залишків однією матрицею (для `df.style.apply(stock_row_styles, axis=None)`).
+
+    Нульовий залишок — весь рядок червоний; інакше колонка різниці
+    зелена (витрата), синя (поповнення) або жовта (без змін).
+    """
+    n_rows, n_cols = df.shape
+    css = np.full((n_rows, n_cols), "", dtype=object)
+
+    if diff_col in df.columns:
+        diff = pd.to_numeric(df[diff_col], errors="coerce").to_numpy(dtype=np.float64)
+        j = df.columns.get_loc(diff_col)
+        css[:, j] = np.select(
+            [diff < 0, diff > 0, diff == 0],
+            [STOCK_DOWN_CSS, STOCK_UP_CSS, STOCK_SAME_CSS],
+            default="",
+        )
+
+    if qty_col in df.columns:
+        qty = pd.to_numeric(df[qty_col], errors="coerce").to_numpy(dtype=np.float64)
+        css[qty == 0, :] = STOCK_ZERO_CSS
+
+    return pd.DataFrame(css, index=df.index, columns=df.columns)
+
+
+def positive_cell_styles(df: pd.DataFrame, css: str = POSITIVE_CSS) -> pd.DataFrame:
+    """CSS-матриця, що підсвічує додатні числові клітинки (заміна applymap)"""
+    values = df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    out = np.where(values > 0, css, "")
+    return pd.DataFrame(out, index=df.index, columns=df.columns)
+
+
+def style_positive(df: pd.DataFrame, fmt: str = "{:.0f}"):
+    """Styler зведеної таблиці з підсвіткою додатних значень"""
+    return df.style.apply(positive_cell_styles, axis=None).format(fmt)
+
+
+def page_count(n_rows: int, page_size: int = DEFAULT_PAGE_SIZE) -> int:
+    """Кількість сторінок (мінімум одна)"""
+    return max(1, -(-int(n_rows) // int(page_size)))
+
+
+def page_slice(df: pd.DataFrame, page: int, page_size: int = DEFAULT_PAGE_SIZE) -> pd.DataFrame:
+    """Рядки сторінки `page` (нумерація з 1)"""
+    start = (max(1, int(page)) - 1) * int(page_size)
+    return df.iloc[start:start + int(page_size)]
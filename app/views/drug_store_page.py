@@ -4,6 +4,7 @@ from __future__ import annotations
 import os, sys
 import streamlit as st
 import pandas as pd
+import numpy as np
 
 # --- Auth guard: require login before viewing this page ---
 
@@ -19,18 +20,12 @@ def _auto_fill_user_filters_drug_store(ss: dict, user: dict) -> None:
     if not user or not user.get('id'):
         return
     
-    # Отримуємо повний профіль користувача
-    client = init_supabase_client()
-    if not client:
-        return
-    
     try:
-        result = client.table("profiles").select("*").eq("id", user['id']).execute()
-        if not result.data:
+        # Повний профіль з кешу сесії (спільний з головною сторінкою)
+        profile = get_profile_service().get(user)
+        if not profile:
             return
         
-        profile = result.data[0]
-        
         # Заповнюємо фільтри з профілю
         if profile.get('region'):
             ss['sales_region'] = profile['region']
@@ -64,10 +59,17 @@ if PROJECT_ROOT not in sys.path:
 # Internal modules
 from app.io import loader_sales as data_loader
 from app.io.supabase_client import init_supabase_client
+from app.services.price_catalog_service import get_price_catalog
+from app.services.profile_service import get_profile_service
 # Видаляємо імпорт навігації, оскільки вона вже є в основному файлі
 from app.utils import UKRAINIAN_MONTHS
 import datetime
 from app.io import loader_stock
+from app.data.stock_engine import StockEngine
+from app.data import stock_analytics
+from app.utils import table_styling
+from app.data import address_facts
+from app.ui.lazy_sections import data_key, render_lazy_tabs, section_memo
 
 @st.cache_data(show_spinner=False, ttl=1800)
 def _cached_fetch_sales(region_name, territory, line, months):
@@ -78,11 +80,6 @@ def _cached_fetch_sales(region_name, territory, line, months):
         months=months,
     )
 
-# Cached price fetcher (analogous to Sales page)
-@st.cache_data(show_spinner=False, ttl=1800)
-def _cached_fetch_price(region_id: int, months: list[int]):
-    return data_loader.fetch_price_data(region_id=region_id, months=months)
-
 # --- URL state sync & normalization (same as Sales) ---
 _DEF_ALL = "(усі)"
 
@@ -188,9 +185,7 @@ def _make_sales_key(region_name, territory, line, months):
 def _get_session_cache():
     if "_sales_session_cache" not in st.session_state:
         st.session_state["_sales_session_cache"] = {}
-    if "_price_session_cache" not in st.session_state:
-        st.session_state["_price_session_cache"] = {}
-    return st.session_state["_sales_session_cache"], st.session_state["_price_session_cache"]
+    return st.session_state["_sales_session_cache"]
 
 @st.cache_data(show_spinner=False, ttl=1800)
 def _fetch_regions(_client):
@@ -222,37 +217,92 @@ def _fetch_territories(_client, region_id: int | None):
         return []
 
 
-def _compute_stock_diff(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty:
-        return df
-    df = df.sort_values(["pharmacy_id", "drug_name", "visit_date"]).copy()
-    df["prev_quantity"] = (
-        df.groupby(["pharmacy_id", "drug_name"])["quantity"].shift(1)
+def _get_stock_engine(mp_ids_tuple) -> StockEngine:
+    """Рушій залишків на сесію, окремий для кожного набору МП."""
+    engines = st.session_state.setdefault("stock_engines", {})
+    engine = engines.get(mp_ids_tuple)
+    if engine is None:
+        # тримаємо лише кілька останніх наборів МП, щоб не роздувати сесію
+        while len(engines) >= 3:
+            engines.pop(next(iter(engines)))
+        engine = StockEngine()
+        engines[mp_ids_tuple] = engine
+    return engine
+
+
+def _build_stock_display(latest_df: pd.DataFrame) -> pd.DataFrame:
+    display_df = pd.DataFrame({
+        "Аптека": latest_df["pharmacy_name"] + " (" + latest_df["pharmacy_city"] + ")",
+        "Препарат": latest_df["drug_name"],
+        "МП": latest_df["mp_full_name"],
+        "Дата візиту": latest_df["visit_date"].dt.strftime("%Y-%m-%d"),
+        "Поточний залишок": latest_df["quantity"],
+        "Попередній залишок": latest_df["prev_quantity"],
+        "Різниця": latest_df["diff"],
+    })
+    return display_df.reset_index(drop=True)
+
+
+def _style_stock_page(page_df: pd.DataFrame):
+    return (
+        page_df.style
+        .apply(table_styling.stock_row_styles, axis=None)
+        .format(
+            na_rep="—",
+            formatter={
+                "Поточний залишок": "{:.0f}",
+                "Попередній залишок": "{:.0f}",
+                "Різниця": "{:+.0f}",
+            },
+        )
     )
-    df["diff"] = df["quantity"] - df["prev_quantity"]
-    df["is_latest"] = ~df.duplicated(subset=["pharmacy_id", "drug_name"], keep="last")
-    return df
 
 
-def _style_stock_row(row: pd.Series) -> list[str]:
-    n_cols = len(row)
-    styles = [""] * n_cols
-    qty = row.get("Поточний залишок", None)
-    diff = row.get("Різниця", None)
+def _format_days_left(value: float) -> str:
+    """Днів до нуля: inf (витрати немає) — «∞»"""
+    return "∞" if value == float("inf") else f"{value:.0f}"
 
-    if pd.notna(qty) and qty == 0:
-        return ["background-color: #f8d7da; color: #721c24"] * n_cols
 
-    if "Різниця" in row.index:
-        diff_idx = row.index.get_loc("Різниця")
-        if pd.notna(diff):
-            if diff < 0:
-                styles[diff_idx] = "background-color: #d4edda; color: #155724"
-            elif diff > 0:
-                styles[diff_idx] = "background-color: #cce5ff; color: #004085"
-            else:
-                styles[diff_idx] = "background-color: #fff3cd; color: #856404"
-    return styles
+def _render_stock_depletion(engine: StockEngine, date_from, date_to) -> None:
+    st.markdown("#### Прогноз вичерпання залишків")
+    horizon = st.slider("Горизонт ризику, днів", 3, 60, 14, key="stock_risk_horizon")
+    analytics = stock_analytics.compute_stock_analytics(engine, date_from, date_to, horizon)
+    if analytics.empty:
+        st.info("Недостатньо візитів для розрахунку витрати.")
+        return
+
+    status = analytics["status"]
+    col_a1, col_a2, col_a3 = st.columns(3)
+    col_a1.metric("Немає в наявності", int((status == stock_analytics.STATUS_OUT).sum()))
+    col_a2.metric(f"Ризик вичерпання (≤ {horizon} дн.)", int((status == stock_analytics.STATUS_RISK).sum()))
+    col_a3.metric("Візитів з нульовим залишком", int(analytics["stockout_visits"].sum()))
+
+    only_risk = st.checkbox("Показати лише ризикові позиції", value=True, key="stock_only_risk")
+    view = analytics
+    if only_risk:
+        view = analytics[status.isin([stock_analytics.STATUS_OUT, stock_analytics.STATUS_RISK])]
+    view = view.sort_values(["days_to_stockout", "depletion_per_day"], ascending=[True, False])
+
+    table = pd.DataFrame({
+        "Аптека": view["pharmacy_name"] + " (" + view["pharmacy_city"] + ")",
+        "Препарат": view["drug_name"],
+        "Останній візит": view["last_visit"].dt.strftime("%Y-%m-%d"),
+        "Залишок": view["quantity"],
+        "Витрата/день": view["depletion_per_day"],
+        "Днів до нуля": view["days_to_stockout"],
+        "Прогнозна дата": view["stockout_date"].dt.strftime("%Y-%m-%d"),
+        "Поповнень": view["restocks"],
+        "Статус": view["status"],
+    })
+    st.dataframe(
+        table.style.format(
+            na_rep="—",
+            formatter={"Залишок": "{:.0f}", "Витрата/день": "{:.2f}", "Днів до нуля": _format_days_left},
+        ),
+        use_container_width=True,
+        hide_index=True,
+        height=400,
+    )
 
 
 def _render_stock_tab(client) -> None:
@@ -306,12 +356,20 @@ def _render_stock_tab(client) -> None:
 
         if raw_df.empty:
             st.warning("Дані не знайдені для обраних фільтрів.")
+            ss["stock_view"] = None
             ss["stock_df_processed"] = pd.DataFrame()
             return
 
-        ss["stock_df_processed"] = _compute_stock_diff(raw_df)
+        engine = _get_stock_engine(mp_ids_tuple)
+        engine.ingest(raw_df)
+        ss["stock_view"] = (mp_ids_tuple, date_from, date_to)
 
     processed = ss.get("stock_df_processed")
+    view = ss.get("stock_view")
+    if view is not None:
+        mp_ids_tuple, view_from, view_to = view
+        engine = _get_stock_engine(mp_ids_tuple)
+        processed = engine.history(view_from, view_to)
 
     if processed is None:
         st.info("Оберіть фільтри та натисніть «Завантажити».")
@@ -320,56 +378,38 @@ def _render_stock_tab(client) -> None:
     if isinstance(processed, pd.DataFrame) and processed.empty:
         return
 
-    latest_df = processed[processed["is_latest"]].copy()
+    latest_df = engine.latest(view_from, view_to)
 
     col_m1, col_m2, col_m3 = st.columns(3)
     col_m1.metric("Унікальних аптек", int(latest_df["pharmacy_id"].nunique()))
     col_m2.metric("Унікальних візитів", int(processed["visit_session_id"].nunique()))
     col_m3.metric("Унікальних МП", int(processed["mp_id"].nunique()))
 
-    display_df = latest_df[[
-        "pharmacy_id", "pharmacy_name", "pharmacy_city", "drug_name",
-        "mp_full_name", "visit_date", "quantity", "prev_quantity", "diff"
-    ]].copy()
-
-    display_df["Аптека"] = display_df["pharmacy_name"] + " (" + display_df["pharmacy_city"] + ")"
-    display_df["Дата візиту"] = display_df["visit_date"].dt.strftime("%Y-%m-%d")
-    display_df = display_df.rename(columns={
-        "drug_name": "Препарат",
-        "mp_full_name": "МП",
-        "quantity": "Поточний залишок",
-        "prev_quantity": "Попередній залишок",
-        "diff": "Різниця",
-    })
-    display_df = display_df[[
-        "Аптека", "Препарат", "МП", "Дата візиту",
-        "Поточний залишок", "Попередній залишок", "Різниця"
-    ]]
-
-    styled = (
-        display_df.style
-        .apply(_style_stock_row, axis=1)
-        .format(
-            na_rep="—",
-            formatter={
-                "Поточний залишок": "{:.0f}",
-                "Попередній залишок": "{:.0f}",
-                "Різниця": "{:+.0f}",
-            },
-        )
+    window = (str(view_from), str(view_to))
+    display_df = engine.memoize("stock_display", window, lambda: _build_stock_display(latest_df))
+
+    n_pages = table_styling.page_count(len(display_df))
+    page = 1
+    if n_pages > 1:
+        col_p1, col_p2 = st.columns([1, 5])
+        page = col_p1.number_input("Сторінка", min_value=1, max_value=n_pages, value=1, step=1, key="stock_page")
+        col_p2.caption(f"Рядків: {len(display_df):,} · сторінок: {n_pages}")
+
+    styled = engine.memoize(
+        "stock_styled", (window, int(page)),
+        lambda: _style_stock_page(table_styling.page_slice(display_df, page)),
     )
     st.dataframe(styled, use_container_width=True, hide_index=True, height=500)
 
+    st.markdown("---")
+    _render_stock_depletion(engine, view_from, view_to)
+
     st.markdown("---")
     st.markdown("#### Детальна історія по аптеці")
 
-    ph_map = (
-        latest_df.drop_duplicates("pharmacy_id")
-        .set_index("pharmacy_id")
-        .apply(lambda r: f"{r['pharmacy_name']} ({r['pharmacy_city']})", axis=1)
-        .to_dict()
-    )
-    ph_options = sorted(ph_map.values())
+    ph_index = engine.pharmacy_index(view_from, view_to)
+    ph_map = ph_index["labels"]
+    ph_options = engine.memoize("stock_ph_options", window, lambda: sorted(ph_map.values()))
     ph_inv_map = {v: k for k, v in ph_map.items()}
 
     sel_ph_label = st.selectbox(
@@ -380,12 +420,15 @@ def _render_stock_tab(client) -> None:
 
     if sel_ph_label and sel_ph_label != "(не обрано)":
         sel_ph_id = ph_inv_map.get(sel_ph_label)
-        if sel_ph_id:
-            hist = processed[processed["pharmacy_id"] == sel_ph_id].sort_values(
-                ["drug_name", "visit_date"]
-            )
-            for drug, drug_hist in hist.groupby("drug_name"):
-                with st.expander(f"Препарат: {drug}"):
+        if sel_ph_id in ph_index["ranges"]:
+            start, stop = ph_index["ranges"][sel_ph_id]
+            # історія аптеки — суцільний зріз, уже відсортований за (препарат, дата)
+            hist = processed.iloc[start:stop]
+            drugs = hist["drug_name"].to_numpy()
+            bounds = np.flatnonzero(np.r_[True, drugs[1:] != drugs[:-1], True])
+            for d_start, d_stop in zip(bounds[:-1], bounds[1:]):
+                drug_hist = hist.iloc[d_start:d_stop]
+                with st.expander(f"Препарат: {drugs[d_start]}"):
                     h = drug_hist[[
                         "visit_date", "quantity", "prev_quantity", "diff", "mp_full_name"
                     ]].rename(columns={
@@ -399,6 +442,361 @@ def _render_stock_tab(client) -> None:
                     st.dataframe(h, use_container_width=True, hide_index=True)
 
 
+# ----------------- Секції вкладки «Аналіз продажів» -----------------
+# Кожна секція рахується лише коли її вкладку обрано (app.ui.lazy_sections),
+# результати обчислень мемоізуються на (вибірка + версії даних, параметри).
+
+# Скільки блоків «адреса + клієнт» показуємо на одній сторінці
+FACT_ADDR_BLOCKS_PER_PAGE = 25
+
+
+def _address_key(df: pd.DataFrame) -> pd.Series:
+    """Нормалізований адресний ключ 'місто|вулиця|будинок' (або повна адреса)"""
+    if {'city','street','house_number'}.issubset(df.columns):
+        return (
+            df['city'].fillna('').astype(str).str.strip().str.lower() + '|' +
+            df['street'].fillna('').astype(str).str.strip().str.lower() + '|' +
+            df['house_number'].fillna('').astype(str).str.strip().str.lower()
+        )
+    if 'full_address_processed' in df.columns:
+        return df['full_address_processed'].astype(str).fillna('').str.strip().str.lower()
+    if 'address' in df.columns:
+        return df['address'].astype(str).fillna('').str.strip().str.lower()
+    return pd.Series('', index=df.index)
+
+
+def _with_shares(df: pd.DataFrame, value_col: str) -> pd.DataFrame:
+    total = float(df[value_col].sum()) or 1.0
+    df['Частка, %'] = 100.0 * df[value_col] / total
+    df['Кумулятивна, %'] = df['Частка, %'].cumsum()
+    return df
+
+
+def _compute_network_points(df: pd.DataFrame) -> tuple[pd.DataFrame | None, str | None]:
+    """Кількість унікальних адрес (торгових точок) на мережу"""
+    if 'new_client' not in df.columns:
+        return None, "Колонка 'new_client' відсутня — неможливо порахувати мережі."
+    net_tmp = pd.DataFrame({
+        '__network__': df['new_client'].astype(str).fillna('').str.strip(),
+        '__addr_key__': _address_key(df),
+    })
+    if 'city' in df.columns:
+        net_tmp['city'] = df['city']
+    net_tmp = net_tmp[(net_tmp['__network__'] != '') & (net_tmp['__addr_key__'] != '')]
+    if net_tmp.empty:
+        return None, "Немає достатніх даних (мережа/адреса) для підрахунку торгових точок."
+    net_cnt = (
+        net_tmp[['__network__','__addr_key__']].drop_duplicates()
+        .groupby('__network__', as_index=False)['__addr_key__']
+        .nunique()
+        .rename(columns={'__network__':'Мережа','__addr_key__':'Точок'})
+        .sort_values('Точок', ascending=False)
+    )
+    net_cnt = _with_shares(net_cnt, 'Точок')
+    if 'city' in net_tmp.columns:
+        city_cnt = (
+            net_tmp[['__network__','city']].drop_duplicates()
+            .groupby('__network__', as_index=False)['city'].nunique()
+            .rename(columns={'__network__':'Мережа','city':'Міста(к-сть)'})
+        )
+        net_cnt = net_cnt.merge(city_cnt, on='Мережа', how='left')
+    return net_cnt, None
+
+
+def _compute_network_sum(df: pd.DataFrame, value_col: str, label: str) -> tuple[pd.DataFrame | None, str | None]:
+    """Сума value_col по мережах з частками"""
+    if 'new_client' not in df.columns:
+        return None, "Колонка 'new_client' відсутня — неможливо порахувати мережі."
+    if value_col not in df.columns:
+        return None, f"Колонка '{value_col}' відсутня."
+    tmp = pd.DataFrame({
+        '__network__': df['new_client'].astype(str).fillna('').str.strip(),
+        value_col: pd.to_numeric(df[value_col], errors='coerce').fillna(0),
+    })
+    tmp = tmp[tmp['__network__'] != '']
+    if tmp.empty:
+        return None, "Немає достатніх даних (мережа) для підрахунку."
+    net = (
+        tmp.groupby('__network__', as_index=False)[value_col]
+        .sum()
+        .rename(columns={'__network__':'Мережа', value_col: label})
+        .sort_values(label, ascending=False)
+    )
+    return _with_shares(net, label), None
+
+
+def _render_network_points(df_with_revenue: pd.DataFrame, key: tuple) -> None:
+    st.subheader("Мережі та кількість торгових точок")
+    net_cnt, msg = section_memo("network_points", key, None, lambda: _compute_network_points(df_with_revenue))
+    if net_cnt is None:
+        st.info(msg)
+        return
+    cols_net = ['Мережа','Точок','Частка, %','Кумулятивна, %'] + (['Міста(к-сть)'] if 'Міста(к-сть)' in net_cnt.columns else [])
+    st.dataframe(
+        net_cnt[cols_net]
+            .style
+            .format({'Точок':'{:,.0f}','Частка, %':'{:,.2f}','Кумулятивна, %':'{:,.2f}'})
+            .background_gradient(cmap='Blues', subset=['Точок']),
+        use_container_width=True,
+        hide_index=True,
+        height=600
+    )
+
+
+def _render_network_packs(df_with_revenue: pd.DataFrame, key: tuple) -> None:
+    st.subheader("Мережі та кількість упаковок")
+    net_qty, msg = section_memo(
+        "network_packs", key, None, lambda: _compute_network_sum(df_with_revenue, 'quantity', 'Упаковок')
+    )
+    if net_qty is None:
+        st.info(msg)
+        return
+    st.dataframe(
+        net_qty[['Мережа','Упаковок','Частка, %','Кумулятивна, %']]
+            .style
+            .format({'Упаковок':'{:,.0f}','Частка, %':'{:,.2f}','Кумулятивна, %':'{:,.2f}'})
+            .background_gradient(cmap='Blues', subset=['Упаковок'])
+            .background_gradient(cmap='Greens', subset=['Частка, %']),
+        use_container_width=True,
+        hide_index=True,
+        height=600
+    )
+
+
+def _render_network_sums(df_with_revenue: pd.DataFrame, key: tuple) -> None:
+    st.subheader("Сума по мережах (за обраний період)")
+    net_sum, msg = section_memo(
+        "network_sums", key, None, lambda: _compute_network_sum(df_with_revenue, 'revenue', 'Сума')
+    )
+    if net_sum is None:
+        st.info(msg)
+        return
+    st.dataframe(
+        net_sum[['Мережа','Сума','Частка, %','Кумулятивна, %']]
+            .style
+            .format({'Сума':'{:,.2f} грн','Частка, %':'{:,.2f}','Кумулятивна, %':'{:,.2f}'})
+            .background_gradient(cmap='Greens', subset=['Сума'])
+            .background_gradient(cmap='Blues', subset=['Частка, %']),
+        use_container_width=True,
+        hide_index=True,
+        height=600
+    )
+
+
+def _render_fact_by_address(df_work: pd.DataFrame, key: tuple) -> None:
+    st.subheader("Деталізація фактичних замовлень по унікальних адресах")
+    # Локальні фільтри (місто/вулиця) на основі df_work
+    local_src = df_work
+    city_col = 'city' if 'city' in local_src.columns else None
+    street_col = 'street' if 'street' in local_src.columns else None
+    col_c, col_s = st.columns(2)
+    sel_cities, sel_streets = [], []
+    if city_col:
+        city_opts = section_memo(
+            "fact_city_opts", key, None,
+            lambda: sorted({str(x).strip() for x in local_src[city_col].dropna() if str(x).strip()}),
+        )
+        sel_cities = col_c.multiselect("Місто", options=city_opts, default=[])
+        if sel_cities:
+            local_src = local_src[local_src[city_col].astype(str).str.strip().isin(sel_cities)]
+    if street_col:
+        src_for_streets = local_src
+        street_opts = section_memo(
+            "fact_street_opts", key, tuple(sel_cities),
+            lambda: sorted({str(x).strip() for x in src_for_streets[street_col].dropna() if str(x).strip()}),
+        )
+        sel_streets = col_s.multiselect("Вулиця", options=street_opts, default=[])
+        if sel_streets:
+            local_src = local_src[local_src[street_col].astype(str).str.strip().isin(sel_streets)]
+
+    # Одна зведена таблиця на весь зріз (адреса, клієнт, препарат) × (рік, місяць, декада)
+    facts = section_memo(
+        "address_facts", key, (tuple(sel_cities), tuple(sel_streets)),
+        lambda: address_facts.build_address_facts(address_facts.actual_sales(local_src)),
+    )
+    if facts.n_blocks == 0:
+        st.warning("За обраними фільтрами не знайдено даних для розрахунку.")
+        return
+
+    st.subheader("Загальна зведена таблиця по фактичних продажах")
+    if facts.product_pivot is not None:
+        st.dataframe(table_styling.style_positive(facts.product_pivot))
+    st.markdown("---")
+
+    st.info(f"Знайдено {facts.n_blocks} унікальних комбінацій адрес і клієнтів з фактичними продажами.")
+
+    # Пошук і сторінки блоків: рендеримо (і стилізуємо) лише видимі адреси
+    col_q, col_p = st.columns([3, 1])
+    query = col_q.text_input("Пошук адреси або клієнта", key="ds_fact_addr_search")
+    blocks = facts.search(query)
+    n_pages = table_styling.page_count(len(blocks), FACT_ADDR_BLOCKS_PER_PAGE)
+    # після звуження пошуку збережена сторінка може вийти за межі
+    if st.session_state.get("ds_fact_addr_page", 1) > n_pages:
+        st.session_state["ds_fact_addr_page"] = n_pages
+    page = col_p.number_input("Сторінка", min_value=1, max_value=n_pages, value=1, step=1, key="ds_fact_addr_page")
+    if query:
+        st.caption(f"Збігів: {len(blocks):,}")
+
+    page_blocks = table_styling.page_slice(blocks, page, FACT_ADDR_BLOCKS_PER_PAGE)
+    for full_address, client_name, total, start, stop in address_facts.block_rows(page_blocks):
+        exp_title = f"**{full_address or '—'}** (Клієнт: *{client_name or '—'}*)"
+        with st.expander(exp_title):
+            st.metric("Всього фактичних продажів за адресою:", f"{int(total):,}")
+            block = facts.block(start, stop)
+            if block is not None:
+                st.dataframe(table_styling.style_positive(block))
+
+
+def _abc_class(cum_share: pd.Series) -> pd.Series:
+    """A — до 80% кумулятивної частки, B — до 95%, C — решта"""
+    return pd.Series(
+        np.select([cum_share <= 80, cum_share <= 95], ['A', 'B'], default='C'),
+        index=cum_share.index,
+    )
+
+
+def _compute_pharmacy_abc(df_pharm_abc: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame] | None:
+    """ABC аптек за унікальною адресою: (за виручкою, за кількістю); None — немає адрес"""
+    tmp2 = pd.DataFrame({'__addr_key__': _address_key(df_pharm_abc)}, index=df_pharm_abc.index)
+    if {'city','street','house_number'}.issubset(df_pharm_abc.columns):
+        city = df_pharm_abc['city'].fillna('').astype(str).str.strip()
+        street = df_pharm_abc['street'].fillna('').astype(str).str.strip()
+        house = df_pharm_abc['house_number'].fillna('').astype(str).str.strip()
+        tmp2['__city_disp__'] = city
+        tmp2['__addr_disp__'] = (street + ' ' + house).str.strip()
+    else:
+        addr_src = next((c for c in ['full_address_processed', 'address'] if c in df_pharm_abc.columns), None)
+        tmp2['__addr_disp__'] = (
+            df_pharm_abc[addr_src].astype(str).fillna('').str.strip() if addr_src else ''
+        )
+        tmp2['__city_disp__'] = df_pharm_abc.get('city', pd.Series('', index=df_pharm_abc.index)).astype(str).fillna('').str.strip()
+    name_cols = [c for c in ['new_client','client','pharmacy','client_name'] if c in df_pharm_abc.columns]
+    tmp2['__client_name__'] = df_pharm_abc[name_cols[0]].astype(str).fillna('').str.strip() if name_cols else ''
+    tmp2['revenue'] = df_pharm_abc['revenue']
+    tmp2['quantity'] = df_pharm_abc['quantity']
+
+    if (tmp2['__addr_key__'] == '').all():
+        return None
+
+    pharm_rev = (
+        tmp2.groupby('__addr_key__', as_index=False)['revenue']
+        .sum().rename(columns={'revenue':'Сума'})
+        .sort_values('Сума', ascending=False)
+    )
+    pharm_qty = (
+        tmp2.groupby('__addr_key__', as_index=False)['quantity']
+        .sum().rename(columns={'quantity':'К-сть'})
+        .sort_values('К-сть', ascending=False)
+    )
+    disp2 = tmp2[['__addr_key__','__city_disp__','__addr_disp__','__client_name__']].groupby('__addr_key__', as_index=False).agg(
+        __city_disp__=('__city_disp__', lambda s: next((x for x in s if str(x).strip()), '')),
+        __addr_disp__=('__addr_disp__', lambda s: next((x for x in s if str(x).strip()), '')),
+        __client_name__=('__client_name__', lambda s: next((x for x in s if str(x).strip()), '')),
+    )
+    disp_names = {'__city_disp__':'Місто','__addr_disp__':'Адреса','__client_name__':'Аптека'}
+    pharm_rev = pharm_rev.merge(disp2, on='__addr_key__', how='left').rename(columns=disp_names)
+    pharm_qty = pharm_qty.merge(disp2, on='__addr_key__', how='left').rename(columns=disp_names)
+
+    for table, value_col in ((pharm_rev, 'Сума'), (pharm_qty, 'К-сть')):
+        if not table.empty:
+            total = float(table[value_col].sum()) or 1.0
+            table['Частка, %'] = 100.0 * table[value_col] / total
+            table['Кумулятивна частка, %'] = table['Частка, %'].cumsum()
+            table['Клас'] = _abc_class(table['Кумулятивна частка, %'])
+    return pharm_rev, pharm_qty
+
+
+def _render_pharmacy_abc(df_with_revenue: pd.DataFrame, key: tuple) -> None:
+    # === ABC-аналіз аптек (за унікальною адресою) ===
+    st.markdown("**ABC-аналіз аптек (за унікальною адресою)**")
+
+    # Optional filter by products for pharmacy ABC
+    prod_col_filter = 'product_name'
+    if prod_col_filter in df_with_revenue.columns:
+        prod_options = section_memo(
+            "abc_product_opts", key, None,
+            lambda: (
+                df_with_revenue[prod_col_filter]
+                .dropna()
+                .astype(str)
+                .str.strip()
+                .sort_values()
+                .unique()
+                .tolist()
+            ),
+        )
+        selected_products = st.multiselect(
+            'Фільтр препаратів для ABC аптек',
+            options=prod_options,
+            default=[],
+            help='Оберіть один або кілька препаратів. Порожній вибір = всі препарати.'
+        )
+    else:
+        selected_products = []
+
+    df_pharm_abc = df_with_revenue
+    if selected_products and prod_col_filter in df_pharm_abc.columns:
+        df_pharm_abc = df_pharm_abc[df_pharm_abc[prod_col_filter].astype(str).str.strip().isin(selected_products)]
+        if df_pharm_abc.empty:
+            st.info('За обраними препаратами даних немає для ABC-аналізу аптек.')
+
+    tables = section_memo(
+        "pharmacy_abc", key, tuple(sorted(selected_products)), lambda: _compute_pharmacy_abc(df_pharm_abc)
+    )
+    if tables is None:
+        st.info("Не вдалось сформувати унікальну адресу для ABC-аналізу аптек.")
+        return
+    pharm_rev, pharm_qty = tables
+
+    def _tab_ph_rev():
+        if not pharm_rev.empty:
+            st.dataframe(
+                pharm_rev[['Сума','Місто','Адреса','Аптека','Частка, %','Кумулятивна частка, %','Клас']]
+                    .style
+                    .format({'Сума':'{:,.2f} грн','Частка, %':'{:,.2f}','Кумулятивна частка, %':'{:,.2f}'} )
+                    .background_gradient(cmap='Greens', subset=['Сума'])
+                    .background_gradient(cmap='Blues', subset=['Частка, %']),
+                use_container_width=True,
+                hide_index=True,
+                height=545
+            )
+        else:
+            st.info("Немає даних для ABC-аналізу аптек за виручкою.")
+
+    def _tab_ph_qty():
+        if not pharm_qty.empty:
+            st.dataframe(
+                pharm_qty[['К-сть','Місто','Адреса','Аптека','Частка, %','Кумулятивна частка, %','Клас']]
+                    .style
+                    .format({'К-сть':'{:,.0f}','Частка, %':'{:,.2f}','Кумулятивна частка, %':'{:,.2f}'})
+                    .background_gradient(cmap='Blues', subset=['К-сть'])
+                    .background_gradient(cmap='Greens', subset=['Частка, %']),
+                use_container_width=True,
+                hide_index=True,
+                height=545
+            )
+        else:
+            st.info("Немає даних для ABC-аналізу аптек за кількістю.")
+
+    render_lazy_tabs({"За виручкою": _tab_ph_rev, "За кількістю": _tab_ph_qty}, key="ds_pharm_abc_tab")
+
+
+def _render_sales_tab(df_work: pd.DataFrame, df_with_revenue: pd.DataFrame, key: tuple) -> None:
+    # --- Дві колонки: 1) Мережі/точки  2) ABC-аналіз аптек ---
+    col_net, col_abc = st.columns([2,5])
+
+    with col_net:
+        render_lazy_tabs({
+            "Торгові точки": lambda: _render_network_points(df_with_revenue, key),
+            "Упаковки": lambda: _render_network_packs(df_with_revenue, key),
+            "Сума": lambda: _render_network_sums(df_with_revenue, key),
+            "Факт за адресами": lambda: _render_fact_by_address(df_work, key),
+        }, key="ds_network_tab")
+
+    with col_abc:
+        _render_pharmacy_abc(df_with_revenue, key)
+
+
 def show():
     _require_login()
     st.set_page_config(layout="wide")
@@ -425,6 +823,7 @@ def show():
     ss.setdefault('filters_dirty', False)
     ss.setdefault('last_submitted_filters', None)
     ss.setdefault('stock_df_processed', None)
+    ss.setdefault('stock_view', None)
 
     # Отримуємо дані користувача
     user = st.session_state.get('auth_user')
@@ -498,10 +897,7 @@ def show():
         else:
             # Для не-адміністраторів отримуємо region_id з профілю
             try:
-                if client and user and user.get('id'):
-                    result = client.table("profiles").select("region_id").eq("id", user['id']).execute()
-                    if result.data:
-                        sel_region_id = result.data[0].get('region_id')
+                sel_region_id = get_profile_service().region_id(user)
             except Exception:
                 sel_region_id = None
 
@@ -603,7 +999,7 @@ def show():
         # 2) Інакше — локальний кеш сесії; якщо промах — тягнемо з БД
         if df_loaded is None:
             with st.spinner("Завантажую дані продажів із Supabase..."):
-                sales_cache, _ = _get_session_cache()
+                sales_cache = _get_session_cache()
                 sales_key = _make_sales_key(region_param, territory_param or "Всі", line_param, months_param)
                 if sales_key in sales_cache:
                     df_loaded = sales_cache[sales_key]
@@ -645,13 +1041,7 @@ def show():
     # Прайси для всіх присутніх у даних місяців
     all_months_int = df_work['month_int'].dropna().astype(int).unique().tolist()
     if all_months_int and sel_region_id:
-        _, price_cache = _get_session_cache()
-        price_key_all = (sel_region_id, tuple(sorted(all_months_int)))
-        if price_key_all in price_cache:
-            price_df_all = price_cache[price_key_all]
-        else:
-            price_df_all = _cached_fetch_price(sel_region_id, all_months_int)
-            price_cache[price_key_all] = price_df_all
+        price_df_all = get_price_catalog().prices(sel_region_id, all_months_int)
     else:
         price_df_all = pd.DataFrame()
 
@@ -669,371 +1059,18 @@ def show():
         if 'revenue' not in df_with_revenue.columns:
             df_with_revenue['revenue'] = 0.0
 
-    tab_sales, tab_stock = st.tabs(["📊 Аналіз продажів", "📦 Залишки в аптеках"])
-
-    with tab_sales:
-        # --- Дві колонки: 1) Мережі/точки  2) ABC-аналіз аптек ---
-        col_net, col_abc = st.columns([2,5])
-
-        with col_net:
-            # --- Tabs: 1) Торгові точки  2) Упаковки  3) Суми   ---
-            tab_points, tab_packs, tab_sum_period, tab_fact_addr = st.tabs([
-                "Торгові точки", "Упаковки", "Сума", "Факт за адресами"
-            ])
-
-            with tab_points:
-                st.subheader("Мережі та кількість торгових точок")
-                net_src = df_with_revenue.copy()
-                if 'new_client' not in net_src.columns:
-                    st.info("Колонка 'new_client' відсутня — неможливо порахувати мережі.")
-                else:
-                    # Сформуємо адресний ключ
-                    if {'city','street','house_number'}.issubset(net_src.columns):
-                        net_tmp = net_src.copy()
-                        net_tmp['__city__'] = net_tmp['city'].fillna('').astype(str).str.strip()
-                        net_tmp['__street__'] = net_tmp['street'].fillna('').astype(str).str.strip()
-                        net_tmp['__house__'] = net_tmp['house_number'].fillna('').astype(str).str.strip()
-                        net_tmp['__addr_key__'] = (
-                            net_tmp['__city__'].str.lower() + '|' + net_tmp['__street__'].str.lower() + '|' + net_tmp['__house__'].str.lower()
-                        )
-                    else:
-                        net_tmp = net_src.copy()
-                        if 'full_address_processed' in net_tmp.columns:
-                            net_tmp['__addr_key__'] = net_tmp['full_address_processed'].astype(str).fillna('').str.strip().str.lower()
-                        elif 'address' in net_tmp.columns:
-                            net_tmp['__addr_key__'] = net_tmp['address'].astype(str).fillna('').str.strip().str.lower()
-                        else:
-                            net_tmp['__addr_key__'] = ''
-                    # Назва мережі
-                    net_tmp['__network__'] = net_tmp['new_client'].astype(str).fillna('').str.strip()
-                    # Відкидаємо порожні
-                    net_tmp = net_tmp[(net_tmp['__network__'] != '') & (net_tmp['__addr_key__'] != '')].copy()
-                    if net_tmp.empty:
-                        st.info("Немає достатніх даних (мережа/адреса) для підрахунку торгових точок.")
-                    else:
-                        # Унікальні пари (мережа, адреса)
-                        net_pairs = net_tmp[['__network__','__addr_key__']].drop_duplicates()
-                        # Кількість унікальних адрес (торгових точок) на мережу
-                        net_cnt = (
-                            net_pairs.groupby('__network__', as_index=False)['__addr_key__']
-                            .nunique()
-                            .rename(columns={'__network__':'Мережа','__addr_key__':'Точок'})
-                            .sort_values('Точок', ascending=False)
-                        )
-                        total_points = int(net_cnt['Точок'].sum()) or 1
-                        net_cnt['Частка, %'] = 100.0 * net_cnt['Точок'] / total_points
-                        net_cnt['Кумулятивна, %'] = net_cnt['Частка, %'].cumsum()
-                        # (Необов’язково) кількість міст для мережі
-                        if 'city' in net_src.columns:
-                            city_pairs = net_tmp[['__network__','city']].drop_duplicates()
-                            city_cnt = city_pairs.groupby('__network__', as_index=False)['city'].nunique().rename(columns={'__network__':'Мережа','city':'Міста(к-сть)'})
-                            net_cnt = net_cnt.merge(city_cnt, on='Мережа', how='left')
-                        # Вивід
-                        cols_net = ['Мережа','Точок','Частка, %','Кумулятивна, %'] + ([ 'Міста(к-сть)'] if 'Міста(к-сть)' in net_cnt.columns else [])
-                        st.dataframe(
-                            net_cnt[cols_net]
-                                .style
-                                .format({'Точок':'{:,.0f}','Частка, %':'{:,.2f}','Кумулятивна, %':'{:,.2f}'})
-                                .background_gradient(cmap='Blues', subset=['Точок']),
-                            use_container_width=True,
-                            hide_index=True,
-                            height=600
-                        )
-
-            with tab_packs:
-                st.subheader("Мережі та кількість упаковок")
-                qty_src = df_with_revenue.copy()
-                if 'new_client' not in qty_src.columns:
-                    st.info("Колонка 'new_client' відсутня — неможливо порахувати мережі.")
-                elif 'quantity' not in qty_src.columns:
-                    st.info("Колонка 'quantity' відсутня — неможливо порахувати кількість упаковок.")
-                else:
-                    qty_tmp = qty_src.copy()
-                    # Назва мережі
-                    qty_tmp['__network__'] = qty_tmp['new_client'].astype(str).fillna('').str.strip()
-                    # Відкидаємо порожні
-                    qty_tmp = qty_tmp[(qty_tmp['__network__'] != '')].copy()
-                    if qty_tmp.empty:
-                        st.info("Немає достатніх даних (мережа) для підрахунку упаковок.")
-                    else:
-                        # Гарантуємо числовий тип для quantity
-                        qty_tmp['quantity'] = pd.to_numeric(qty_tmp['quantity'], errors='coerce').fillna(0)
-                        net_qty = (
-                            qty_tmp.groupby('__network__', as_index=False)['quantity']
-                            .sum()
-                            .rename(columns={'__network__':'Мережа','quantity':'Упаковок'})
-                            .sort_values('Упаковок', ascending=False)
-                        )
-                        total_qty = float(net_qty['Упаковок'].sum()) or 1.0
-                        net_qty['Частка, %'] = 100.0 * net_qty['Упаковок'] / total_qty
-                        net_qty['Кумулятивна, %'] = net_qty['Частка, %'].cumsum()
-                        st.dataframe(
-                            net_qty[['Мережа','Упаковок','Частка, %','Кумулятивна, %']]
-                                .style
-                                .format({'Упаковок':'{:,.0f}','Частка, %':'{:,.2f}','Кумулятивна, %':'{:,.2f}'})
-                                .background_gradient(cmap='Blues', subset=['Упаковок'])
-                                .background_gradient(cmap='Greens', subset=['Частка, %']),
-                            use_container_width=True,
-                            hide_index=True,
-                            height=600
-                        )
-
-            with tab_sum_period:
-                st.subheader("Сума по мережах (за обраний період)")
-                sum_src = df_with_revenue.copy()
-                if 'new_client' not in sum_src.columns:
-                    st.info("Колонка 'new_client' відсутня — неможливо порахувати мережі.")
-                elif 'revenue' not in sum_src.columns:
-                    st.info("Колонка 'revenue' відсутня — суми не розраховані.")
-                else:
-                    tmp = sum_src.copy()
-                    tmp['__network__'] = tmp['new_client'].astype(str).fillna('').str.strip()
-                    tmp = tmp[tmp['__network__'] != '']
-                    if tmp.empty:
-                        st.info("Немає достатніх даних (мережа) для підрахунку суми.")
-                    else:
-                        tmp['revenue'] = pd.to_numeric(tmp['revenue'], errors='coerce').fillna(0.0)
-                        net_sum = (
-                            tmp.groupby('__network__', as_index=False)['revenue']
-                            .sum()
-                            .rename(columns={'__network__':'Мережа','revenue':'Сума'})
-                            .sort_values('Сума', ascending=False)
-                        )
-
-            with tab_fact_addr:
-                st.subheader("Деталізація фактичних замовлень по унікальних адресах")
-                # Локальні фільтри (місто/вулиця) на основі df_work
-                local_src = df_work.copy()
-                city_col = 'city' if 'city' in local_src.columns else None
-                street_col = 'street' if 'street' in local_src.columns else None
-                col_c, col_s = st.columns(2)
-                if city_col:
-                    city_opts = sorted({str(x).strip() for x in local_src[city_col].dropna() if str(x).strip()})
-                    sel_cities = col_c.multiselect("Місто", options=city_opts, default=[])
-                    if sel_cities:
-                        local_src = local_src[local_src[city_col].astype(str).str.strip().isin(sel_cities)]
-                else:
-                    sel_cities = []
-                if street_col:
-                    street_opts = sorted({str(x).strip() for x in local_src[street_col].dropna() if str(x).strip()})
-                    sel_streets = col_s.multiselect("Вулиця", options=street_opts, default=[])
-                    if sel_streets:
-                        local_src = local_src[local_src[street_col].astype(str).str.strip().isin(sel_streets)]
-                else:
-                    sel_streets = []
-
-                # Обчислюємо "факт" як позитивну кількість (за наявності quantity)
-                if 'quantity' in local_src.columns:
-                    df_actual_sales = local_src.copy()
-                    df_actual_sales['actual_quantity'] = pd.to_numeric(df_actual_sales['quantity'], errors='coerce').fillna(0)
-                    df_actual_sales = df_actual_sales[df_actual_sales['actual_quantity'] > 0]
-                else:
-                    df_actual_sales = pd.DataFrame()
-
-                if df_actual_sales.empty:
-                    st.warning("За обраними фільтрами не знайдено даних для розрахунку.")
-                else:
-                    def highlight_positive_dark_green(val):
-                        return f"background-color: {'#4B6F44' if (pd.to_numeric(val, errors='coerce') or 0) > 0 else ''}"
-
-                    st.subheader("Загальна зведена таблиця по фактичних продажах")
-                    idx_cols_exist = [c for c in ['product_name'] if c in df_actual_sales.columns]
-                    time_cols_exist = [c for c in ['year','month_int','decade'] if c in df_actual_sales.columns]
-                    if idx_cols_exist and time_cols_exist:
-                        pivot_fact = df_actual_sales.pivot_table(
-                            index=idx_cols_exist[0],
-                            columns=time_cols_exist,
-                            values='actual_quantity',
-                            aggfunc='sum', fill_value=0
-                        )
-                        st.dataframe(pivot_fact.style.applymap(highlight_positive_dark_green).format('{:.0f}'))
-                    st.markdown("---")
-
-                    # Формуємо повну адресу і групуємо по адресі+клієнту
-                    addr_df = df_actual_sales.copy()
-                    if {'city','street','house_number'}.issubset(addr_df.columns):
-                        addr_df['full_address'] = (
-                            addr_df['city'].fillna('').astype(str).str.strip() + ', ' +
-                            addr_df['street'].fillna('').astype(str).str.strip() + ' ' +
-                            addr_df['house_number'].fillna('').astype(str).str.strip()
-                        ).str.strip(', ')
-                    elif 'full_address_processed' in addr_df.columns:
-                        addr_df['full_address'] = addr_df['full_address_processed'].astype(str).fillna('').str.strip()
-                    elif 'address' in addr_df.columns:
-                        addr_df['full_address'] = addr_df['address'].astype(str).fillna('').str.strip()
-                    else:
-                        addr_df['full_address'] = ''
-
-                    client_name_col = next((c for c in ['new_client','client','pharmacy','client_name'] if c in addr_df.columns), None)
-                    if client_name_col is None:
-                        addr_df['__client_name__'] = ''
-                        client_name_col = '__client_name__'
-
-                    grouped = addr_df.groupby(['full_address', client_name_col])
-                    st.info(f"Знайдено {grouped.ngroups} унікальних комбінацій адрес і клієнтів з фактичними продажами.")
-
-                    for (full_address, client_name), group in grouped:
-                        exp_title = f"**{full_address or '—'}** (Клієнт: *{client_name or '—'}*)"
-                        with st.expander(exp_title):
-                            st.metric("Всього фактичних продажів за адресою:", f"{int(group['actual_quantity'].sum()):,}")
-                            if idx_cols_exist and time_cols_exist:
-                                pivot_table = group.pivot_table(
-                                    index=idx_cols_exist[0],
-                                    columns=time_cols_exist,
-                                    values='actual_quantity',
-                                    aggfunc='sum', fill_value=0
-                                )
-                                st.dataframe(pivot_table.style.applymap(highlight_positive_dark_green).format('{:.0f}'))
-                        total_rev = float(net_sum['Сума'].sum()) or 1.0
-                        net_sum['Частка, %'] = 100.0 * net_sum['Сума'] / total_rev
-                        net_sum['Кумулятивна, %'] = net_sum['Частка, %'].cumsum()
-                        st.dataframe(
-                            net_sum[['Мережа','Сума','Частка, %','Кумулятивна, %']]
-                                .style
-                                .format({'Сума':'{:,.2f} грн','Частка, %':'{:,.2f}','Кумулятивна, %':'{:,.2f}'})
-                                .background_gradient(cmap='Greens', subset=['Сума'])
-                                .background_gradient(cmap='Blues', subset=['Частка, %']),
-                            use_container_width=True,
-                            hide_index=True,
-                            height=600
-                        )
-
-        with col_abc:
-            # === ABC-аналіз аптек (за унікальною адресою) ===
-            st.markdown("**ABC-аналіз аптек (за унікальною адресою)**")
-
-            # Optional filter by products for pharmacy ABC
-            prod_col_filter = 'product_name'
-            if prod_col_filter in df_with_revenue.columns:
-                prod_options = (
-                    df_with_revenue[prod_col_filter]
-                    .dropna()
-                    .astype(str)
-                    .str.strip()
-                    .sort_values()
-                    .unique()
-                    .tolist()
-                )
-                selected_products = st.multiselect(
-                    'Фільтр препаратів для ABC аптек',
-                    options=prod_options,
-                    default=[],
-                    help='Оберіть один або кілька препаратів. Порожній вибір = всі препарати.'
-                )
-            else:
-                selected_products = []
-
-            df_pharm_abc = df_with_revenue.copy()
-            if selected_products and prod_col_filter in df_pharm_abc.columns:
-                df_pharm_abc = df_pharm_abc[df_pharm_abc[prod_col_filter].astype(str).str.strip().isin(selected_products)]
-                if df_pharm_abc.empty:
-                    st.info('За обраними препаратами даних немає для ABC-аналізу аптек.')
-
-            # Build address key and display fields
-            if {'city','street','house_number'}.issubset(df_pharm_abc.columns):
-                tmp2 = df_pharm_abc.copy()
-                tmp2['__city__'] = tmp2['city'].fillna('').astype(str).str.strip()
-                tmp2['__street__'] = tmp2['street'].fillna('').astype(str).str.strip()
-                tmp2['__house__'] = tmp2['house_number'].fillna('').astype(str).str.strip()
-                tmp2['__addr_key__'] = (
-                    tmp2['__city__'].str.lower() + '|' + tmp2['__street__'].str.lower() + '|' + tmp2['__house__'].str.lower()
-                )
-                tmp2['__city_disp__'] = tmp2['__city__']
-                tmp2['__addr_disp__'] = (tmp2['__street__'] + ' ' + tmp2['__house__']).str.strip()
-                name_cols = [c for c in ['new_client','client','pharmacy','client_name'] if c in tmp2.columns]
-                if name_cols:
-                    tmp2['__client_name__'] = tmp2[name_cols[0]].astype(str).fillna('').str.strip()
-                else:
-                    tmp2['__client_name__'] = ''
-            else:
-                tmp2 = df_pharm_abc.copy()
-                if 'full_address_processed' in tmp2.columns:
-                    tmp2['__addr_key__'] = tmp2['full_address_processed'].astype(str).fillna('').str.strip().str.lower()
-                    tmp2['__addr_disp__'] = tmp2['full_address_processed'].astype(str).fillna('').str.strip()
-                elif 'address' in tmp2.columns:
-                    tmp2['__addr_key__'] = tmp2['address'].astype(str).fillna('').str.strip().str.lower()
-                    tmp2['__addr_disp__'] = tmp2['address'].astype(str).fillna('').str.strip()
-                else:
-                    tmp2['__addr_key__'] = ''
-                    tmp2['__addr_disp__'] = ''
-                tmp2['__city_disp__'] = tmp2.get('city', pd.Series('', index=tmp2.index)).astype(str).fillna('').str.strip()
-                name_cols = [c for c in ['new_client','client','pharmacy','client_name'] if c in tmp2.columns]
-                if name_cols:
-                    tmp2['__client_name__'] = tmp2[name_cols[0]].astype(str).fillna('').str.strip()
-                else:
-                    tmp2['__client_name__'] = ''
-
-            if (tmp2['__addr_key__'] == '').all():
-                st.info("Не вдалось сформувати унікальну адресу для ABC-аналізу аптек.")
-                return
-
-            # Aggregate by address
-            pharm_rev = (
-                tmp2.groupby('__addr_key__', as_index=False)['revenue']
-                .sum().rename(columns={'revenue':'Сума'})
-                .sort_values('Сума', ascending=False)
-            )
-            pharm_qty = (
-                tmp2.groupby('__addr_key__', as_index=False)['quantity']
-                .sum().rename(columns={'quantity':'К-сть'})
-                .sort_values('К-сть', ascending=False)
-            )
-            disp2 = tmp2[['__addr_key__','__city_disp__','__addr_disp__','__client_name__']].groupby('__addr_key__', as_index=False).agg(
-                __city_disp__=('__city_disp__', lambda s: next((x for x in s if str(x).strip()), '')),
-                __addr_disp__=('__addr_disp__', lambda s: next((x for x in s if str(x).strip()), '')),
-                __client_name__=('__client_name__', lambda s: next((x for x in s if str(x).strip()), '')),
-            )
-            pharm_rev = pharm_rev.merge(disp2, on='__addr_key__', how='left').rename(columns={'__city_disp__':'Місто','__addr_disp__':'Адреса','__client_name__':'Аптека'})
-            pharm_qty = pharm_qty.merge(disp2, on='__addr_key__', how='left').rename(columns={'__city_disp__':'Місто','__addr_disp__':'Адреса','__client_name__':'Аптека'})
-
-            tab_ph_rev, tab_ph_qty = st.tabs(["За виручкою", "За кількістю"])
-            with tab_ph_rev:
-                if not pharm_rev.empty:
-                    total_r = float(pharm_rev['Сума'].sum()) or 1.0
-                    pharm_rev['Частка, %'] = 100.0 * pharm_rev['Сума'] / total_r
-                    pharm_rev['Кумулятивна частка, %'] = pharm_rev['Частка, %'].cumsum()
-                    def _abc_class_addr_r(x):
-                        if x <= 80: return 'A'
-                        if x <= 95: return 'B'
-                        return 'C'
-                    pharm_rev['Клас'] = pharm_rev['Кумулятивна частка, %'].apply(_abc_class_addr_r)
-                    st.dataframe(
-                        pharm_rev[['Сума','Місто','Адреса','Аптека','Частка, %','Кумулятивна частка, %','Клас']]
-                            .style
-                            .format({'Сума':'{:,.2f} грн','Частка, %':'{:,.2f}','Кумулятивна частка, %':'{:,.2f}'} )
-                            .background_gradient(cmap='Greens', subset=['Сума'])
-                            .background_gradient(cmap='Blues', subset=['Частка, %']),
-                        use_container_width=True,
-                        hide_index=True,
-                        height=545
-                    )
-                else:
-                    st.info("Немає даних для ABC-аналізу аптек за виручкою.")
-            with tab_ph_qty:
-                if not pharm_qty.empty:
-                    total_q = float(pharm_qty['К-сть'].sum()) or 1.0
-                    pharm_qty['Частка, %'] = 100.0 * pharm_qty['К-сть'] / total_q
-                    pharm_qty['Кумулятивна частка, %'] = pharm_qty['Частка, %'].cumsum()
-                    def _abc_class_addr_q(x):
-                        if x <= 80: return 'A'
-                        if x <= 95: return 'B'
-                        return 'C'
-                    pharm_qty['Клас'] = pharm_qty['Кумулятивна частка, %'].apply(_abc_class_addr_q)
-                    st.dataframe(
-                        pharm_qty[['К-сть','Місто','Адреса','Аптека','Частка, %','Кумулятивна частка, %','Клас']]
-                            .style
-                            .format({'К-сть':'{:,.0f}','Частка, %':'{:,.2f}','Кумулятивна частка, %':'{:,.2f}'})
-                            .background_gradient(cmap='Blues', subset=['К-сть'])
-                            .background_gradient(cmap='Greens', subset=['Частка, %']),
-                        use_container_width=True,
-                        hide_index=True,
-                        height=545
-                    )
-                else:
-                    st.info("Немає даних для ABC-аналізу аптек за кількістю.")
+    # Ідентичність вибірки для мемо лінивих секцій
+    sections_key = data_key(
+        _make_sales_key(region_param, territory_param or "Всі", line_param, months_param),
+        sel_region_id,
+        tables=("sales_data", "price"),
+    )
 
-    with tab_stock:
-        _render_stock_tab(client)
+    # Вкладки рахуються лише при виборі (залишки не вантажаться, поки не відкриті)
+    render_lazy_tabs({
+        "📊 Аналіз продажів": lambda: _render_sales_tab(df_work, df_with_revenue, sections_key),
+        "📦 Залишки в аптеках": lambda: _render_stock_tab(client),
+    }, key="ds_main_tab")
 
 
 def show_drug_store_page():
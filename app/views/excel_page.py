@@ -8,16 +8,18 @@ PROJECT_ROOT = os.path.dirname(APP_DIR)
 if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 
-from app.io.excel_reader import list_sheets, read_excel_bytes
-from app.data.cleaners import clean_dataframe, apply_rename, reorder_others, to_numeric_wide
-from app.data.transform import unpivot_long, group_by_drug_and_specialty, group_for_combo_chart
+from app.io.excel_reader import read_excel_bytes
+from app.data.points_pipeline import run_points_ingest
+from app.data.transform import group_by_drug_and_specialty, group_for_combo_chart
 from app.charts.bars import bar_drug_vs_qty, bar_combo_category
 from app.charts.filters import specialization_and_drug_filters
 from app.io.supabase_client import init_supabase_client
-from app.io.uploader import upload_doctor_points
+from app.jobs import get_job_runner
+from app.jobs.tasks import KIND_DOCTOR_POINTS_UPLOAD, doctor_points_upload_task
+from app.ui.jobs_panel import current_job_owner, render_jobs_panel
 # Видаляємо імпорт навігації, оскільки вона вже є в основному файлі
-from app.core.config import PIN_COLS, DROP_COLS, DEFAULT_HEADER_ROW
 import re
+import time
 
 # --- Auth guard: require login before viewing this page ---
 def _require_login():
@@ -77,27 +79,13 @@ def show_excel_content():
 
     with st.spinner("Читаю файл..."):
         # Always use first sheet and skip first 2 rows (header at row 2, i.e., third row)
+        t_read = time.perf_counter()
         df = read_excel_bytes(uploaded.getvalue(), sheet_name=0, header_row=2)
-        df = clean_dataframe(df)
-        df = apply_rename(df)
-
-        # Обрізаємо по якірній колонці, якщо є
-        anchor_col = "Кіл-сть упаковок загальна"
-        if anchor_col in df.columns:
-            df = df.loc[:, :anchor_col]
-
-        # Видаляємо непотрібні
-        df = df.drop(columns=[col for col in DROP_COLS if col in df.columns], errors="ignore")
-
-        # Формуємо зафіксовані колонки
-        present_pins = [c for c in PIN_COLS if c in df.columns]
-        df = reorder_others(df, present_pins)
-
-        # Числові колонки
-        df = to_numeric_wide(df)
-
-        # Перетворюємо у довгий формат
-        df_long = unpivot_long(df, id_cols=present_pins).reset_index(drop=True)
+        t_read = time.perf_counter() - t_read
+        # Очистка, перейменування, обрізка, числові колонки та unpivot — одним проходом
+        ingest = run_points_ingest(df)
+        ingest.timings = {"Читання Excel": t_read, **ingest.timings}
+        df_long = ingest.df_long
         df_long["Файл"] = uploaded.name
 
         # Extract year and month from filename (allowing underscore or space between)
@@ -109,14 +97,28 @@ def show_excel_content():
             df_long["year"] = None
             df_long["month"] = None
 
-    st.success(f"Зчитано: {len(df):,} рядків × {df.shape[1]} колонок")
+    st.success(f"Зчитано: {ingest.n_wide_rows:,} рядків × {ingest.n_wide_cols} колонок")
+    with st.expander("⏱️ Час етапів обробки"):
+        st.dataframe(
+            pd.DataFrame({"Етап": list(ingest.timings), "Секунд": list(ingest.timings.values())}),
+            hide_index=True,
+        )
 
     # --- Кнопка завантаження у Supabase ---
     client = init_supabase_client()
     if client and not df_long.empty:
         if st.button("Завантажити в Supabase (doctor_points)"):
-            inserted = upload_doctor_points(client, df_long, table_name="doctor_points")
-            st.success(f"✅ Успішно завантажено {inserted} рядків у doctor_points")
+            # вставка йде у фоні — сторінкою можна користуватися далі
+            get_job_runner().submit(
+                KIND_DOCTOR_POINTS_UPLOAD,
+                f"doctor_points: {uploaded.name}",
+                doctor_points_upload_task,
+                client,
+                df_long.copy(),
+                owner=current_job_owner(),
+            )
+            st.info("Завантаження поставлено в чергу — статус у панелі нижче.")
+        render_jobs_panel(kinds=[KIND_DOCTOR_POINTS_UPLOAD], title="Завантаження doctor_points")
     elif not client:
         st.info("Додайте SUPABASE_URL та SUPABASE_KEY у st.secrets для завантаження у базу.")
 
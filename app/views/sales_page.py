@@ -21,6 +21,8 @@ from app.utils.sales_formatters import SalesFormatters
 from app.utils.sales_cache import SalesCacheManager
 from app.utils.geocoding_service import GeocodingService
 from app.utils import UKRAINIAN_MONTHS
+from app.ui.lazy_sections import lazy_expander, render_lazy_tabs
+from app.utils.data_fingerprint import derive, stamp
 
 
 def _require_login():
@@ -159,45 +161,44 @@ def _render_top_pharmacies(analytics_service: SalesAnalyticsService, formatters:
         st.info("Не вдалось сформувати унікальну адресу для агрегації аптек.")
         return
     
-    tab_cli_rev, tab_cli_qty = st.tabs(["За виручкою", "За кількістю"])
-    
-    with tab_cli_rev:
+    def _tab_cli_rev():
         df_rev10 = top_pharmacies.sort_values('Сума', ascending=False).head(10)
         cols_rev = ['Сума','Аптека','Місто','Адреса'] + [c for c in df_rev10.columns if c not in ['__addr_key__','Сума','К-сть','Аптека','Місто','Адреса']]
         styled_rev = formatters.style_top_pharmacies_table(df_rev10[cols_rev], 'revenue')
         st.dataframe(styled_rev, use_container_width=True, hide_index=True)
     
-    with tab_cli_qty:
+    def _tab_cli_qty():
         df_qty10 = top_pharmacies.sort_values('К-сть', ascending=False).head(10)
         cols_qty = ['К-сть','Аптека','Місто','Адреса'] + [c for c in df_qty10.columns if c not in ['__addr_key__','Сума','К-сть','Аптека','Місто','Адреса']]
         styled_qty = formatters.style_top_pharmacies_table(df_qty10[cols_qty], 'quantity')
         st.dataframe(styled_qty, use_container_width=True, hide_index=True)
 
+    render_lazy_tabs({"За виручкою": _tab_cli_rev, "За кількістю": _tab_cli_qty}, key="sales_top_pharm_tab")
+
 
-def _render_charts(charts_service: SalesChartsService, df_work: pd.DataFrame, df_latest_decade: pd.DataFrame,
-                  df_city_src: pd.DataFrame, df_period_trend: pd.DataFrame, bcg_data: pd.DataFrame,
+def _render_charts(charts_service: SalesChartsService, analytics_service: SalesAnalyticsService,
+                  df_work: pd.DataFrame, df_latest_decade: pd.DataFrame,
+                  df_city_src: pd.DataFrame, df_period_trend: pd.DataFrame,
                   sel_months_int: list, last_decade: int, cur_month: int, cur_year: int) -> None:
-    """Рендерить всі графіки"""
-    tab_qty, tab_city, tab_trend, tab_bcg = st.tabs(["Кількість по продуктах", "Виручка по містах (+ к-сть)", "Тренд по декадах ", "BCG"])
-    
-    with tab_qty:
-        charts_service.render_product_quantity_chart(df_work, df_latest_decade, sel_months_int, last_decade, cur_month, cur_year)
-    
-    with tab_city:
-        charts_service.render_city_revenue_chart(df_city_src)
-    
-    with tab_trend:
-        charts_service.render_trend_chart(df_period_trend)
-    
-    with tab_bcg:
+    """Рендерить графік обраної вкладки (інші не рахуються)"""
+    def _tab_bcg():
+        bcg_data = analytics_service.calculate_bcg_matrix(df_city_src)
         if bcg_data is not None and not bcg_data.empty:
             charts_service.render_bcg_matrix(bcg_data)
 
+    render_lazy_tabs({
+        "Кількість по продуктах": lambda: charts_service.render_product_quantity_chart(
+            df_work, df_latest_decade, sel_months_int, last_decade, cur_month, cur_year
+        ),
+        "Виручка по містах (+ к-сть)": lambda: charts_service.render_city_revenue_chart(df_city_src),
+        "Тренд по декадах ": lambda: charts_service.render_trend_chart(df_period_trend),
+        "BCG": _tab_bcg,
+    }, key="sales_chart_tab")
+
 
 
 def _render_analytics(analytics_service: SalesAnalyticsService, formatters: SalesFormatters,
-                     combined_prod: pd.DataFrame, df_period_abc: pd.DataFrame, 
-                     grow_rev: pd.DataFrame, grow_qty: pd.DataFrame) -> None:
+                     combined_prod: pd.DataFrame, df_period_abc: pd.DataFrame) -> None:
     """Рендерить аналітичні таблиці"""
     cols_top_abc = st.columns([2,4])
     
@@ -223,9 +224,7 @@ def _render_analytics(analytics_service: SalesAnalyticsService, formatters: Sale
         prod_col_full2 = 'product_name_clean' if 'product_name_clean' in df_period_abc.columns else ('product_name' if 'product_name' in df_period_abc.columns else None)
         
         if prod_col_full2:
-            tab_rev, tab_qty_abc = st.tabs(["За виручкою", "За кількістю"])
-            
-            with tab_rev:
+            def _tab_rev():
                 abc_rev = analytics_service.calculate_abc_analysis(df_period_abc, 'revenue')
                 if not abc_rev.empty:
                     styled_abc_rev = formatters.style_abc_table(abc_rev, 'revenue')
@@ -233,13 +232,15 @@ def _render_analytics(analytics_service: SalesAnalyticsService, formatters: Sale
                 else:
                     st.info("Немає даних для ABC-аналізу за виручкою.")
             
-            with tab_qty_abc:
+            def _tab_qty_abc():
                 abc_qty = analytics_service.calculate_abc_analysis(df_period_abc, 'quantity')
                 if not abc_qty.empty:
                     styled_abc_qty = formatters.style_abc_table(abc_qty, 'quantity')
                     st.dataframe(styled_abc_qty, use_container_width=True, hide_index=True, height=488)
                 else:
                     st.info("Немає даних для ABC-аналізу за кількістю.")
+
+            render_lazy_tabs({"За виручкою": _tab_rev, "За кількістю": _tab_qty_abc}, key="sales_abc_tab")
         else:
             st.info("Колонка продукту відсутня для ABC-аналізу.")
 
@@ -247,8 +248,6 @@ def _render_analytics(analytics_service: SalesAnalyticsService, formatters: Sale
 def _render_growth_analysis(analytics_service: SalesAnalyticsService, formatters: SalesFormatters,
                            df_period_dyn: pd.DataFrame) -> None:
     """Рендерить аналіз росту"""
-    st.subheader("Динаміка при виборі кількох місяців")
-    
     grow_rev, grow_qty = analytics_service.calculate_growth_metrics(df_period_dyn)
     
     if not grow_rev.empty and not grow_qty.empty:
@@ -326,6 +325,9 @@ def show():
         st.stop()
     
     st.success(f"Завантажено {len(df_loaded):,} рядків.")
+
+    # Відбиток вибірки: методи сервісів мемоізуються за ним (без хешування даних)
+    stamp(df_loaded, sales_key, tables=("sales_data",))
     
     # Підготовка даних
     df_work = data_service.prepare_work_data(df_loaded)
@@ -342,11 +344,8 @@ def show():
         region_id_for_price = match_r['id'] if match_r else None
 
     if all_months_int and region_id_for_price:
-        price_key_all = cache_manager.make_price_key(region_id_for_price, all_months_int)
-        price_df_all = cache_manager.get_cached_price_data(price_key_all)
-        if price_df_all is None:
-            price_df_all = data_service.fetch_price_data(region_id_for_price, all_months_int)
-            cache_manager.set_cached_price_data(price_key_all, price_df_all)
+        # одна вибірка цін на регіон; підмножини місяців — зрізи каталогу
+        price_df_all = data_service.fetch_price_data(region_id_for_price, all_months_int)
     else:
         if not region_id_for_price:
             st.info("Ціни не завантажено — не вдалося визначити ID регіону для отримання прайсів.")
@@ -370,13 +369,11 @@ def show():
     
     # Розрахунок доходів для останньої декади
     df_latest_with_revenue = df_latest_decade.copy()
-    if cur_month is not None and filters['region_id']:
-        price_key_cur = cache_manager.make_price_key(filters['region_id'], [cur_month])
-        price_df_cur = cache_manager.get_cached_price_data(price_key_cur)
-        if price_df_cur is None:
-            price_df_cur = data_service.fetch_price_data(filters['region_id'], [cur_month])
-            cache_manager.set_cached_price_data(price_key_cur, price_df_cur)
-        
+    price_df_cur = pd.DataFrame()
+    if cur_month is not None and region_id_for_price:
+        # зріз уже завантаженого каталогу — без повторного запиту до price
+        price_df_cur = data_service.fetch_price_data(region_id_for_price, [cur_month])
+
         if not price_df_cur.empty:
             df_latest_with_revenue = pd.merge(
                 df_latest_with_revenue,
@@ -390,6 +387,7 @@ def show():
             df_latest_with_revenue['revenue'] = 0.0
     elif 'revenue' not in df_latest_with_revenue.columns:
         df_latest_with_revenue['revenue'] = 0.0
+    derive(df_latest_with_revenue, "latest_revenue", df_latest_decade, price_df_cur)
     
     # Рендеринг KPI метрик
     _render_kpi_metrics(analytics_service, formatters, df_latest_decade, df_latest_with_revenue, df_with_revenue)
@@ -406,17 +404,19 @@ def show():
     
     with col2:
         # Графіки
-        _render_charts(charts_service, df_work, df_latest_decade, df_with_revenue, df_with_revenue, 
-                      analytics_service.calculate_bcg_matrix(df_with_revenue), filters['months'], 
-                      last_decade, cur_month, cur_year)
+        _render_charts(charts_service, analytics_service, df_work, df_latest_decade, df_with_revenue, df_with_revenue,
+                      filters['months'], last_decade, cur_month, cur_year)
         
         # Аналітичні таблиці
-        _render_analytics(analytics_service, formatters, combined_prod, df_with_revenue, 
-                         pd.DataFrame(), pd.DataFrame())
+        _render_analytics(analytics_service, formatters, combined_prod, df_with_revenue)
         
-        # Аналіз росту (якщо обрано кілька місяців)
+        # Аналіз росту (якщо обрано кілька місяців) — рахується лише на вимогу
         if len(filters['months']) > 1:
-            _render_growth_analysis(analytics_service, formatters, df_with_revenue)
+            lazy_expander(
+                "Динаміка при виборі кількох місяців",
+                lambda: _render_growth_analysis(analytics_service, formatters, df_with_revenue),
+                key="sales_growth_open",
+            )
 
 
 def show_sales_page():
@@ -337,11 +337,8 @@ def show():
         region_id_for_price = match_r['id'] if match_r else None
 
     if all_months_int and region_id_for_price:
-        price_key_all = cache_manager.make_price_key(region_id_for_price, all_months_int)
-        price_df_all = cache_manager.get_cached_price_data(price_key_all)
-        if price_df_all is None:
-            price_df_all = data_service.fetch_price_data(region_id_for_price, all_months_int)
-            cache_manager.set_cached_price_data(price_key_all, price_df_all)
+        # одна вибірка цін на регіон; підмножини місяців — зрізи каталогу
+        price_df_all = data_service.fetch_price_data(region_id_for_price, all_months_int)
     else:
         if not region_id_for_price:
             st.info("Ціни не завантажено — не вдалося визначити ID регіону для отримання прайсів.")
@@ -366,13 +363,10 @@ def show():
     
     # Розрахунок доходів для останньої декади
     df_latest_with_revenue = df_latest_decade.copy()
-    if cur_month is not None and filters['region_id']:
-        price_key_cur = cache_manager.make_price_key(filters['region_id'], [cur_month])
-        price_df_cur = cache_manager.get_cached_price_data(price_key_cur)
-        if price_df_cur is None:
-            price_df_cur = data_service.fetch_price_data(filters['region_id'], [cur_month])
-            cache_manager.set_cached_price_data(price_key_cur, price_df_cur)
-        
+    if cur_month is not None and region_id_for_price:
+        # зріз уже завантаженого каталогу — без повторного запиту до price
+        price_df_cur = data_service.fetch_price_data(region_id_for_price, [cur_month])
+
         if not price_df_cur.empty:
             df_latest_with_revenue = pd.merge(
                 df_latest_with_revenue,
@@ -17,6 +17,9 @@ from app.io.loader_sales import fetch_all_sales_data
 from app.data.processing_sales import create_full_address, compute_actual_sales
 from app.data.transform import unpivot_long, group_by_drug_and_specialty
 from app.utils import PRODUCTS_DICT
+from app.jobs import get_job_runner
+from app.jobs.tasks import KIND_SALES_UPLOAD, sales_upload_task
+from app.ui.jobs_panel import current_job_owner, render_jobs_panel
 
 # --- Auth guard: require login before viewing this page ---
 def _require_login():
@@ -168,8 +171,20 @@ def show(show_title=True):
             st.subheader("⚠️ Адреси, не знайдені в golden")
             st.dataframe(unmatched_df[["Факт.адреса доставки"]])
 
+        upload_modes = {
+            "Оновити наявні рядки (upsert)": "upsert",
+            "Пропустити наявні рядки": "skip",
+            "Додати всі рядки (без перевірки)": "append",
+        }
+        mode_label = st.radio(
+            "Повторне завантаження файлу:",
+            list(upload_modes),
+            key="upload_mode",
+            help="Рядки зіставляються за природним ключем (регіон, adding, дистриб'ютор, клієнт, адреса, препарат, декада).",
+        )
+
         if st.button("💾 Завантажити у Supabase", key="upload_button"):
-            with st.spinner("Вставка у Supabase..."):
+            with st.spinner("Підготовка даних..."):
                 try:
                     upload_df = df.rename(
                         columns={
@@ -219,13 +234,21 @@ def show(show_title=True):
                     final_upload_df = final_upload_df.where(pd.notna(final_upload_df), None)
                     data_to_insert = final_upload_df.to_dict(orient="records")
 
-                    resp = supabase.table("sales_data").insert(data_to_insert).execute()
-                    if resp.data:
-                        st.success(f"✅ Завантажено {len(resp.data)} рядків.")
-                    else:
-                        st.error(f"Не вдалося завантажити: {resp.error if hasattr(resp, 'error') else 'невідома помилка'}")
+                    adding = df["adding"].dropna().iloc[0] if df["adding"].notna().any() else "—"
+                    get_job_runner().submit(
+                        KIND_SALES_UPLOAD,
+                        f"sales_data: {df['region_name'].iloc[0]} / {adding}",
+                        sales_upload_task,
+                        supabase,
+                        data_to_insert,
+                        mode=upload_modes[mode_label],
+                        owner=current_job_owner(),
+                    )
+                    st.info("Завантаження поставлено в чергу — статус у панелі нижче.")
                 except Exception as e:
-                    st.error(f"Помилка при завантаженні у Supabase: {e}")
+                    st.error(f"Помилка при підготовці даних: {e}")
+
+        render_jobs_panel(kinds=[KIND_SALES_UPLOAD], title="Завантаження sales_data")
 
 def show_upload_page():
     """
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from app.data.sales_keys import canonical_frame, plan_sales_upsert
+
+
+def _row(**overrides) -> dict:
+    row = {
+        "region": "Київ", "adding": "Березень", "distributor": "Дистриб'ютор",
+        "edrpou": "12345678", "client": "Аптека 1", "delivery_address": "вул. Хрещатик, 1",
+        "product_name": "Препарат", "decade": 10, "quantity": 5, "city_xls": "Київ",
+        "client_legal_address": "", "city": "Київ", "street": "Хрещатик", "house_number": "1",
+        "territory": "T1", "product_line": "Лінія 1", "year": 2025, "month": 3, "new_client": "",
+    }
+    row.update(overrides)
+    return row
+
+
+def _existing(*rows: dict) -> pd.DataFrame:
+    return pd.DataFrame([{"id": i + 1, **r} for i, r in enumerate(rows)])
+
+
+def test_canonical_frame_treats_year_text_int_and_float_alike():
+    df = pd.DataFrame({"year": ["2025", 2025, 2025.0, " 2025 "]})
+    assert canonical_frame(df, ["year"])["year"].tolist() == ["2025"] * 4
+
+
+def test_year_type_difference_is_not_a_change():
+    plan = plan_sales_upsert([_row(year="2025", decade="10")], _existing(_row(year=2025.0, decade=10)))
+    assert plan.counts == {"inserted": 0, "updated": 0, "skipped": 1}
+
+
+def test_duplicate_keys_in_file_are_matched_by_ordinal():
+    records = [_row(quantity=5), _row(quantity=7), _row(quantity=9)]
+    plan = plan_sales_upsert(records, _existing(_row(quantity=5), _row(quantity=8)))
+
+    # перший — без змін, другий — оновлює другий рядок БД, третій — новий
+    assert plan.skipped == 1
+    assert plan.to_update == [{"id": 2, **records[1]}]
+    assert plan.to_insert == [records[2]]
+
+
+def test_skip_mode_does_not_update_changed_rows():
+    plan = plan_sales_upsert([_row(quantity=6)], _existing(_row(quantity=5)), mode="skip")
+    assert plan.counts == {"inserted": 0, "updated": 0, "skipped": 1}
+
+
+def test_null_region_and_adding_match_existing_nulls():
+    record = _row(region=None, adding=None)
+    plan = plan_sales_upsert([record], _existing(_row(region=float("nan"), adding=None)))
+    assert plan.counts == {"inserted": 0, "updated": 0, "skipped": 1}
+
+    plan = plan_sales_upsert([record], _existing(_row()))
+    assert plan.to_insert == [record]
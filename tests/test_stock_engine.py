@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from app.data.stock_engine import StockEngine
+
+
+def _reports(n_days: int = 20, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    rid = 0
+    for day in pd.date_range("2025-03-01", periods=n_days, freq="D"):
+        for ph in range(1, 5):
+            for drug in ("A", "B", "C"):
+                if rng.random() < 0.6:
+                    rid += 1
+                    rows.append({
+                        "id": rid, "pharmacy_id": ph, "pharmacy_name": f"Аптека {ph}",
+                        "pharmacy_city": "Київ", "drug_name": drug, "mp_id": 1,
+                        "mp_full_name": "МП", "visit_date": day, "visit_session_id": rid,
+                        "quantity": int(rng.integers(0, 50)),
+                    })
+    return pd.DataFrame(rows)
+
+
+def _window(df: pd.DataFrame, date_from: str, date_to: str) -> pd.DataFrame:
+    return df[(df["visit_date"] >= date_from) & (df["visit_date"] <= date_to)]
+
+
+def test_history_same_for_cold_and_warm_engine():
+    df = _reports()
+    date_from, date_to = "2025-03-08", "2025-03-14"
+
+    cold = StockEngine()
+    cold.ingest(_window(df, date_from, date_to))
+
+    warm = StockEngine()
+    warm.ingest(_window(df, "2025-03-01", "2025-03-20"))
+
+    pd.testing.assert_frame_equal(
+        cold.history(date_from, date_to), warm.history(date_from, date_to), check_dtype=False
+    )
+
+
+def test_history_matches_groupby_shift_over_window():
+    df = _reports()
+    engine = StockEngine()
+    engine.ingest(df)
+
+    expected = _window(df, "2025-03-05", "2025-03-12").sort_values(
+        ["pharmacy_id", "drug_name", "visit_date"], kind="stable"
+    )
+    expected_prev = expected.groupby(["pharmacy_id", "drug_name"])["quantity"].shift(1)
+
+    hist = engine.history("2025-03-05", "2025-03-12")
+    np.testing.assert_array_equal(hist["prev_quantity"].to_numpy(), expected_prev.to_numpy())
+    np.testing.assert_array_equal(hist["diff"].to_numpy(), (expected["quantity"] - expected_prev).to_numpy())